@@ -1,9 +1,10 @@
-from pydantic import BaseModel, Field, constr
+from pydantic import BaseModel, Field, constr, field_validator
 from uuid import UUID
 from typing import List, Optional
 import datetime
 
 from openetl_utils.enums import IntegrationType, AuthType
+from openetl_utils.spark_utils import validate_write_config
 
 
 class CreatePipelineModel(BaseModel):
@@ -21,6 +22,14 @@ class CreatePipelineModel(BaseModel):
     schedule_time: str = Field(..., min_length=3,  examples=["00:00:00"])
     frequency: str = Field(..., min_length=3,  examples=["daily"])
     batch_size: int = Field(...,  examples=["100000"])
+    read_config: Optional[dict] = Field(None, examples=[{"mode": "partitioned", "fetchsize": 10000}])
+    write_config: Optional[dict] = Field(None, examples=[{"batchsize": 10000, "numPartitions": 8}])
+
+    @field_validator("write_config")
+    @classmethod
+    def check_write_config(cls, value):
+        validate_write_config(value)
+        return value
 
 
 class IntegrationBody(BaseModel):
@@ -32,6 +41,8 @@ class IntegrationBody(BaseModel):
     spark_config: Optional[dict] = Field(None, description="Spark configuration (optional)")
     hadoop_config: Optional[dict] = Field(None, description="Hadoop configuration (optional)")
     batch_size: Optional[int] = Field(None, description="Batch size for processing")
+    read_config: Optional[dict] = Field(None, description="Source read options (mode, partition column, fetchsize)")
+    write_config: Optional[dict] = Field(None, description="Target write options (method, batchsize, numPartitions)")
     source_table: Optional[constr(min_length=1)] = Field(None, description="Source table name")
     target_table: Optional[constr(min_length=1)] = Field(None, description="Target table name")
     source_schema: Optional[constr(min_length=1)] = Field(None, description="Source schema name")
@@ -39,6 +50,12 @@ class IntegrationBody(BaseModel):
     is_enabled: Optional[bool] = Field(None, description="Indicates whether the scheduler is enabled")
     is_running: Optional[bool] = Field(None, description="Indicates whether the scheduler is currently running")
 
+    @field_validator("write_config")
+    @classmethod
+    def check_write_config(cls, value):
+        validate_write_config(value)
+        return value
+
 class ConnectionBody(BaseModel):
     connection_credentials: Optional[dict] = Field(None, description="Connection credentials as JSON")
     connection_name: Optional[constr(min_length=1)] = Field(None, description="Unique connection name")
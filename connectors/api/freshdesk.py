@@ -21,7 +21,8 @@ class Connector(API):
             logo (str): URL of the connector's logo.
             base_url (str): Base URL template for the Freshdesk API, to be formatted with the domain.
             tables (dict): Dictionary mapping Freshdesk API operations to their respective endpoints.
-            pagination (dict): Dictionary to manage pagination details (e.g., nextPage).
+            pagination (dict): Page-number pagination of 100 records per page, see API.paginate_pages for when
+                paging stops.
             limit (dict): Default query limit, set to Freshdesk's limit of 100 records per query.
             connection_type (ConnectionType): Specifies the connection type (set to API).
             api (str): Identifier for the Freshdesk API.
@@ -128,9 +129,20 @@ class Connector(API):
 
 
         self.pagination = {
-            "nextPage": None
+            "style": "page",
+            "page_param": "page",
+            "size_param": "per_page",
+            "page_size": 100,  # Freshdesk maximum page size
         }
         self.limit = {"limit": 100}  # Freshdesk default limit per query
+        self.supports_resume = True
+        # Tables filtered on their update date, tickets only list the last 30 days without the filter
+        self.updated_since = {
+            "get_all_tickets": "updated_since",
+            "get_all_contacts": "_updated_since",
+        }
+        # Per-minute limit of the smallest plan, resized to the account's plan from X-RateLimit-Total
+        self.rate_limit = {"requests": 50, "per": 60, "adaptive": True}
         self.connection_type = ConnectionType.API
         self.api = "freshdesk"
         self.connection_name = "freshdesk"
@@ -145,6 +157,7 @@ class Connector(API):
         self.token_url = "https://{domain}.freshdesk.com/oauth/token"
 
         self.main_response_key = None  # Freshdesk doesn't require this explicitly
+        self.supports_incremental = True
         self.required_libs = []
         super().__init__()
 
@@ -162,24 +175,30 @@ class Connector(API):
 
         return super().connect_to_api(auth_type or AuthType.BASIC, **auth_params)
 
-    def fetch_data(self, api_session, table) -> pd.DataFrame:
-        arr = []
+    def fetch_data(self, api_session, table, incremental=None, resume_state=None):
+        """
+        Yields the pages of a table, fetching ``page_concurrency`` page numbers at once within the rate limit
+        of the account. Tickets and contacts are filtered on their update date: past the watermark for
+        incremental runs, since the epoch otherwise so tickets older than 30 days are listed too.
+
+        Args:
+            api_session (requests.Session): The authenticated session.
+            table (str): The table to extract.
+            incremental (dict, optional): ``cursor_column`` and ``watermark`` of an incremental run.
+            resume_state (dict, optional): The pagination state to resume from.
+        """
         endpoint = self.construct_endpoint(table)
-
-        while True:
-            paginated_endpoint = self.pagination["nextPage"] or endpoint
-            resp = super().fetch_data(api_session, paginated_endpoint)
-
-            if resp:
-                arr.append(resp)
-
-            # Check for pagination
-            if resp.get("next_page"):
-                self.pagination["nextPage"] = resp["next_page"]
-            else:
-                break
-
-        return self.return_final_df(arr)
+        params = {}
+        if table in self.updated_since:
+            since = pd.Timestamp(0, tz="UTC")
+            if incremental and incremental.get("watermark") is not None:
+                since = pd.Timestamp(incremental["watermark"])
+                since = since.tz_localize("UTC") if since.tzinfo is None else since.tz_convert("UTC")
+            params[self.updated_since[table]] = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+        if table == "get_all_tickets":
+            params.update({"order_by": "updated_at", "order_type": "asc"})
+
+        yield from self.paginate(api_session, endpoint, params=params, resume_state=resume_state)
 
     def return_final_df(self, responses) -> pd.DataFrame:
         return super().return_final_df(responses)
@@ -1,7 +1,9 @@
 from openetl_utils.database_utils import DatabaseUtils
-from openetl_utils.main_api_class import API
+from openetl_utils.main_api_class import API, get_rate_limiter
 from openetl_utils.enums import *
 from urllib.parse import urlencode
+import logging
+import re
 import sys
 import os
 import pandas as pd
@@ -26,7 +28,7 @@ class Connector(API):
             logo (str): URL of the HubSpot connector logo.
             base_url (str): Base URL for API requests.
             tables (dict): Dictionary mapping operation keys to relative endpoint paths for HubSpot resources.
-            pagination (dict): Dictionary containing pagination parameters (e.g., 'after' key for cursor-based paging).
+            pagination (dict): Cursor pagination of the list endpoints on 'after', see API.paginate.
             limit (dict): Dictionary specifying the default record limit per API call.
             connection_type (ConnectionType): Indicator of the connection type (set to API).
             api (str): Identifier for the API ("hubspot").
@@ -37,6 +39,8 @@ class Connector(API):
             auth_url (str): URL for initiating OAuth authorization.
             token_url (str): URL for obtaining OAuth tokens.
             main_response_key (str): Key used to extract the main response data from API responses.
+            supports_incremental (bool): CRM objects are synced incrementally through the search API.
+            supports_projection (bool): Only the requested ``properties`` are extracted.
             required_libs (list): List of additional required libraries (empty by default).
         
         Note:
@@ -128,9 +132,17 @@ class Connector(API):
 
 
         self.pagination = {
-            "after": 0
+            "style": "cursor",
+            "cursor_param": "after",
+            "cursor_path": "paging.next.after",
+            "size_param": "limit",
+            "page_size": 100,
+            "min_page_size": 25,
+            "drop_keys": ["paging"],
         }
         self.limit = {"limit": 100}
+        self.supports_resume = True
+        self.rate_limit = {"requests": 100, "per": 10}  # burst limit of private apps
         self.connection_type = ConnectionType.API
         self.api = "hubspot"
         self.connection_name = "hubspot"
@@ -143,6 +155,11 @@ class Connector(API):
         self.token_url = "https://api.hubapi.com/oauth/v1/token"
 
         self.main_response_key = "results"
+        self.supports_incremental = True
+        self.supports_projection = True
+        self.search_rate_limit = {"requests": 4, "per": 1}  # the search API allows 5 requests per second
+        self.search_limit = 200  # maximum page size of the search API
+        self.search_max_results = 10000  # the search API returns at most 10,000 results per query
         self.required_libs = []
         super().__init__()
 
@@ -163,23 +180,100 @@ class Connector(API):
         """
         return super().connect_to_api(auth_type, **auth_params)
 
-    def fetch_data(self, api_session, table) -> pd.DataFrame:
-        arr = []
+    def fetch_data(self, api_session, table, incremental=None, properties=None, resume_state=None):
+        """
+        Yields the pages of a table. Incremental runs of CRM objects go through the search API, filtered
+        on the last modified date; everything else walks the list endpoint with ``after`` cursors.
+
+        Args:
+            api_session (requests.Session): The authenticated session.
+            table (str): The table to extract.
+            incremental (dict, optional): ``cursor_column`` and ``watermark`` of an incremental run.
+            properties (list, optional): The properties to extract, instead of the default properties of
+                the object.
+            resume_state (dict, optional): The pagination state to resume the list endpoint from.
+        """
         endpoint = self.construct_endpoint(table)
+        if incremental and incremental.get("watermark") is not None and self.is_crm_object(table):
+            yield from self.search_modified_since(api_session, endpoint, table, incremental["watermark"], properties)
+            return
+
+        params = {"properties": ",".join(properties)} if properties else None
+        yield from self.paginate(api_session, endpoint, params=params, main_response_key=self.main_response_key,
+                                 resume_state=resume_state)
+
+    def is_crm_object(self, table) -> bool:
+        return bool(re.fullmatch(r"crm/v3/objects/[a-z_]+", self.tables.get(table, "")))
+
+    def last_modified_property(self, table) -> str:
+        # Contacts keep their modification date in lastmodifieddate, other CRM objects in hs_lastmodifieddate
+        return "lastmodifieddate" if self.tables[table].endswith("/contacts") else "hs_lastmodifieddate"
+
+    def search_modified_since(self, api_session, endpoint, table, watermark, properties=None):
+        """
+        Yields the records of a CRM object modified after the watermark, oldest first, through the search
+        API. The search API stops at 10,000 results per query, so the search restarts from the last
+        modification date it reached; records sharing that date can be returned twice.
+
+        Args:
+            api_session (requests.Session): The authenticated session.
+            endpoint (str): The object endpoint, e.g. ".../crm/v3/objects/contacts".
+            table (str): The table to extract.
+            watermark: The stored watermark, a timestamp or epoch milliseconds.
+            properties (list, optional): The properties to extract.
+        """
+        modified = self.last_modified_property(table)
+        limiter = get_rate_limiter((self.api, "search", getattr(api_session, "account", None)), self.search_rate_limit)
+        since = self.to_epoch_millis(watermark)
+        operator = "GT"
+
         while True:
-            pagination_query = urlencode(self.pagination)
-            limit_query = urlencode(self.limit)
-            paginated_endpoint = f"{endpoint}?{pagination_query}&{limit_query}"
-            resp = super().fetch_data(api_session, paginated_endpoint, self.main_response_key)
-            yield resp
-
-            if "paging_next_after" in resp:
-                self.pagination["after"] = resp["paging_next_after"]
-                del resp["paging_next_after"]
-                del resp["paging_next_link"]
+            after, last_modified = None, None
+            while True:
+                body = {
+                    "filterGroups": [{"filters": [{"propertyName": modified, "operator": operator, "value": str(since)}]}],
+                    "sorts": [{"propertyName": modified, "direction": "ASCENDING"}],
+                    "limit": self.search_limit,
+                }
+                if properties:
+                    body["properties"] = list(dict.fromkeys([*properties, modified]))
+                if after:
+                    body["after"] = after
+
+                limiter.acquire()
+                resp = super().fetch_data(api_session, f"{endpoint}/search", self.main_response_key,
+                                          method="POST", json=body)
+                after = resp.pop("paging_next_after", None)
+                resp.pop("paging_next_link", None)
+                resp.pop("total", None)
+
+                dates = resp.get(f"properties_{modified}")
+                if dates is not None:
+                    last_modified = dates[-1] if isinstance(dates, list) else dates
+                    yield resp
+
+                if not after or int(after) + self.search_limit > self.search_max_results:
+                    break
+
+            if not after or last_modified is None:
+                return
+            restart = self.to_epoch_millis(last_modified)
+            if restart == since and operator == "GTE":
+                # More than 10,000 records share one modification date, skip past it rather than loop
+                logging.warning(f"Over {self.search_max_results} {table} records modified at {last_modified}, "
+                                f"some of them are skipped")
+                operator = "GT"
             else:
-                break
-        
+                operator = "GTE"
+            since = restart
+
+    @staticmethod
+    def to_epoch_millis(value) -> int:
+        if isinstance(value, (int, float)) or str(value).isdigit():
+            return int(value)
+        timestamp = pd.Timestamp(value)
+        timestamp = timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp
+        return int(timestamp.timestamp() * 1000)
 
     def return_final_df(self, responses) -> pd.DataFrame:
         return super().return_final_df(responses)
@@ -2,8 +2,10 @@ from openetl_utils.database_utils import DatabaseUtils
 from openetl_utils.main_api_class import API
 from openetl_utils.enums import *
 from urllib.parse import urlencode
+import io
 import sys
 import os
+import time
 import pandas as pd
 
 
@@ -20,7 +22,7 @@ class Connector(API):
           - logo (str): URL for the Salesforce logo.
           - base_url (str): Base endpoint URL template for Salesforce API requests. Replace 'your_instance' and 'vXX.X' with specific values.
           - tables (dict): Mapping of table names to their respective Salesforce API endpoints for contacts, accounts, opportunities, and leads.
-          - pagination (dict): Dictionary to handle pagination using the 'nextRecordsUrl' key.
+          - pagination (dict): Link pagination following 'nextRecordsUrl', see API.paginate.
           - limit (dict): Record limit settings (defaulting to 2000 records per query).
           - connection_type (ConnectionType): Indicator of the connection type used (API).
           - api (str): Identifier for the connected API ('salesforce').
@@ -29,6 +31,8 @@ class Connector(API):
           - authentication_details (dict): Dictionary holding authentication information using bearer tokens.
           - auth_url (str) and token_url (str): URLs for OAuth2 authorization and token requests.
           - main_response_key (str): Key indicating where the main response records are located.
+          - query_mode (str): "rest" (default) pages through the REST API, "bulk" extracts tables with Bulk API 2.0
+            query jobs, selecting every field of the object.
           - required_libs (list): List to hold any additional required libraries.
         
         Finally, the constructor calls super().__init__() to ensure that any initialization logic in the parent API class is executed.
@@ -41,22 +45,45 @@ class Connector(API):
             "get_all_opportunities": "/sobjects/Opportunity",
             "get_all_leads": "/sobjects/Lead"
         }
+        self.sobjects = {
+            "get_all_contacts": "Contact",
+            "get_all_accounts": "Account",
+            "get_all_opportunities": "Opportunity",
+            "get_all_leads": "Lead"
+        }
         self.pagination = {
-            "nextRecordsUrl": None
+            "style": "link",
+            "next_url_path": "nextRecordsUrl",
+            "size_param": None,
+            "drop_keys": ["nextRecordsUrl", "totalSize", "done"],
         }
+        self.supports_resume = True
         self.limit = {"limit": 2000}  # Salesforce default is up to 2000 records per query
+        # Salesforce allows 25 concurrent long-running requests and a daily quota reported in Sforce-Limit-Info
+        self.rate_limit = {"requests": 25, "per": 1}
         self.connection_type = ConnectionType.API
         self.api = "salesforce"
         self.connection_name = "salesforce"
         self.schema = "public"
         self.database = "public"
         self.authentication_details = {AuthType.BEARER: {
-            "token": ""}
+            "token": "",
+            "instance_url": "",  # e.g. https://mydomain.my.salesforce.com
+            "api_version": "v62.0"}
         }
         self.auth_url = "https://login.salesforce.com/services/oauth2/authorize"
         self.token_url = "https://login.salesforce.com/services/oauth2/token"
 
         self.main_response_key = "records"
+        self.query_mode = "rest"
+        # Bulk CSV holds every value as text, these field types are cast back to the JSON types of the REST API
+        self.bulk_casts = {"int": "Int64", "double": "float64", "currency": "float64", "percent": "float64",
+                           "boolean": "boolean"}
+        self.field_types = {}  # describe types of the fields of each bulk-queried object
+        self.supports_incremental = True
+        self.bulk_poll_interval = 2  # seconds, grows up to bulk_max_poll_interval while the job runs
+        self.bulk_max_poll_interval = 30
+        self.bulk_max_records = 500000  # records per downloaded result chunk
         self.required_libs = []
         super().__init__()
 
@@ -74,24 +101,145 @@ class Connector(API):
         Returns:
             bool: True if the connection is established successfully; otherwise, False.
         """
+        instance_url = auth_params.get("instance_url")
+        if instance_url:
+            self.base_url = f"{instance_url.rstrip('/')}/services/data/{auth_params.get('api_version') or 'v62.0'}"
+        self.query_mode = auth_params.get("query_mode", self.query_mode)
         return super().connect_to_api(auth_type, **auth_params)
 
-    def fetch_data(self, api_session, table) -> pd.DataFrame:
-        arr = []
-        endpoint = self.construct_endpoint(table)
+    def fetch_data(self, api_session, table, incremental=None, resume_state=None):
+        """
+        Yields the records of a table page by page, from a Bulk API 2.0 query job in "bulk" mode, else by
+        following ``nextRecordsUrl`` through the REST API.
+
+        Args:
+            api_session (requests.Session): The authenticated session.
+            table (str): The table to extract.
+            incremental (dict, optional): ``cursor_column`` and ``watermark`` of an incremental run, pushed
+                into the SOQL of bulk queries.
+            resume_state (dict, optional): The pagination state to resume REST pages from. Bulk jobs start over.
+        """
+        if self.query_mode == "bulk" and table in self.sobjects:
+            yield from self.fetch_bulk(api_session, self.sobjects[table], incremental)
+            return
+
+        yield from self.paginate(api_session, self.construct_endpoint(table), main_response_key=self.main_response_key,
+                                 resume_state=resume_state)
+
+    def build_soql(self, api_session, sobject, incremental=None) -> str:
+        """
+        Builds the SOQL selecting every field of an object. Compound address and location fields are left
+        out, Bulk API queries do not support them; their components are selected instead. The types of the
+        fields are kept in ``field_types`` to cast the CSV results.
+        """
+        describe = api_session.get(f"{self.base_url}/sobjects/{sobject}/describe")
+        describe.raise_for_status()
+        field_types = {field["name"]: field["type"] for field in describe.json()["fields"]
+                       if field["type"] not in ("address", "location")}
+        self.field_types[sobject] = field_types
+        fields = list(field_types)
+
+        soql = f"SELECT {', '.join(fields)} FROM {sobject}"
+        if incremental and incremental.get("watermark") is not None:
+            watermark = pd.Timestamp(incremental["watermark"])
+            watermark = watermark.tz_localize("UTC") if watermark.tzinfo is None else watermark.tz_convert("UTC")
+            literal = watermark.strftime("%Y-%m-%dT%H:%M:%S.") + f"{watermark.microsecond // 1000:03d}Z"
+            soql += f" WHERE {incremental['cursor_column']} > {literal}"
+        return soql
+
+    def fetch_bulk(self, api_session, sobject, incremental=None):
+        """
+        Extracts an object with a Bulk API 2.0 query job: submits the SOQL, polls the job until it completes
+        and yields its CSV result chunks as DataFrames. Salesforce splits large queries into primary key
+        chunks on its own; their results are downloaded ``page_concurrency`` at a time from the job's
+        result pages where the API version offers them, else one after the other by locator.
+
+        Yields:
+            pd.DataFrame: A chunk of up to ``bulk_max_records`` records, typed like the REST API records.
+        """
+        jobs_url = f"{self.base_url}/jobs/query"
+        response = api_session.post(jobs_url, json={"operation": "query",
+                                                    "query": self.build_soql(api_session, sobject, incremental),
+                                                    "contentType": "CSV", "lineEnding": "LF"})
+        response.raise_for_status()
+        job_url = f"{jobs_url}/{response.json()['id']}"
+
+        interval = self.bulk_poll_interval
         while True:
-            paginated_endpoint = endpoint
-            if self.pagination["nextRecordsUrl"]:
-                paginated_endpoint = self.pagination["nextRecordsUrl"]
-            resp = super().fetch_data(api_session, paginated_endpoint)
-            yield resp[self.main_response_key]
-
-            if "nextRecordsUrl" in resp:
-                self.pagination["nextRecordsUrl"] = resp["nextRecordsUrl"]
-            else:
+            job = api_session.get(job_url)
+            job.raise_for_status()
+            job = job.json()
+            if job["state"] == "JobComplete":
+                break
+            if job["state"] in ("Failed", "Aborted"):
+                raise Exception(f"Bulk query job {job['id']} on {sobject} {job['state']}: {job.get('errorMessage')}")
+            time.sleep(interval)
+            interval = min(interval * 1.5, self.bulk_max_poll_interval)
+
+        result_links = self.get_result_links(api_session, job_url)
+        if result_links is None:
+            yield from self.fetch_results_by_locator(api_session, job_url, sobject)
+            return
+
+        def fetch_page(index):
+            if index >= len(result_links):
+                return None
+            return self.read_results(api_session.get(f"{self.instance_url()}{result_links[index]}"), sobject)
+
+        yield from self.fetch_pages_in_parallel(fetch_page, first_page=0, is_last_page=lambda page: page is None)
+
+    def get_result_links(self, api_session, job_url):
+        """
+        Returns the links of the result chunks of a completed job, None if the API version has no parallel
+        result pages.
+        """
+        links, url = [], f"{job_url}/resultPages"
+        while url:
+            response = api_session.get(url)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            body = response.json()
+            links.extend(page["resultLink"] for page in body.get("resultPages", []))
+            url = body.get("nextRecordsUrl")
+            if url:
+                url = f"{self.instance_url()}{url}"
+        return links
+
+    def fetch_results_by_locator(self, api_session, job_url, sobject):
+        locator = None
+        while True:
+            params = {"maxRecords": self.bulk_max_records}
+            if locator:
+                params["locator"] = locator
+            response = api_session.get(f"{job_url}/results", params=params)
+            yield self.read_results(response, sobject)
+
+            locator = response.headers.get("Sforce-Locator")
+            if not locator or locator == "null":
                 break
 
+    def instance_url(self) -> str:
+        return self.base_url.split("/services/")[0]
+
+    def read_results(self, response, sobject) -> pd.DataFrame:
+        response.raise_for_status()
+        if not response.content.strip():
+            return pd.DataFrame()
+        # Bulk CSV writes nulls as empty fields, values are read as strings and cast after the describe types
+        df = pd.read_csv(io.BytesIO(response.content), dtype=str, keep_default_na=False, na_values=[""])
+        for column, field_type in self.field_types.get(sobject, {}).items():
+            if column not in df.columns or field_type not in self.bulk_casts:
+                continue
+            if field_type == "boolean":
+                df[column] = df[column].map({"true": True, "false": False}).astype("boolean")
+            else:
+                df[column] = pd.to_numeric(df[column]).astype(self.bulk_casts[field_type])
+        return df
+
     def return_final_df(self, responses) -> pd.DataFrame:
+        if isinstance(responses, pd.DataFrame):
+            return responses
         return super().return_final_df(responses)
 
     def construct_endpoint(self, endpoint) -> str:
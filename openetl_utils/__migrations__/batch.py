@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, UUID, DateTime, String, Enum
+from sqlalchemy import Column, Integer, UUID, DateTime, String, Enum, JSON, Text, UniqueConstraint
 from sqlalchemy.orm import declarative_base
 from openetl_utils.enums import RunStatus
 
@@ -35,3 +35,55 @@ class OpenETLBatch(Base):
         self.integration_id = integration_id
         self.rows_count = rows_count
 
+
+
+class OpenETLWatermark(Base):
+    __tablename__ = 'openetl_watermarks'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    integration_id = Column(String(500), unique=True, nullable=False)
+    cursor_column = Column(String(500), nullable=False)
+    watermark_value = Column(String(500), nullable=True)
+    run_id = Column(String(36))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)
+
+
+class OpenETLCheckpoint(Base):
+    __tablename__ = 'openetl_checkpoints'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    integration_id = Column(String(500), unique=True, nullable=False)
+    source_table = Column(String(500), nullable=False)
+    state = Column(JSON, nullable=True)  # pagination state to resume from, None once the source is read in full
+    run_id = Column(String(36))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)
+
+
+class OpenETLResponseCache(Base):
+    __tablename__ = 'openetl_response_cache'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    integration_id = Column(String(500), unique=True, nullable=False)
+    entries = Column(JSON, nullable=True)  # validators of the list pages by URL, see main_api_class.HTTPCache
+    run_id = Column(String(36))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)
+
+
+class OpenETLSchema(Base):
+    __tablename__ = 'openetl_schemas'
+    __table_args__ = (UniqueConstraint('integration_id', 'source_table', 'version'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    integration_id = Column(String(500), nullable=False)
+    source_table = Column(String(500), nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    spark_schema = Column(JSON, nullable=False)  # StructType.jsonValue() of the resolved batch schema
+    target_ddl = Column(Text, nullable=True)  # CREATE TABLE matching the resolved schema
+    run_id = Column(String(36))
+    created_at = Column(DateTime, default=datetime.utcnow)
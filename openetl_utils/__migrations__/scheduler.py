@@ -25,6 +25,8 @@ class OpenETLIntegrations(Base):
     target_connection = Column(ForeignKey(OpenETLDocument.id), nullable=False)  # Target table name
     spark_config = Column(JSON, nullable=True)
     hadoop_config = Column(JSON, nullable=True)
+    read_config = Column(JSON, nullable=True)  # Source read options (mode, partition column, fetchsize)
+    write_config = Column(JSON, nullable=True)  # Target write options (method, batchsize, numPartitions)
     batch_size = Column(Integer, nullable=False, default=100000)
     source_table = Column(String, nullable=False)  # Source table name
     target_table = Column(String, nullable=False)  # Target table name
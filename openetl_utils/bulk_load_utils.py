@@ -0,0 +1,162 @@
+"""
+This module contains native bulk-load writers for database targets.
+
+Each writer loads one Spark partition through the bulk path of the target database instead of
+batched JDBC inserts. They run on the executors, so they only take picklable arguments and open
+their own connection per partition. Their drivers (psycopg2, pymysql, pymssql) are dependencies of
+the package, so they are installed wherever the executors run.
+
+Functions:
+- postgres_bulk_load: Loads rows with COPY ... FROM STDIN.
+- mysql_bulk_load: Loads rows with LOAD DATA LOCAL INFILE.
+- sqlserver_bulk_load: Loads rows with the TDS bulk copy protocol.
+- get_bulk_loader: Returns the bulk-load writer for a target engine.
+"""
+import json
+import os
+import tempfile
+from itertools import islice
+
+
+def _quote(name, quote):
+    """Quotes a possibly schema-qualified identifier, e.g. ``public.users`` -> ``"public"."users"``."""
+    return ".".join(f"{quote}{part}{quote}" for part in name.split("."))
+
+
+def _qualify(table, credentials):
+    """Prefixes a table with the schema of the target credentials, where the table is created."""
+    schema = credentials.get("schema")
+    return f"{schema}.{table}" if schema and "." not in table else table
+
+
+def _csv_field(value, null):
+    """Formats a value as a quoted CSV field, ``null`` is written unquoted for None."""
+    if value is None:
+        return null
+    if isinstance(value, bool):
+        value = int(value)
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _chunks(rows, chunk_size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def postgres_bulk_load(rows, table, columns, credentials, chunk_size=100000):
+    """
+    Loads rows into a PostgreSQL table with ``COPY ... FROM STDIN (FORMAT csv)``.
+
+    Args:
+        rows (iterable): The rows of the partition, in the order of ``columns``.
+        table (str): The target table.
+        columns (list): The target columns.
+        credentials (dict): The target connection credentials.
+        chunk_size (int): The number of rows sent per COPY.
+    """
+    import io
+    import psycopg2
+
+    copy = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        _quote(_qualify(table, credentials), '"'), ", ".join(_quote(column, '"') for column in columns))
+    con = psycopg2.connect(host=credentials["hostname"], port=credentials["port"], user=credentials["username"],
+                           password=credentials["password"], dbname=credentials["database"])
+    try:
+        with con.cursor() as cursor:
+            for chunk in _chunks(rows, chunk_size):
+                buffer = io.StringIO("".join(",".join(_csv_field(v, "") for v in row) + "\n" for row in chunk))
+                cursor.copy_expert(copy, buffer)
+        con.commit()
+    finally:
+        con.close()
+
+
+def mysql_bulk_load(rows, table, columns, credentials, chunk_size=100000):
+    """
+    Loads rows into a MySQL/MariaDB table with ``LOAD DATA LOCAL INFILE``. The server needs
+    ``local_infile = ON``.
+
+    Args:
+        rows (iterable): The rows of the partition, in the order of ``columns``.
+        table (str): The target table.
+        columns (list): The target columns.
+        credentials (dict): The target connection credentials.
+        chunk_size (int): The number of rows loaded per file.
+    """
+    import pymysql
+
+    load = (f"LOAD DATA LOCAL INFILE %s INTO TABLE {_quote(_qualify(table, credentials), '`')} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' ENCLOSED BY '\"' ESCAPED BY '' LINES TERMINATED BY '\\n' "
+            f"({', '.join(_quote(column, '`') for column in columns)})")
+    con = pymysql.connect(host=credentials["hostname"], port=int(credentials["port"]), user=credentials["username"],
+                          password=credentials["password"], database=credentials["database"], local_infile=True)
+    try:
+        with con.cursor() as cursor:
+            for chunk in _chunks(rows, chunk_size):
+                with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8", delete=False) as file:
+                    file.writelines(",".join(_csv_field(v, "NULL") for v in row) + "\n" for row in chunk)
+                try:
+                    cursor.execute(load, (file.name,))
+                finally:
+                    os.remove(file.name)
+        con.commit()
+    finally:
+        con.close()
+
+
+def sqlserver_bulk_load(rows, table, columns, credentials, chunk_size=100000):
+    """
+    Loads rows into a SQL Server table with the bulk copy protocol of pymssql.
+
+    Args:
+        rows (iterable): The rows of the partition, in the order of ``columns``.
+        table (str): The target table.
+        columns (list): The target columns.
+        credentials (dict): The target connection credentials.
+        chunk_size (int): The number of rows per bulk copy batch.
+    """
+    import pymssql
+
+    table = _qualify(table, credentials)
+    con = pymssql.connect(server=credentials["hostname"], port=str(credentials["port"]), user=credentials["username"],
+                          password=credentials["password"], database=credentials["database"])
+    try:
+        # bulk_copy addresses columns by ordinal
+        cursor = con.cursor()
+        schema, _, name = table.rpartition(".")
+        cursor.execute("SELECT COLUMN_NAME, ORDINAL_POSITION FROM INFORMATION_SCHEMA.COLUMNS "
+                       "WHERE TABLE_NAME = %s AND TABLE_SCHEMA = COALESCE(NULLIF(%s, ''), SCHEMA_NAME())",
+                       (name, schema))
+        ordinals = dict(cursor.fetchall())
+        column_ids = [ordinals[column] for column in columns]
+
+        for chunk in _chunks(rows, chunk_size):
+            con.bulk_copy(table, [tuple(row) for row in chunk], column_ids=column_ids, batch_size=chunk_size,
+                          tablock=True)
+        con.commit()
+    finally:
+        con.close()
+
+
+bulk_loaders = {
+    "PostgreSQL": postgres_bulk_load,
+    "MySQL": mysql_bulk_load,
+    "MariaDB": mysql_bulk_load,
+    "Microsoft SQL Server": sqlserver_bulk_load,
+}
+
+
+def get_bulk_loader(engine):
+    """
+    Returns the bulk-load writer for a target engine.
+
+    Args:
+        engine (str): The engine of the target connector, e.g. "PostgreSQL".
+
+    Returns:
+        function: The writer, or None if the engine has no bulk-load path.
+    """
+    return bulk_loaders.get(engine)
@@ -276,3 +276,11 @@ jdbc_engine_drivers = {
     "Google Cloud Datastore": "com.google.cloud.datastore.Datastore",
     "DynamoDB": "com.amazonaws.services.dynamodbv2.datamodeling.DynamoDBMapper"
 }
+
+jdbc_write_defaults = {
+    "PostgreSQL": {"batchsize": 10000, "isolationLevel": "NONE", "reWriteBatchedInserts": "true"},
+    "MySQL": {"batchsize": 10000, "isolationLevel": "NONE", "rewriteBatchedStatements": "true"},
+    "MariaDB": {"batchsize": 10000, "isolationLevel": "NONE", "rewriteBatchedStatements": "true"},
+    "Microsoft SQL Server": {"batchsize": 10000, "isolationLevel": "NONE", "useBulkCopyForBatchInsert": "true"},
+    "default": {"batchsize": 10000, "isolationLevel": "NONE"},
+}
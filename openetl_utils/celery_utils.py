@@ -5,9 +5,11 @@ import logging
 from datetime import datetime
 
 from celery import Celery
-from celery.signals import after_setup_logger, task_prerun
+from celery.signals import after_setup_logger, task_prerun, worker_init, worker_process_shutdown
 from openetl_utils.database_utils import get_open_etl_document_connection_details, DatabaseUtils
 import openetl_utils.pipeline_utils as pipeline
+from openetl_utils.spark_utils import spark_session_pool
+from openetl_utils.jar_utils import prefetch_jars
 from openetl_utils.logger import get_logger
 
 # Environment setup
@@ -84,11 +86,32 @@ def configure_task_logger(task_id=None, task=None, args=None, **kwargs):
         job_logger.info(f"Task arguments: {args}")
 
 
+@worker_init.connect
+def fill_jar_cache(**kwargs):
+    """
+    Fills the JDBC driver cache before the worker processes start. Their pooled Spark applications load
+    every cached driver when the JVM starts, which is the only time jars reach the driver classpath.
+    """
+    if os.getenv("OPENETL_JARS_OFFLINE", "false").lower() == "true":
+        return
+    missing = prefetch_jars()
+    if missing:
+        logger.warning(f"Unable to cache JDBC drivers: {', '.join(missing)}")
+
+
+@worker_process_shutdown.connect
+def stop_spark_session_pool(**kwargs):
+    """
+    Stops the pooled Spark application when a worker process exits.
+    """
+    spark_session_pool.shutdown()
+
 
 # Task definition
 @app.task(bind=True)
 def run_pipeline(self, job_id, job_name, job_type, source_connection, target_connection, source_table, target_table,
-                 source_schema, target_schema, spark_config, hadoop_config, batch_size, **kwargs):
+                 source_schema, target_schema, spark_config, hadoop_config, batch_size, read_config=None, write_config=None,
+                 **kwargs):
     # Log task start
     job_logger = logging.getLogger(f"job_{job_id}")
     job_logger.info(f"Starting pipeline: {job_name} (Job ID: {job_id})")
@@ -108,6 +131,9 @@ def run_pipeline(self, job_id, job_name, job_type, source_connection, target_con
             spark_config=spark_config,
             hadoop_config=hadoop_config,
             batch_size=batch_size,
+            read_config=read_config,
+            write_config=write_config,
+            spark_pool=spark_session_pool,
             logger=job_logger
         )
         job_logger.info(f"Pipeline {job_name} completed successfully.")
@@ -1,7 +1,9 @@
 import importlib
 import os
+import queue
 import subprocess
 import sys
+import threading
 
 import pkg_resources
 
@@ -233,7 +235,67 @@ def get_connector_image(connector_name,connection_type):
 
 
 
-def fetch_data_from_connector( connector_name, auth_values, auth_type, table, connection_type, schema="public",page_limit = 10000):
+def prefetch(iterable, depth=2):
+    """
+    Iterates an iterable in a background thread, keeping up to ``depth`` items ready, so the next pages of
+    an API download while the current one is transformed and written. Exceptions of the iterable are
+    raised in the consuming thread, and closing the generator stops the producer.
+
+    Args:
+        iterable: The iterable to read ahead, e.g. a connector page generator.
+        depth (int): The number of items read ahead. 0 iterates in the calling thread.
+
+    Yields:
+        The items of the iterable, in order.
+    """
+    if not depth or depth < 1:
+        yield from iterable
+        return
+
+    items = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except BaseException as e:
+            put((False, e))
+
+    threading.Thread(target=produce, name="openetl-prefetch", daemon=True).start()
+    try:
+        while True:
+            has_item, value = items.get()
+            if not has_item:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stopped.set()
+
+
+def page_to_df(module, page):
+    df = module.return_final_df(page)
+    if hasattr(page, "resume_state"):
+        df.attrs["resume_state"] = page.resume_state
+    return df
+
+
+def fetch_data_from_connector( connector_name, auth_values, auth_type, table, connection_type, schema="public",page_limit = 10000,
+                               incremental=None, prefetch_pages=None, properties=None, resume_state=None,
+                               http_cache=None):
     """
     Fetches data from a connector based on the provided connection details.
 
@@ -243,6 +305,17 @@ def fetch_data_from_connector( connector_name, auth_values, auth_type, table, co
         table (str): The name of the table to fetch data from.
         schema (str, optional): The schema of the table. Defaults to "public".
         page_limit (int, optional): The maximum number of pages to fetch. Defaults to 10000.
+        incremental (dict, optional): ``cursor_column`` and ``watermark`` of an incremental run. Passed to
+            connectors that set ``supports_incremental`` so they can push the filter into the API query.
+        prefetch_pages (int, optional): The number of pages downloaded ahead of the one being processed.
+            Defaults to the ``prefetch_pages`` of the connector.
+        properties (list, optional): The fields to extract. Passed to connectors that set
+            ``supports_projection``, others return all their fields.
+        resume_state (dict, optional): The pagination state to resume from, passed to connectors that set
+            ``supports_resume``. The pages of these connectors carry the state to resume from after them in
+            ``DataFrame.attrs["resume_state"]``.
+        http_cache (HTTPCache, optional): The validators of the list pages loaded by earlier runs. Pages
+            that were not modified since are skipped, and the cache is updated with the pages downloaded.
 
     Returns:
         None
@@ -250,9 +323,18 @@ def fetch_data_from_connector( connector_name, auth_values, auth_type, table, co
     module = import_module(connector_name, f"{connectors_directory}/{connection_type}/{connector_name}.py")
     if connection_type == "api":
         api_session = module.connect_to_api(auth_type=auth_type, **auth_values)
-        gen = module.fetch_data(api_session, table)
-        for page in gen:
-            yield module.return_final_df(page)
+        module.http_cache = http_cache
+        kwargs = {}
+        if incremental and module.supports_incremental:
+            kwargs["incremental"] = incremental
+        if properties and module.supports_projection:
+            kwargs["properties"] = properties
+        if module.supports_resume:
+            kwargs["resume_state"] = resume_state
+        gen = module.fetch_data(api_session, table, **kwargs)
+        pages = (page_to_df(module, page) for page in gen)
+        depth = module.prefetch_pages if prefetch_pages is None else prefetch_pages
+        yield from prefetch(pages, depth)
     
 
 def create_db_connector_engine(connector_name, **kwargs):
@@ -14,6 +14,7 @@ Methods:
 import calendar
 import os
 import sys
+import threading
 from typing import List, Type
 from uuid import UUID
 
@@ -24,7 +25,8 @@ from alembic.operations import Operations
 from alembic.runtime.migration import MigrationContext
 
 from openetl_utils.__migrations__.app import OpenETLDocument, OpenETLOAuthToken
-from openetl_utils.__migrations__.batch import OpenETLBatch
+from openetl_utils.__migrations__.batch import OpenETLBatch, OpenETLWatermark, OpenETLSchema, OpenETLCheckpoint, \
+    OpenETLResponseCache
 from openetl_utils.__migrations__.scheduler import OpenETLIntegrations, OpenETLIntegrationsRuntimes
 from sqlalchemy import MetaData, Table, Column, and_, select, PrimaryKeyConstraint, func, text, inspect, or_, String, \
     desc
@@ -35,6 +37,8 @@ from openetl_utils.enums import ConnectionType
 from sqlalchemy.exc import OperationalError, NoResultFound
 from openetl_utils.enums import ColumnActions
 import numpy as np
+import pyarrow as pa
+from cachetools import LRUCache
 from sqlalchemy.ext.declarative import declarative_base
 from pyspark.sql.types import StringType, IntegerType, FloatType, BooleanType, TimestampType, ArrayType, MapType
 from datetime import datetime, timedelta
@@ -69,7 +73,8 @@ class DatabaseUtils():
     - alter_table_column_add_or_drop: Alters a table by adding or dropping a column.
     - drop_table: Drops the specified table from the database.
     - truncate_table: Truncates a table by deleting all rows.
-    - cast_columns: Casts columns in a DataFrame to specific data types.
+    - cast_columns: Casts columns in a DataFrame to the majority type of a sample of each column.
+    - forget_column_types: Drops the cached column types of a table after its DDL changed.
     - map_to_spark_type: Maps Pandas DataFrame data types to Spark DataFrame data types.
     - match_pandas_schema_to_spark: Matches data types of columns in a Spark DataFrame to a specified schema.
     - write_data: Writes data to a table in the database.
@@ -83,16 +88,32 @@ class DatabaseUtils():
     - alter_table_column_add_primary_key: Alters a table by adding a primary key to a specified column.
     - create_document_table: Creates a document table in the database.
     - create_batch_table: Creates a batch table in the database.
+    - add_missing_enum_values: Adds the members a model's enums gained to their native PostgreSQL types.
     - fetch_rows: Executes a select query on the specified table with provided conditions.
     - fetch_document: Fetches a single document based on the specified table, schema, and conditions.
     - write_document: Writes a document to the specified table in the database.
     - get_created_connections: Returns a list of created connections for the specified connector type.
     - insert_openetl_batch: Inserts a new OpenETLBatch instance into the database.
     - update_openetl_batch: Updates an OpenETLBatch instance in the database.
+    - delete_rows_by_keys: Deletes the rows matching a list of key values.
+    - create_staging_table: Creates an empty copy of a table to bulk-load a merge batch into.
+    - merge_staging_table: Upserts a staging table into its target table.
+    - drop_staging_table: Drops a staging table if it exists.
+    - get_watermark: Returns the stored high-watermark of an incremental integration.
+    - set_watermark: Stages a new high-watermark for an incremental integration.
+    - get_checkpoint: Returns the pagination state an interrupted API extraction resumes from.
+    - set_checkpoint: Stages the pagination state after the last loaded page of an API extraction.
+    - get_response_cache: Returns the validators of the API list pages an integration loaded.
+    - set_response_cache: Stores the validators of the API list pages an integration loaded.
+    - get_registered_schema: Returns the latest registered schema of an integration's source table.
+    - register_schema: Records a new version of an integration's source table schema.
     - get_dashboard_data: Retrieves dashboard data including total counts and integration details.
     """
 
     _connections = {}  # Class-level dictionary to store connections
+    # Class-level cache of the types picked by cast_columns, keyed by (database, schema, table, column)
+    _column_types = LRUCache(maxsize=int(os.getenv("OPENETL_COLUMN_TYPES_CACHE_SIZE", "10000")))
+    _column_types_lock = threading.Lock()
 
     def __init__(self, engine=None, hostname=None, username=None, password=None, port=None, database=None,
                  connection_name=None, connection_type=None, schema="public"):
@@ -252,6 +273,7 @@ class DatabaseUtils():
         table = Table(table_name, self.metadata,
                       *[Column(column_name, eval(column_type)) for column_name, column_type in schema_details.items()], schema=target_schema)
         self.metadata.create_all(self.engine)
+        self.forget_column_types(table_name, target_schema)
 
         self.schema_details = schema_details
 
@@ -294,10 +316,13 @@ class DatabaseUtils():
 
     def alter_table_column_add_or_drop_alembic(self, table_name, column_name=None,
                                                column_details: sqlalchemy.Column = Column(String),
-                                               action: ColumnActions = ColumnActions.ADD):
+                                               action: ColumnActions = ColumnActions.ADD, schema_name=None):
         """
         Uses Alembic Operations API to add or drop a column from a table without dropping data.
+        MODIFY changes the type of ``column_name`` to the type of ``column_details``, converting the existing
+        values.
         """
+        self.forget_column_types(table_name, schema_name)
         with self.engine.connect() as conn:
             ctx = MigrationContext.configure(conn)
             op = Operations(ctx)
@@ -305,12 +330,12 @@ class DatabaseUtils():
             if action == ColumnActions.ADD:
                 if not isinstance(column_details, Column):
                     return False, "column_details must be a SQLAlchemy Column instance"
-                op.add_column(table_name, column_details)
+                op.add_column(table_name, column_details, schema=schema_name)
                 conn.commit()
                 return True, f"Added column '{column_details.name}' to table '{table_name}'"
 
             elif action == ColumnActions.DROP:
-                op.drop_column(table_name, column_name)
+                op.drop_column(table_name, column_name, schema=schema_name)
                 conn.commit()
                 return True, f"Dropped column '{column_name}' from table '{table_name}'"
 
@@ -323,7 +348,10 @@ class DatabaseUtils():
                     column_name=column_name,
                     type_=column_details.type,
                     existing_type=column_details.type,
-                    nullable=column_details.nullable
+                    nullable=column_details.nullable,
+                    schema=schema_name,
+                    # PostgreSQL only converts types without an implicit cast with an explicit USING
+                    postgresql_using=f'"{column_name}"::{column_details.type.compile(dialect=conn.dialect)}'
                 )
                 conn.commit()
                 return True, f"Modified column '{column_name}' in table '{table_name}'"
@@ -344,6 +372,7 @@ class DatabaseUtils():
         self.metadata.reflect(bind=self.engine, only=[table_name])
         existing_table = self.metadata.tables[table_name]
         existing_table.drop(self.engine)
+        self.forget_column_types(table_name)
 
         return True, f"Table '{table_name}' has been dropped."
 
@@ -367,30 +396,126 @@ class DatabaseUtils():
 
         return True, f"Table '{table_name}' truncated."
 
-    def cast_columns(self, df):
+    def delete_rows_by_keys(self, table_name, key_columns, keys, schema_name="public", chunk_size=1000):
+        """
+        Deletes the rows of a table matching a list of key values.
+
+        Args:
+            table_name (str): The name of the table.
+            key_columns (list): The columns identifying a row.
+            keys (list): Tuples of key values, in the order of ``key_columns``.
+            schema_name (str, optional): The schema of the table. Defaults to "public".
+            chunk_size (int, optional): Keys deleted per statement. Defaults to 1000.
+
+        Returns:
+            int: The number of deleted rows.
+        """
+        if not keys:
+            return 0
+
+        table = Table(table_name, MetaData(), schema=schema_name, autoload_with=self.engine)
+        columns = [table.columns[column] for column in key_columns]
+        deleted = 0
+
+        with self.engine.begin() as connection:
+            for start in range(0, len(keys), chunk_size):
+                chunk = keys[start:start + chunk_size]
+                if len(columns) == 1:
+                    condition = columns[0].in_([key[0] for key in chunk])
+                else:
+                    condition = sq.tuple_(*columns).in_(chunk)
+                deleted += connection.execute(table.delete().where(condition)).rowcount
+
+        return deleted
+
+    def create_staging_table(self, table_name, staging_table_name, engine_name, schema_name=None):
+        """
+        Creates an empty copy of a table, without its keys, to bulk-load a merge batch into.
+
+        Args:
+            table_name (str): The target table.
+            staging_table_name (str): The staging table to create.
+            engine_name (str): The engine of the target connector.
+            schema_name (str, optional): The schema of both tables.
+        """
+        table_name = qualify_table_name(table_name, schema_name)
+        staging_table_name = qualify_table_name(staging_table_name, schema_name)
+        if engine_name == "Microsoft SQL Server":
+            query = f"SELECT * INTO {staging_table_name} FROM {table_name} WHERE 1 = 0"
+        else:
+            query = f"CREATE TABLE {staging_table_name} AS SELECT * FROM {table_name} WHERE 1 = 0"
+
+        with self.engine.begin() as connection:
+            connection.execute(text(query))
+
+    def merge_staging_table(self, table_name, staging_table_name, columns, key_columns, engine_name,
+                            schema_name=None):
+        """
+        Upserts the rows of a staging table into its target table in a single statement. PostgreSQL and
+        MySQL/MariaDB need a primary key or unique index on ``key_columns``.
+
+        Args:
+            table_name (str): The target table.
+            staging_table_name (str): The staging table holding the batch.
+            columns (list): The columns to write.
+            key_columns (list): The columns identifying a row.
+            engine_name (str): The engine of the target connector.
+            schema_name (str, optional): The schema of both tables.
+
+        Returns:
+            int: The number of affected rows, as reported by the driver.
+        """
+        query = build_merge_query(engine_name, qualify_table_name(table_name, schema_name),
+                                  qualify_table_name(staging_table_name, schema_name), columns, key_columns)
+        with self.engine.begin() as connection:
+            return connection.execute(text(query)).rowcount
+
+    def drop_staging_table(self, staging_table_name, schema_name=None):
+        """
+        Drops a staging table if it exists.
+
+        Args:
+            staging_table_name (str): The staging table to drop.
+            schema_name (str, optional): The schema of the staging table.
+        """
+        if inspect(self.engine).has_table(staging_table_name, schema=schema_name):
+            with self.engine.begin() as connection:
+                connection.execute(text(f"DROP TABLE {qualify_table_name(staging_table_name, schema_name)}"))
+
+    def _column_types_key(self, table_name, schema_name=None):
+        return str(self.engine.url) if self.engine is not None else None, schema_name or self.schema, table_name
+
+    def cast_columns(self, df, cache_key=None, sample_size=1000, schema_name=None):
         """
         Function to cast columns in a DataFrame to specific data types based on the majority of data types in the columns.
 
+        The majority type is inferred from a sample of at most ``sample_size`` rows per column, see
+        infer_majority_type. With a ``cache_key`` (the source table) the types picked for a column are
+        reused by the following batches instead of being inferred again. Cached types are kept per database,
+        schema and table, the least recently used ones are evicted past OPENETL_COLUMN_TYPES_CACHE_SIZE.
+
         Parameters:
         - self: The object instance
         - df: The DataFrame containing the columns to be cast
+        - cache_key: The table of the cached column types, e.g. the source table. Defaults to no caching.
+        - sample_size: The number of rows inspected per column.
+        - schema_name: The schema of the table. Defaults to the schema of the connection.
 
         Returns:
         - df: The DataFrame with columns cast to specific data types
         """
+        table_key = self._column_types_key(cache_key, schema_name) if cache_key else None
         for col in df.columns:
-            types_counts = {
-                str: df[col].apply(lambda x: isinstance(x, str)).sum(),
-                int: df[col].apply(lambda x: isinstance(x, int)).sum(),
-                float: df[col].apply(lambda x: isinstance(x, float)).sum(),
-                list: df[col].apply(lambda x: isinstance(x, list) or isinstance(x, np.ndarray)).sum(),
-                dict: df[col].apply(lambda x: isinstance(x, dict)).sum(),
-                bool: df[col].apply(lambda x: isinstance(x, bool)).sum(),
-                np.datetime64: pd.api.types.is_datetime64_any_dtype(df[col]),
-                np.timedelta64: pd.api.types.is_timedelta64_dtype(df[col]),
-                bytes: df[col].apply(lambda x: isinstance(x, bytes)).sum()
-            }
-            majority_type = max(types_counts, key=types_counts.get)
+            majority_type = None
+            if table_key:
+                with self._column_types_lock:
+                    majority_type = self._column_types.get(table_key + (col,))
+            if majority_type is None:
+                majority_type = infer_majority_type(df[col], sample_size)
+                if table_key:
+                    with self._column_types_lock:
+                        self._column_types[table_key + (col,)] = majority_type
+
             if majority_type == list or majority_type == np.ndarray:
                 df[col] = df[col].apply(lambda x: list(
                     x) if isinstance(x, np.ndarray) else x).astype(str)
@@ -402,6 +527,16 @@ class DatabaseUtils():
                 df[col] = df[col].astype(majority_type)
         return df
 
+    def forget_column_types(self, table_name, schema_name=None):
+        """
+        Drops the column types cast_columns cached for a table, called when the DDL of the table changes so
+        the next batch infers them again.
+        """
+        table_key = self._column_types_key(table_name, schema_name)
+        with self._column_types_lock:
+            for key in [key for key in self._column_types if key[:3] == table_key]:
+                del self._column_types[key]
+
     def map_to_spark_type(self, pandas_dtype):
         """
         Map Pandas DataFrame data types to equivalent Spark DataFrame data types.
@@ -590,12 +725,35 @@ class DatabaseUtils():
                 self.alter_table_column_add_or_drop_alembic(table_name=base.__tablename__,
                                                             column_name=column_name,
                                                             column_details=column_type_sql, action=ColumnActions.ADD)
+
+            self.add_missing_enum_values(base)
         else:
             # Create the table if it doesn't exist
             base.metadata.create_all(self.engine)
 
 
 
+    def add_missing_enum_values(self, base):
+        """
+        Adds the members a model's enums gained since its table was created, e.g. IntegrationType.INCREMENTAL,
+        to their native PostgreSQL enum types. Other engines store enums as strings or inline types.
+
+        Args:
+            base: The declarative model of the table.
+        """
+        if self.engine.dialect.name != "postgresql":
+            return
+
+        enum_types = [column.type for column in base.__table__.columns if isinstance(column.type, sq.Enum)]
+        if not enum_types:
+            return
+
+        # ALTER TYPE ... ADD VALUE cannot run in a transaction block before PostgreSQL 12
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for enum_type in enum_types:
+                for value in enum_type.enums:
+                    connection.execute(text(f"ALTER TYPE {enum_type.name} ADD VALUE IF NOT EXISTS '{value}'"))
+
     def fetch_rows(self, table_name='openetl_documents', schema_name='open_etl', conditions: dict = {}):
         """
         Executes a select query on the specified table with the provided conditions.
@@ -881,6 +1039,192 @@ class DatabaseUtils():
             raise NoResultFound
 
 
+    def get_watermark(self, integration_id, cursor_column):
+        """
+        Returns the high-watermark stored for an incremental integration.
+
+        Args:
+            integration_id (str): The ID of the integration.
+            cursor_column (str): The cursor column of the integration. A watermark recorded for a different
+                column is ignored, so changing the cursor column triggers a full extraction.
+
+        Returns:
+            str | None: The last loaded cursor value, or None if nothing has been loaded yet.
+        """
+        watermark = self.session.query(OpenETLWatermark).filter(
+            OpenETLWatermark.integration_id == str(integration_id)).one_or_none()
+
+        if watermark is None or watermark.cursor_column != cursor_column:
+            return None
+        return watermark.watermark_value
+
+    def set_watermark(self, integration_id, cursor_column, watermark_value, run_id=None, commit=True):
+        """
+        Records a new high-watermark for an incremental integration.
+
+        Args:
+            integration_id (str): The ID of the integration.
+            cursor_column (str): The cursor column the watermark applies to.
+            watermark_value (str): The highest cursor value loaded into the target.
+            run_id (str, optional): The run that advanced the watermark.
+            commit (bool, optional): Commit the session. Pass False to commit the watermark together with
+                other pending changes, e.g. the batch completion. Defaults to True.
+
+        Returns:
+            OpenETLWatermark: The created or updated watermark.
+        """
+        session = self.session
+        watermark = session.query(OpenETLWatermark).filter(
+            OpenETLWatermark.integration_id == str(integration_id)).one_or_none()
+
+        if watermark is None:
+            watermark = OpenETLWatermark(integration_id=str(integration_id))
+            session.add(watermark)
+
+        watermark.cursor_column = cursor_column
+        watermark.watermark_value = watermark_value
+        watermark.run_id = run_id
+
+        if commit:
+            session.commit()
+        return watermark
+
+    def get_checkpoint(self, integration_id, source_table):
+        """
+        Returns the pagination state an interrupted API extraction resumes from.
+
+        Args:
+            integration_id (str): The ID of the integration.
+            source_table (str): The source table of the integration. A checkpoint recorded for a different
+                table is ignored.
+
+        Returns:
+            dict | None: The state after the last loaded page, or None if the last run read the source in full.
+        """
+        checkpoint = self.session.query(OpenETLCheckpoint).filter(
+            OpenETLCheckpoint.integration_id == str(integration_id)).one_or_none()
+
+        if checkpoint is None or checkpoint.source_table != source_table:
+            return None
+        return checkpoint.state
+
+    def set_checkpoint(self, integration_id, source_table, state, run_id=None, commit=True):
+        """
+        Records the pagination state after the last loaded page of an API extraction.
+
+        Args:
+            integration_id (str): The ID of the integration.
+            source_table (str): The source table being extracted.
+            state (dict | None): The state to resume from, None once the source is read in full.
+            run_id (str, optional): The run that loaded the page.
+            commit (bool, optional): Commit the session. Pass False to commit the checkpoint together with the
+                batch completion. Defaults to True.
+
+        Returns:
+            OpenETLCheckpoint: The created or updated checkpoint.
+        """
+        session = self.session
+        checkpoint = session.query(OpenETLCheckpoint).filter(
+            OpenETLCheckpoint.integration_id == str(integration_id)).one_or_none()
+
+        if checkpoint is None:
+            checkpoint = OpenETLCheckpoint(integration_id=str(integration_id))
+            session.add(checkpoint)
+
+        checkpoint.source_table = source_table
+        checkpoint.state = state
+        checkpoint.run_id = run_id
+
+        if commit:
+            session.commit()
+        return checkpoint
+
+    def get_response_cache(self, integration_id):
+        """
+        Returns the validators of the API list pages an integration loaded, see main_api_class.HTTPCache.
+
+        Args:
+            integration_id (str): The ID of the integration.
+
+        Returns:
+            dict: The cache entries by URL, empty if the integration has none.
+        """
+        cache = self.session.query(OpenETLResponseCache).filter(
+            OpenETLResponseCache.integration_id == str(integration_id)).one_or_none()
+        return (cache.entries or {}) if cache else {}
+
+    def set_response_cache(self, integration_id, entries, run_id=None, commit=True):
+        """
+        Stores the validators of the API list pages an integration loaded. Only store them once the pages
+        are written to the target: a page revalidated by the next run is skipped.
+
+        Args:
+            integration_id (str): The ID of the integration.
+            entries (dict): The cache entries by URL.
+            run_id (str, optional): The run that loaded the pages.
+            commit (bool, optional): Commit the session. Defaults to True.
+
+        Returns:
+            OpenETLResponseCache: The created or updated cache.
+        """
+        session = self.session
+        cache = session.query(OpenETLResponseCache).filter(
+            OpenETLResponseCache.integration_id == str(integration_id)).one_or_none()
+
+        if cache is None:
+            cache = OpenETLResponseCache(integration_id=str(integration_id))
+            session.add(cache)
+
+        cache.entries = entries
+        cache.run_id = run_id
+
+        if commit:
+            session.commit()
+        return cache
+
+    def get_registered_schema(self, integration_id, source_table):
+        """
+        Returns the latest registered schema of an integration's source table.
+
+        Args:
+            integration_id (str): The ID of the integration.
+            source_table (str): The source table the schema was resolved for.
+
+        Returns:
+            OpenETLSchema | None: The latest version, or None if nothing is registered yet.
+        """
+        return self.session.query(OpenETLSchema).filter(
+            OpenETLSchema.integration_id == str(integration_id),
+            OpenETLSchema.source_table == source_table
+        ).order_by(desc(OpenETLSchema.version)).first()
+
+    def register_schema(self, integration_id, source_table, spark_schema, target_ddl=None, run_id=None):
+        """
+        Records a new version of an integration's source table schema.
+
+        Args:
+            integration_id (str): The ID of the integration.
+            source_table (str): The source table the schema was resolved for.
+            spark_schema (dict): The resolved schema, as ``StructType.jsonValue()``.
+            target_ddl (str, optional): The CREATE TABLE statement matching the schema.
+            run_id (str, optional): The run that resolved the schema.
+
+        Returns:
+            OpenETLSchema: The new version.
+        """
+        latest = self.get_registered_schema(integration_id, source_table)
+        schema = OpenETLSchema(
+            integration_id=str(integration_id),
+            source_table=source_table,
+            version=latest.version + 1 if latest else 1,
+            spark_schema=spark_schema,
+            target_ddl=target_ddl,
+            run_id=run_id
+        )
+        self.session.add(schema)
+        self.session.commit()
+        return schema
+
     def update_openetl_document(self, document_id, **kwargs):
         """
         Updates an OpenETLBatch object in the database with the specified batch_id.
@@ -1083,7 +1427,7 @@ class DatabaseUtils():
 
     def create_integration(self, integration_name, integration_type, target_schema, source_schema, spark_config,
                            hadoop_config, cron_expression, source_connection,target_connection, source_table, target_table,
-                           batch_size):
+                           batch_size, read_config=None, write_config=None):
         scheduler = OpenETLIntegrations(
             integration_name=integration_name,
             integration_type=integration_type,
@@ -1096,7 +1440,9 @@ class DatabaseUtils():
             hadoop_config=hadoop_config,
             source_schema=source_schema,
             target_schema=target_schema,
-            batch_size=batch_size
+            batch_size=batch_size,
+            read_config=read_config,
+            write_config=write_config
         )
 
         self.session.add(scheduler)
@@ -1204,6 +1550,123 @@ def get_open_etl_document_connection_details(url=False):
         "database": os.getenv("OPENETL_DOCUMENT_DB","airflow")
     }
 
+def qualify_table_name(table_name, schema_name=None):
+    """
+    Prefixes a table with its schema, e.g. ``users`` in ``sales`` -> ``sales.users``.
+    """
+    return f"{schema_name}.{table_name}" if schema_name and "." not in table_name else table_name
+
+
+def build_merge_query(engine_name, table_name, staging_table_name, columns, key_columns):
+    """
+    Builds the statement upserting a staging table into its target table.
+
+    Rows are deduplicated on the key columns first, a batch holding the same key twice would
+    otherwise fail the statement on PostgreSQL and SQL Server.
+
+    Args:
+        engine_name (str): The engine of the target connector.
+        table_name (str): The target table.
+        staging_table_name (str): The staging table holding the batch.
+        columns (list): The columns to write.
+        key_columns (list): The columns identifying a row.
+
+    Returns:
+        str: An ``INSERT ... ON CONFLICT``, ``INSERT ... ON DUPLICATE KEY UPDATE`` or ``MERGE`` statement.
+
+    Raises:
+        NotImplementedError: If the engine has no merge statement.
+    """
+    column_list = ", ".join(columns)
+    keys = ", ".join(key_columns)
+    updates = [column for column in columns if column not in key_columns]
+
+    if engine_name == "PostgreSQL":
+        action = "DO UPDATE SET " + ", ".join(f"{column} = EXCLUDED.{column}" for column in updates) \
+            if updates else "DO NOTHING"
+        return (f"INSERT INTO {table_name} ({column_list}) "
+                f"SELECT DISTINCT ON ({keys}) {column_list} FROM {staging_table_name} "
+                f"ON CONFLICT ({keys}) {action}")
+
+    if engine_name in ("MySQL", "MariaDB"):
+        action = ", ".join(f"{column} = VALUES({column})" for column in updates or key_columns)
+        return (f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {staging_table_name} "
+                f"ON DUPLICATE KEY UPDATE {action}")
+
+    if engine_name in ("Microsoft SQL Server", "Snowflake"):
+        source = (f"(SELECT {column_list} FROM (SELECT {column_list}, ROW_NUMBER() OVER (PARTITION BY {keys} "
+                  f"ORDER BY {keys}) AS openetl_row FROM {staging_table_name}) openetl_ranked "
+                  f"WHERE openetl_row = 1)")
+        on = " AND ".join(f"target.{column} = source.{column}" for column in key_columns)
+        matched = ("WHEN MATCHED THEN UPDATE SET " + ", ".join(f"{column} = source.{column}" for column in updates)
+                   + " ") if updates else ""
+        return (f"MERGE INTO {table_name} AS target USING {source} AS source ON {on} {matched}"
+                f"WHEN NOT MATCHED THEN INSERT ({column_list}) "
+                f"VALUES ({', '.join(f'source.{column}' for column in columns)});")
+
+    raise NotImplementedError(f"Merge writes are not supported for {engine_name}")
+
+
+# Types returned by pandas.api.types.infer_dtype for columns holding a single Python type
+_inferred_majority_types = {"string": str, "integer": int, "floating": float, "boolean": int, "bytes": bytes}
+
+# Candidate types in the order ties are broken, with the isinstance checks counted for each of them
+_majority_type_checks = {
+    str: str,
+    int: int,
+    float: float,
+    list: (list, np.ndarray),
+    dict: dict,
+    bool: bool,
+    bytes: bytes,
+}
+
+
+def infer_majority_type(series, sample_size=1000):
+    """
+    Returns the type most values of a column are instances of, looking at a sample of the column.
+
+    Datetime and timedelta columns are detected from their dtype. Otherwise the sample goes through
+    ``pandas.api.types.infer_dtype``, which settles single-typed columns in one C pass; nested values
+    are typed with pyarrow, and mixed columns by counting the types of the sample once. Booleans count
+    as integers, as ``isinstance(True, int)`` holds, and ties go to the first type of
+    _majority_type_checks.
+
+    Args:
+        series (pd.Series): The column.
+        sample_size (int): The number of rows inspected.
+
+    Returns:
+        type: One of str, int, float, list, dict, bool, bytes, np.datetime64 or np.timedelta64.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return np.datetime64
+    if pd.api.types.is_timedelta64_dtype(series):
+        return np.timedelta64
+
+    # .astype(object) yields Python scalars for numpy dtypes, as Series.apply does
+    sample = series.iloc[:sample_size].astype(object)
+    inferred = pd.api.types.infer_dtype(sample, skipna=False)
+    if inferred in _inferred_majority_types:
+        return _inferred_majority_types[inferred]
+
+    if inferred == "mixed" and sample.notna().all():
+        try:
+            arrow_type = pa.infer_type(sample)
+            if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+                return list
+            if pa.types.is_struct(arrow_type) or pa.types.is_map(arrow_type):
+                return dict
+        except (TypeError, ValueError):
+            # values Arrow cannot type as one column, e.g. lists mixed with dicts, are counted below
+            pass
+
+    type_counts = sample.map(type).value_counts()
+    counts = {candidate: sum(count for value_type, count in type_counts.items() if issubclass(value_type, checks))
+              for candidate, checks in _majority_type_checks.items()}
+    return max(counts, key=counts.get)
+
+
 def generate_cron_expression(frequency, schedule_time, schedule_dates=None):
     time_parts = schedule_time.split(':')
     minute = time_parts[1]
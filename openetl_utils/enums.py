@@ -44,6 +44,20 @@ class RunStatus(Enum):
 
 class IntegrationType(Enum):
     FULL_LOAD = "full_load"
+    INCREMENTAL = "incremental"
+    CDC = "cdc"
+
+
+class ReadMode(Enum):
+    PAGINATED = "paginated"
+    PARTITIONED = "partitioned"
+    KEYSET = "keyset"
+
+
+class ExecutionEngine(Enum):
+    AUTO = "auto"
+    SPARK = "spark"
+    PANDAS = "pandas"
 
 
 class LogsType(Enum):
@@ -0,0 +1,309 @@
+"""
+This module manages the local cache of JDBC driver jars used by Spark sessions.
+
+Driver jars are downloaded once from Maven into the cache directory and handed to Spark as local
+``spark.jars`` paths, so sessions start without resolving packages through Ivy and work on workers
+without network access once the cache is filled. The runtime dependencies declared in the POM of a
+driver are cached with it; drivers whose dependencies cannot be worked out from their own POM are left
+to ``spark.jars.packages``, which resolves them transitively.
+
+Functions:
+- jar_path: Returns the cache path of a Maven coordinate.
+- pom_path: Returns the cache path of the POM of a Maven coordinate.
+- download_jar_from_maven: Downloads a jar from a Maven repository and checks its SHA-1.
+- resolve_jar: Returns the cached path of a jar, downloading it if it is missing.
+- read_dependencies: Returns the runtime dependencies declared in the POM of a coordinate.
+- resolve_jar_tree: Returns the cached paths of a jar and its runtime dependencies.
+- resolve_jars: Splits coordinates into cached jar paths and coordinates left to Spark.
+- prefetch_jars: Fills the cache with the drivers of the given engines.
+- cached_driver_jars: Returns the coordinates of the drivers already in the cache.
+
+Run ``python -m openetl_utils.jar_utils`` to fill the cache ahead of time, e.g. while building an image.
+"""
+import hashlib
+import logging
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+import requests
+
+from openetl_utils.cache import jdbc_database_jars
+
+jars_directory = os.getenv("OPENETL_JARS_DIR", f"{os.getenv('OPENETL_HOME', os.getcwd())}/.jars")
+maven_repository = os.getenv("OPENETL_MAVEN_REPOSITORY", "https://repo1.maven.org/maven2")
+
+
+def jar_path(coordinate):
+    """
+    Returns the cache path of a Maven coordinate.
+
+    Args:
+        coordinate (str): ``group:artifact:version``, e.g. "org.postgresql:postgresql:42.2.6".
+
+    Returns:
+        str: The path of the jar, or None if the coordinate is not ``group:artifact:version``.
+    """
+    parts = coordinate.strip().split(":")
+    if len(parts) != 3 or not all(parts):
+        return None
+    _, artifact, version = parts
+    return f"{jars_directory}/{artifact}-{version}.jar"
+
+
+def pom_path(coordinate):
+    """
+    Returns the cache path of the POM of a Maven coordinate, next to its jar.
+    """
+    path = jar_path(coordinate)
+    return path[:-len(".jar")] + ".pom" if path else None
+
+
+def download_jar_from_maven(coordinate, destination_path, timeout=60, extension="jar"):
+    """
+    Downloads a jar from a Maven repository and checks it against the published SHA-1. The jar is written
+    next to its destination and moved into place once complete, so concurrent workers never read a
+    partial file.
+
+    Args:
+        coordinate (str): ``group:artifact:version``.
+        destination_path (str): Where to store the jar.
+        timeout (int): Seconds to wait for the repository.
+        extension (str): The artifact to download, "jar" or "pom".
+
+    Raises:
+        requests.HTTPError: If the repository does not serve the jar.
+        ValueError: If the download does not match its checksum.
+    """
+    group, artifact, version = coordinate.strip().split(":")
+    url = f"{maven_repository}/{group.replace('.', '/')}/{artifact}/{version}/{artifact}-{version}.{extension}"
+
+    os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+    partial_path = f"{destination_path}.{os.getpid()}.part"
+    sha1 = hashlib.sha1()
+
+    try:
+        with requests.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            with open(partial_path, "wb") as file:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    sha1.update(chunk)
+                    file.write(chunk)
+
+        checksum = requests.get(f"{url}.sha1", timeout=timeout)
+        if checksum.ok and checksum.text.split()[0].strip() != sha1.hexdigest():
+            raise ValueError(f"Checksum mismatch for {coordinate}")
+
+        os.replace(partial_path, destination_path)
+        logging.info(f"Downloaded {coordinate} to {destination_path}")
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def resolve_jar(coordinate, offline=None):
+    """
+    Returns the cached path of a jar, downloading it if it is missing.
+
+    Args:
+        coordinate (str): ``group:artifact:version``.
+        offline (bool, optional): Never download, only use the cache. Defaults to the OPENETL_JARS_OFFLINE
+            environment variable.
+
+    Returns:
+        str: The path of the jar, or None if it is not cached and could not be downloaded.
+    """
+    offline = _is_offline(offline)
+
+    path = jar_path(coordinate)
+    if path is None:
+        return None
+    if os.path.exists(path):
+        return path
+    if offline:
+        logging.warning(f"{coordinate} is not in the jar cache {jars_directory}")
+        return None
+
+    try:
+        download_jar_from_maven(coordinate, path)
+        return path
+    except Exception as e:
+        logging.warning(f"Unable to download {coordinate} into the jar cache: {e}")
+        return None
+
+
+def _is_offline(offline):
+    if offline is None:
+        return os.getenv("OPENETL_JARS_OFFLINE", "false").lower() == "true"
+    return offline
+
+
+def read_dependencies(coordinate, offline=None):
+    """
+    Returns the runtime dependencies declared in the POM of a coordinate. The POM is cached next to the
+    jar. Test, provided, system and optional dependencies are skipped, versions are looked up in the
+    properties and dependency management of the POM itself.
+
+    Args:
+        coordinate (str): ``group:artifact:version``.
+        offline (bool, optional): Never download, see resolve_jar.
+
+    Returns:
+        list: The ``group:artifact:version`` of the dependencies.
+
+    Raises:
+        ValueError: If the POM is not available, or a dependency version is inherited from a parent POM
+            or is a range, which only a full Maven resolution can settle.
+    """
+    path = pom_path(coordinate)
+    if not os.path.exists(path):
+        if _is_offline(offline):
+            raise ValueError(f"The POM of {coordinate} is not in the jar cache {jars_directory}")
+        try:
+            download_jar_from_maven(coordinate, path, extension="pom")
+        except Exception as e:
+            raise ValueError(f"Unable to download the POM of {coordinate}: {e}")
+
+    root = ET.parse(path).getroot()
+    for element in root.iter():
+        element.tag = element.tag.split("}")[-1]  # POMs may or may not declare the Maven namespace
+
+    group, _, version = coordinate.split(":")
+    properties = {"project.groupId": group, "project.version": version, "version": version,
+                  "pom.version": version, "project.parent.version": root.findtext("parent/version") or ""}
+    for element in root.findall("properties/*"):
+        properties[element.tag] = (element.text or "").strip()
+
+    def expand(value):
+        value = (value or "").strip()
+        for _ in range(3):  # properties may refer to other properties
+            value = re.sub(r"\$\{([^}]+)}", lambda match: properties.get(match.group(1), match.group(0)), value)
+        return value
+
+    managed = {}
+    for dependency in root.findall("dependencyManagement/dependencies/dependency"):
+        managed[(expand(dependency.findtext("groupId")), expand(dependency.findtext("artifactId")))] = \
+            expand(dependency.findtext("version"))
+
+    dependencies = []
+    for dependency in root.findall("dependencies/dependency"):
+        scope = expand(dependency.findtext("scope")) or "compile"
+        if scope not in ("compile", "runtime") or expand(dependency.findtext("optional")) == "true" \
+                or (expand(dependency.findtext("type")) or "jar") != "jar":
+            continue
+        dependency_group = expand(dependency.findtext("groupId"))
+        dependency_artifact = expand(dependency.findtext("artifactId"))
+        dependency_version = expand(dependency.findtext("version")) \
+            or managed.get((dependency_group, dependency_artifact), "")
+        if not dependency_version or "$" in dependency_version or dependency_version[0] in "[(":
+            raise ValueError(f"{coordinate} does not pin the version of {dependency_group}:{dependency_artifact}")
+        dependencies.append(f"{dependency_group}:{dependency_artifact}:{dependency_version}")
+    return dependencies
+
+
+def resolve_jar_tree(coordinate, offline=None):
+    """
+    Returns the cached paths of a jar and its runtime dependencies, downloading the ones that are missing.
+    The dependencies are walked breadth first, so the version nearest to the driver wins as in Maven.
+
+    Args:
+        coordinate (str): ``group:artifact:version``.
+        offline (bool, optional): Never download, see resolve_jar.
+
+    Returns:
+        list: The paths of the jars, or None if the driver or one of its dependencies could not be cached.
+    """
+    paths, seen, queue = [], set(), [coordinate.strip()]
+    while queue:
+        current = queue.pop(0)
+        group, artifact = current.split(":")[:2]
+        if (group, artifact) in seen:
+            continue
+        seen.add((group, artifact))
+
+        path = resolve_jar(current, offline=offline)
+        if path is None:
+            return None
+        try:
+            queue.extend(read_dependencies(current, offline=offline))
+        except Exception as e:
+            logging.warning(f"Unable to cache the dependencies of {current}: {e}")
+            return None
+        paths.append(path)
+    return paths
+
+
+def resolve_jars(coordinates, offline=None):
+    """
+    Splits Maven coordinates into the cached paths of their jars and runtime dependencies, and the
+    coordinates that could not be cached, which are left to ``spark.jars.packages``.
+
+    Args:
+        coordinates (str or list): Comma separated or listed ``group:artifact:version`` coordinates.
+        offline (bool, optional): Never download, see resolve_jar.
+
+    Returns:
+        tuple: (list of local jar paths, list of unresolved coordinates)
+    """
+    if isinstance(coordinates, str):
+        coordinates = coordinates.split(",")
+
+    paths, unresolved = [], []
+    for coordinate in filter(None, (coordinate.strip() for coordinate in coordinates or [])):
+        if jar_path(coordinate) is None:
+            unresolved.append(coordinate)
+            continue
+        tree = resolve_jar_tree(coordinate, offline=offline)
+        if tree is None:
+            unresolved.append(coordinate)
+        else:
+            paths.extend(path for path in tree if path not in paths)
+    return paths, unresolved
+
+
+def prefetch_jars(engines=None):
+    """
+    Fills the cache with the drivers of the given engines.
+
+    Args:
+        engines (list, optional): Engine names from cache.jdbc_database_jars, all engines if omitted.
+
+    Returns:
+        list: The coordinates that could not be cached.
+    """
+    coordinates = [jdbc_database_jars[engine] for engine in engines or jdbc_database_jars]
+    _, unresolved = resolve_jars(coordinates, offline=False)
+    return unresolved
+
+
+def _is_cached(coordinate):
+    # walks the dependencies like resolve_jar_tree, without downloading or logging what is missing
+    seen, queue = set(), [coordinate]
+    while queue:
+        current = queue.pop(0)
+        if tuple(current.split(":")[:2]) in seen:
+            continue
+        seen.add(tuple(current.split(":")[:2]))
+        path = jar_path(current)
+        if not path or not os.path.exists(path) or not os.path.exists(pom_path(current)):
+            return False
+        try:
+            queue.extend(read_dependencies(current, offline=True))
+        except Exception:
+            return False
+    return True
+
+
+def cached_driver_jars():
+    """
+    Returns the coordinates of the drivers of cache.jdbc_database_jars whose jar and runtime dependencies
+    are already in the cache.
+    """
+    return sorted({coordinate for coordinate in jdbc_database_jars.values() if _is_cached(coordinate)})
+
+
+if __name__ == "__main__":
+    missing = prefetch_jars(sys.argv[1:] or None)
+    if missing:
+        print(f"Unable to cache: {', '.join(missing)}")
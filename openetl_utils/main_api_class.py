@@ -1,12 +1,534 @@
-from urllib.parse import urlencode
-
+import hashlib
+import http.cookiejar
+import importlib.util
+import io
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urlsplit, urljoin
+
+import orjson
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 import pandas as pd
-import flatten_json
 from openetl_utils.enums import *
 from openetl_utils.connector_utils import install_libraries
 
 
+class TokenBucket:
+    """
+    A thread-safe token bucket allowing ``requests`` requests per ``per`` seconds, with bursts up to
+    ``requests``. Shared by every session of the same connector account in a worker process, see
+    get_rate_limiter.
+    """
+
+    def __init__(self, requests, per):
+        self.capacity = requests
+        self.per = per
+        self.tokens = float(requests)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self.capacity / self.per
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Holds every request for ``seconds``, e.g. after a 429 or an exhausted quota window.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    def resize(self, requests):
+        """
+        Changes the number of requests allowed per window, e.g. to the plan limit reported by the API.
+        """
+        with self.lock:
+            if requests > 0 and requests != self.capacity:
+                self.capacity = requests
+                self.tokens = min(self.tokens, requests)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key, rate_limit):
+    """
+    Returns the token bucket of a connector account, creating it from ``rate_limit``
+    ({"requests": int, "per": seconds}) on first use. Buckets live for the worker process, so consecutive
+    and concurrent runs against the same account share the quota.
+    """
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = TokenBucket(rate_limit["requests"], rate_limit["per"])
+        return _rate_limiters[key]
+
+
+class RateLimitedSession(requests.Session):
+    """
+    A requests.Session that waits for a token bucket before each request and retries throttled and
+    failed requests instead of failing the run.
+
+    - 429 and 503 responses are retried after their ``Retry-After``, or a jittered exponential backoff.
+      Other 5xx responses and connection errors are retried the same way for idempotent methods only.
+    - ``*RateLimit-Remaining`` of 0 holds the bucket until ``*RateLimit-Reset``.
+    - With ``adaptive`` limits, ``X-RateLimit-Total`` / ``X-RateLimit-Limit`` resize the bucket to the
+      limit the API reports, e.g. the plan limit of the account.
+    """
+
+    retry_statuses = {429, 500, 502, 503, 504}
+    idempotent_methods = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+    def __init__(self, limiter=None, adaptive=False, max_retries=5, backoff_base=1.0, backoff_cap=60.0):
+        super().__init__()
+        self.limiter = limiter
+        self.account = None  # hash of the credentials, keys the rate limiters of the account
+        self.adaptive = adaptive
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+    def request(self, method, url, *args, **kwargs):
+        retryable = method.upper() in self.idempotent_methods
+        for attempt in range(self.max_retries + 1):
+            if self.limiter:
+                self.limiter.acquire()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                logging.warning(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            self.observe_limits(response)
+            status = response.status_code
+            if status not in self.retry_statuses or attempt == self.max_retries or \
+                    (not retryable and status not in (429, 503)):
+                return response
+
+            delay = self.retry_after(response)
+            delay = self.backoff(attempt) if delay is None else delay + random.uniform(0, 1)
+            logging.warning(f"{method} {url} returned {status}, retrying in {delay:.1f}s "
+                            f"(attempt {attempt + 1} of {self.max_retries})")
+            if self.limiter and status == 429:
+                self.limiter.pause(delay)
+            else:
+                time.sleep(delay)
+        return response
+
+    def backoff(self, attempt):
+        """
+        Full-jitter exponential backoff: a random delay up to base * 2 ** attempt, capped.
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(response):
+        """
+        Returns the seconds to wait from a ``Retry-After`` header, in seconds or as an HTTP date.
+        """
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def observe_limits(self, response):
+        if not self.limiter:
+            return
+        headers = {key.lower(): value for key, value in response.headers.items()}
+
+        # Salesforce reports its rolling 24h quota as "api-usage=used/limit"
+        usage = headers.get("sforce-limit-info", "")
+        if usage.startswith("api-usage="):
+            used, _, limit = usage[len("api-usage="):].partition("/")
+            if used.isdigit() and limit.isdigit() and int(used) >= 0.9 * int(limit):
+                logging.warning(f"{used} of {limit} daily API requests used")
+
+        def header(*suffixes):
+            for key, value in headers.items():
+                if key.endswith(suffixes):
+                    try:
+                        return float(value)
+                    except ValueError:
+                        return None
+            return None
+
+        if self.adaptive:
+            limit = header("x-ratelimit-total", "x-ratelimit-limit")
+            if limit:
+                self.limiter.resize(int(limit))
+
+        if header("ratelimit-remaining") == 0:
+            reset = header("ratelimit-reset")
+            if reset is not None:
+                # Some APIs send an epoch timestamp, others the seconds left in the window
+                self.limiter.pause(reset - time.time() if reset > 1e9 else reset)
+            else:
+                interval = header("ratelimit-interval-milliseconds")
+                self.limiter.pause(interval / 1000 if interval else self.limiter.per / self.limiter.capacity)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter shared by the sessions of a connector in a worker process. Sessions closing at the end
+    of a run leave its pool open, so the next runs reuse the keep-alive connections and skip the TLS
+    handshakes.
+    """
+
+    def close(self):
+        pass
+
+
+class HTTPXAdapter(BaseAdapter):
+    """
+    Sends the requests of a requests.Session through a shared httpx client, for HTTP/2 multiplexing of
+    concurrent page fetches over one connection. Responses are returned as requests.Response, already
+    decoded, so connectors use the session as usual.
+    """
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        import httpx
+
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        started = time.monotonic()
+        try:
+            response = self.client.request(request.method, request.url, headers=dict(request.headers),
+                                           content=request.body, timeout=httpx.Timeout(timeout))
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+        response.close()  # the body was read by request(), this releases the connection to the pool
+
+        result = requests.Response()
+        result.status_code = response.status_code
+        result.reason = response.reason_phrase
+        result.headers = CaseInsensitiveDict(response.headers.items())
+        result.url = str(response.url)
+        result.encoding = response.encoding
+        result._content = response.content
+        result._content_consumed = True
+        # requests reads and closes raw on redirects and Session.close(), the body is already in memory
+        result.raw = io.BytesIO(response.content)
+        # Paginator.adapt sizes pages after it. httpx only times responses it reads itself, and raises for
+        # others, e.g. responses built with their content
+        result.elapsed = timedelta(seconds=time.monotonic() - started)
+        result.request = request
+        result.connection = self
+        return result
+
+    def close(self):
+        pass
+
+
+_http_adapters = {}
+_http_adapters_lock = threading.Lock()
+
+
+def get_http_adapter(api, http2=False, pool_maxsize=16):
+    """
+    Returns the transport adapter shared by the sessions of a connector in the worker process: a pooled
+    urllib3 adapter, or an httpx HTTP/2 client when ``http2`` is set.
+
+    Args:
+        api (str): The connector.
+        http2 (bool): Use HTTP/2 through httpx.
+        pool_maxsize (int): The number of connections kept alive per host.
+
+    Returns:
+        BaseAdapter: The adapter to mount on a requests.Session.
+    """
+    with _http_adapters_lock:
+        key = (api, http2)
+        if key not in _http_adapters:
+            if http2:
+                install_libraries(["httpx==0.27.2", "h2==4.1.0"])
+                import httpx
+
+                # The client is shared by every account of the connector, so it must not keep cookies
+                no_cookies = http.cookiejar.CookieJar(policy=http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                client = httpx.Client(http2=True, cookies=no_cookies,
+                                      limits=httpx.Limits(max_connections=pool_maxsize,
+                                                          max_keepalive_connections=pool_maxsize))
+                _http_adapters[key] = HTTPXAdapter(client)
+            else:
+                _http_adapters[key] = PooledHTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize,
+                                                        pool_block=True)
+        return _http_adapters[key]
+
+
+def accept_encoding():
+    """
+    Returns the Accept-Encoding of API sessions, with brotli when a brotli decoder is installed.
+    """
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+        return "br, gzip, deflate"
+    return "gzip, deflate"
+
+
+def flatten_response(payload, main_response_key=None, key_paths=None):
+    """
+    Flattens a decoded JSON response into columns in a single pass over the payload. Nested keys are joined
+    with "_", list indexes and ``main_response_key`` are dropped from the names, and values landing on the
+    same name are gathered into a list, e.g. ``{"results": [{"id": 1}, {"id": 2}]}`` -> ``{"id": [1, 2]}``.
+
+    Args:
+        payload (dict or list): The decoded response.
+        main_response_key (str, optional): The key holding the records, dropped from the names.
+        key_paths (dict, optional): Cache of the column names of the key paths of an endpoint, filled on
+            the way, so names are built once per endpoint schema instead of once per value.
+
+    Returns:
+        dict: The values of each column.
+    """
+    key_paths = {} if key_paths is None else key_paths
+    paths = key_paths.setdefault("paths", {})
+    columns = key_paths.setdefault("columns", {})
+    cleaned_dict = {}
+
+    def child_path(path, name):
+        cached = paths.get((path, name))
+        if cached is None:
+            parts = () if isinstance(name, int) else \
+                tuple(part for part in name.split("_") if not part.isdigit() and part != main_response_key)
+            cached = paths[(path, name)] = path + parts
+        return cached
+
+    def column(path):
+        name = columns.get(path)
+        if name is None:
+            name = columns[path] = "_".join(path)
+        return name
+
+    def walk(value, path):
+        if value and isinstance(value, dict):
+            for name, child in value.items():
+                walk(child, child_path(path, name))
+        elif value and isinstance(value, list):
+            for index, child in enumerate(value):
+                walk(child, child_path(path, index))
+        else:
+            key = column(path)
+            # If key already exists in cleaned_dict, append value to list
+            if key in cleaned_dict:
+                if isinstance(cleaned_dict[key], list):
+                    cleaned_dict[key].append(value)
+                else:
+                    cleaned_dict[key] = [cleaned_dict[key], value]
+            else:
+                cleaned_dict[key] = value
+
+    if payload:
+        walk(payload, ())
+    return cleaned_dict
+
+
+class Page(dict):
+    """
+    A flattened page of records, carrying the pagination state to resume from once it is loaded.
+    """
+
+    def __init__(self, data, resume_state=None):
+        super().__init__(data)
+        self.resume_state = resume_state
+
+
+def get_path(payload, path):
+    """
+    Returns the value at a dotted path of a decoded response, e.g. "paging.next.after", or None.
+    """
+    for key in path.split("."):
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(key)
+    return payload
+
+
+class Paginator:
+    """
+    Declarative pagination of an endpoint, built from the ``pagination`` dict of a connector.
+
+    Options:
+    - style: "cursor", "offset", "page" or "link".
+    - page_size, size_param: The records requested per page and the parameter carrying it (None to not send it).
+    - cursor_param, cursor_path: The parameter of the cursor and the dotted response path of the next one.
+    - offset_param: The parameter of the offset.
+    - page_param, first_page: The parameter and number of the first page. Pages are fetched
+      ``page_concurrency`` at a time.
+    - next_url_path: The dotted response path of the next page URL, the ``Link: rel="next"`` header if unset.
+    - drop_keys: Top-level response keys holding pagination metadata rather than records.
+    - min_page_size, max_page_size, target_latency, max_page_bytes: Cursor and offset pages shrink when a
+      response is slower than ``target_latency`` seconds or larger than ``max_page_bytes``, and grow when
+      it is well under both.
+
+    The state of a pagination, ``{"style", "position", "page_size"}``, is JSON serializable, so it can be
+    stored after a page is loaded and passed back to resume from the next page.
+    """
+
+    styles = ("cursor", "offset", "page", "link")
+
+    def __init__(self, style, page_size=100, size_param="limit", cursor_param="after", cursor_path=None,
+                 offset_param="offset", page_param="page", first_page=1, next_url_path=None, drop_keys=(),
+                 min_page_size=None, max_page_size=None, target_latency=5.0, max_page_bytes=20 * 1024 * 1024):
+        if style not in self.styles:
+            raise ValueError(f"Unknown pagination style {style}, expected one of {self.styles}")
+        if style == "cursor" and not cursor_path:
+            raise ValueError("Cursor pagination needs a cursor_path")
+        self.style = style
+        self.page_size = page_size
+        self.size_param = size_param
+        self.cursor_param = cursor_param
+        self.cursor_path = cursor_path
+        self.offset_param = offset_param
+        self.page_param = page_param
+        self.first_page = first_page
+        self.next_url_path = next_url_path
+        self.drop_keys = set(drop_keys)
+        self.min_page_size = min_page_size or page_size
+        self.max_page_size = max_page_size or page_size
+        self.target_latency = target_latency
+        self.max_page_bytes = max_page_bytes
+
+    def initial_state(self):
+        position = {"cursor": None, "offset": 0, "page": self.first_page, "link": None}[self.style]
+        return {"style": self.style, "position": position, "page_size": self.page_size}
+
+    def resume(self, state):
+        """
+        Returns the state to start from: a stored state of the same style, else the first page.
+        """
+        if state and state.get("style") == self.style and state.get("position") is not None:
+            return dict(state)
+        return self.initial_state()
+
+    def request_params(self, state, params=None):
+        params = dict(params or {})
+        if self.size_param:
+            params[self.size_param] = state["page_size"]
+        if self.style == "cursor" and state["position"] is not None:
+            params[self.cursor_param] = state["position"]
+        elif self.style == "offset":
+            params[self.offset_param] = state["position"]
+        elif self.style == "page":
+            params[self.page_param] = state["position"]
+        return params
+
+    def next_position(self, state, payload, response, record_count):
+        """
+        Returns the position of the next page, or None after the last page.
+        """
+        if self.style == "cursor":
+            return get_path(payload, self.cursor_path)
+        if self.style == "offset":
+            return state["position"] + record_count if record_count >= state["page_size"] else None
+        if self.style == "page":
+            return state["position"] + 1 if record_count >= state["page_size"] else None
+        next_url = get_path(payload, self.next_url_path) if self.next_url_path else \
+            response.links.get("next", {}).get("url")
+        return urljoin(response.url, next_url) if next_url else None
+
+    def adapt(self, state, response):
+        """
+        Resizes the next page after the latency and size of a response, for cursor and offset styles.
+        """
+        if self.style not in ("cursor", "offset") or self.min_page_size >= self.max_page_size:
+            return
+        latency, size = response.elapsed.total_seconds(), len(response.content)
+        if latency > self.target_latency or size > self.max_page_bytes:
+            state["page_size"] = max(self.min_page_size, state["page_size"] // 2)
+        elif latency < self.target_latency / 4 and size < self.max_page_bytes / 4:
+            state["page_size"] = min(self.max_page_size, state["page_size"] * 2)
+
+
+class HTTPCache:
+    """
+    The validators (ETag, Last-Modified) of the list pages of an integration, keyed by URL, so pages that
+    did not change since the last run are revalidated with a conditional request instead of downloaded.
+
+    An entry also keeps what pagination needs to step over a page answered with 304 Not Modified: its
+    record count and the position of the next page. Entries are only kept for the URLs requested during
+    the run, see in_use, so the cache of an integration does not grow with stale URLs.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.in_use = {}  # the entries to store after the run, revalidated or refreshed
+
+    @staticmethod
+    def key(url, params=None):
+        request = requests.models.PreparedRequest()
+        request.prepare_url(url, params)
+        return request.url
+
+    def conditional_headers(self, key):
+        entry = self.entries.get(key) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidated(self, key):
+        """
+        Returns the entry of a page answered with 304 Not Modified.
+        """
+        self.in_use[key] = self.entries[key]
+        return self.entries[key]
+
+    def store(self, key, response, records, next_position):
+        """
+        Keeps the validators of a downloaded page, if the server sent any.
+        """
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.in_use[key] = {"etag": etag, "last_modified": last_modified, "records": records,
+                                "next": next_position}
+
+
 class API:
     
     logo = ""
@@ -14,7 +536,9 @@ class API:
     tables = {
     }
     pagination = {
-    }
+    }  # Paginator options of the list endpoints, see paginate
+    supports_resume = False  # fetch_data takes ``resume_state``, the pagination state to resume from
+    http_cache = None  # HTTPCache of the integration, set by connector_utils.fetch_data_from_connector
     limit = {"limit": 100}
     connection_type = ConnectionType.API
     api = ""
@@ -24,6 +548,13 @@ class API:
     database = "public"
     authentication_details = {
     }
+    supports_incremental = False
+    supports_projection = False  # fetch_data takes ``properties``, the fields to extract
+    rate_limit = None  # {"requests": int, "per": seconds, "adaptive": bool}, shared per account, see TokenBucket
+    http2 = os.getenv("OPENETL_API_HTTP2", "false").lower() == "true"
+    pool_maxsize = 16  # keep-alive connections per host, above page_concurrency + prefetch_pages
+    prefetch_pages = 2  # pages downloaded ahead of the one being processed, see connector_utils.prefetch
+    page_concurrency = 4  # pages requested at once by fetch_pages_in_parallel
 
     def __init__(self):
         """
@@ -32,6 +563,9 @@ class API:
         This constructor calls the install_missing_libraries method to ensure that all necessary
         libraries are present before any API operations are performed.
         """
+        # column names of the key paths of each endpoint, see flatten_response. Kept per instance, so they
+        # last for the run of an integration instead of piling up in a long-lived worker.
+        self._key_paths = {}
         self.install_missing_libraries()
 
     def connect_to_api(self, auth_type=AuthType.BASIC, **auth_params) -> requests.Session | str:
@@ -59,7 +593,7 @@ class API:
             NotImplementedError: If OAuth2 authentication (AuthType.OAUTH2.value) is specified.
         """
         url = self.base_url
-        session = requests.Session()
+        session = self.create_session(**auth_params)
 
         if auth_type == AuthType.OAUTH2.value:
             raise NotImplementedError
@@ -77,7 +611,32 @@ class API:
 
         return session
 
-    def fetch_data(self, api_session, table, main_response_key=None) -> dict:
+    def create_session(self, **auth_params) -> requests.Session:
+        """
+        Creates the HTTP session of a run: a RateLimitedSession holding the token bucket of the account,
+        so runs of the same account in a worker share the connector's ``rate_limit``. The session sends
+        through the connector's shared adapter (keep-alive pool, or HTTP/2 with ``http2``) and asks for
+        compressed responses.
+
+        Parameters:
+            **auth_params: The authentication parameters, identifying the account.
+
+        Returns:
+            RateLimitedSession: The session, without authentication configured.
+        """
+        limiter = None
+        account = hashlib.sha1(repr(sorted(auth_params.items())).encode()).hexdigest()[:16]
+        if self.rate_limit:
+            limiter = get_rate_limiter((self.api, self.base_url, account), self.rate_limit)
+        session = RateLimitedSession(limiter=limiter, adaptive=bool(self.rate_limit and self.rate_limit.get("adaptive")))
+        session.account = account
+        adapter = get_http_adapter(self.api, http2=self.http2, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Accept-Encoding"] = accept_encoding()
+        return session
+
+    def fetch_data(self, api_session, table, main_response_key=None, method="GET", json=None) -> dict:
         """
         Fetches data from the API using the provided session object.
 
@@ -85,37 +644,199 @@ class API:
         - api_session (requests.Session): The session object with authentication configured.
         - table (str): The table endpoint to fetch data from.
         - main_response_key (str, optional): The key to use for nested structure. Defaults to None.
+        - method (str, optional): The HTTP method, e.g. "POST" for search endpoints. Defaults to "GET".
+        - json (dict, optional): The JSON body of the request.
 
         Returns:
         - dict: The JSON response containing the fetched data.
+
+        The body is decoded with orjson and flattened in one pass by flatten_response, with the column
+        names of the endpoint cached across pages.
         """
-        flattened = None
-        response = api_session.get(table)
+        payload, _ = self.request_page(api_session, table, method=method, json=json)
+        return self.flatten_page(payload, table, main_response_key)
+
+    def request_page(self, api_session, url, params=None, method="GET", json=None, headers=None):
+        """
+        Requests a page and decodes its body with orjson.
+
+        Returns:
+            tuple: (the decoded body, the response). The body is None if the page was not modified since
+            the validators sent in ``headers``.
+        """
+        response = api_session.request(method, url, params=params, json=json, headers=headers)
+        if response.status_code == 304 and headers:
+            return None, response
         response.raise_for_status()  # Raise an exception for any HTTP errors
+        return orjson.loads(response.content), response
 
-        # Flatten JSON response
+    def request_list_page(self, api_session, url, params=None):
+        """
+        Requests a list page, conditionally if the integration has an HTTPCache entry for it.
+
+        Returns:
+            tuple: (the decoded body or None if not modified, the response, the cache key or None)
+        """
+        if self.http_cache is None:
+            return *self.request_page(api_session, url, params=params), None
+        key = self.http_cache.key(url, params)
+        payload, response = self.request_page(api_session, url, params=params,
+                                              headers=self.http_cache.conditional_headers(key) or None)
+        return payload, response, key
+
+    def flatten_page(self, payload, url, main_response_key=None, drop_keys=()):
+        """
+        Flattens a decoded page with the cached column names of its endpoint, see flatten_response.
+        """
+        if drop_keys and isinstance(payload, dict):
+            payload = {key: value for key, value in payload.items() if key not in drop_keys}
+        endpoint = urlsplit(url)
+        key_paths = self._key_paths.setdefault((endpoint.netloc, endpoint.path, main_response_key), {})
+        return flatten_response(payload, main_response_key, key_paths)
+
+    @staticmethod
+    def count_records(payload, main_response_key=None):
+        if isinstance(payload, list):
+            return len(payload)
         if main_response_key:
-            flattened = flatten_json.flatten(response.json())
-        else:
-            flattened = flatten_json.flatten(response.json())
+            return len(payload.get(main_response_key) or [])
+        return 1 if payload else 0
 
-        # Process the flattened result
-        cleaned_dict = {}
-        for key, value in flattened.items():
-            # Remove numeric parts and avoid main_response_key if present
-            new_key = "_".join(
-                [part for part in key.split("_") if not part.isdigit() and not part == main_response_key])
+    def paginate(self, api_session, endpoint, params=None, main_response_key=None, resume_state=None):
+        """
+        Yields the pages of a list endpoint following the connector's ``pagination`` options (see
+        Paginator), each with the state to resume from after it, None after the last page. Pages answered
+        with 304 Not Modified through the integration's HTTPCache are skipped, their rows were loaded by an
+        earlier run.
 
-            # If key already exists in cleaned_dict, append value to list
-            if new_key in cleaned_dict:
-                if isinstance(cleaned_dict[new_key], list):
-                    cleaned_dict[new_key].append(value)
-                else:
-                    cleaned_dict[new_key] = [cleaned_dict[new_key], value]
+        Args:
+            api_session (requests.Session): The authenticated session.
+            endpoint (str): The endpoint URL.
+            params (dict, optional): Query parameters sent with every page.
+            main_response_key (str, optional): The key holding the records of a page.
+            resume_state (dict, optional): The state stored after the last loaded page of an earlier run.
+
+        Yields:
+            Page: The flattened pages.
+        """
+        paginator = Paginator(**self.pagination)
+        state = paginator.resume(resume_state)
+        if resume_state and state == resume_state:
+            logging.info(f"Resuming {endpoint} from {state}")
+
+        if paginator.style == "page":
+            yield from self.paginate_pages(api_session, endpoint, paginator, state, params, main_response_key)
+            return
+
+        while True:
+            if paginator.style == "link" and state["position"]:
+                payload, response, key = self.request_list_page(api_session, state["position"])
             else:
-                cleaned_dict[new_key] = value
+                payload, response, key = self.request_list_page(api_session, endpoint,
+                                                                params=paginator.request_params(state, params))
 
-        return cleaned_dict
+            if payload is None:
+                entry = self.http_cache.revalidated(key)
+                record_count, position = entry["records"], entry["next"]
+            else:
+                record_count = self.count_records(payload, main_response_key)
+                position = paginator.next_position(state, payload, response, record_count)
+                if key:
+                    self.http_cache.store(key, response, record_count, position)
+
+            next_state = None
+            if position is not None and record_count:
+                next_state = {**state, "position": position}
+                if payload is not None:
+                    paginator.adapt(next_state, response)
+
+            if payload is not None:
+                yield Page(self.flatten_page(payload, endpoint, main_response_key, paginator.drop_keys), next_state)
+            if next_state is None:
+                return
+            state = next_state
+
+    def paginate_pages(self, api_session, endpoint, paginator, state, params=None, main_response_key=None):
+        """
+        Yields the pages of a page-number paginated endpoint, ``page_concurrency`` requests at a time.
+
+        Paging stops at the first page shorter than the page size, or at a page repeating the records of
+        the previous one: an endpoint ignoring the page parameter would otherwise be paged forever.
+        """
+        def fetch_page(page):
+            payload, response, key = self.request_list_page(
+                api_session, endpoint, params=paginator.request_params({**state, "position": page}, params))
+            if payload is None:
+                return page, None, self.http_cache.revalidated(key)["records"], None
+            record_count = self.count_records(payload, main_response_key)
+            if key:
+                self.http_cache.store(key, response, record_count, page + 1)
+            return page, payload, record_count, self.page_signature(payload, response, main_response_key)
+
+        pages = self.fetch_pages_in_parallel(fetch_page, first_page=state["position"],
+                                             is_last_page=lambda page: not page[2])
+        previous_signature = None
+        for page, payload, record_count, signature in pages:
+            if signature is not None and signature == previous_signature:
+                logging.warning(f"Page {page} of {endpoint} repeats the previous page, the endpoint ignores "
+                                f"{paginator.page_param}; stopping")
+                pages.close()
+                return
+            previous_signature = signature
+            last = record_count < state["page_size"]
+            if payload is not None:
+                yield Page(self.flatten_page(payload, endpoint, main_response_key, paginator.drop_keys),
+                           None if last else {**state, "position": page + 1})
+            if last:
+                pages.close()
+                return
+
+    def page_signature(self, payload, response, main_response_key=None):
+        """
+        Identifies the records of a page, by their ``id`` when every record has one, by the digest of the
+        response body otherwise, to tell a page repeating the previous one.
+        """
+        records = payload if isinstance(payload, list) else \
+            (payload.get(main_response_key) if main_response_key and isinstance(payload, dict) else None)
+        if records and all(isinstance(record, dict) and "id" in record for record in records):
+            return tuple(str(record["id"]) for record in records)
+        return hashlib.sha1(response.content).hexdigest()
+
+    def fetch_pages_in_parallel(self, fetch_page, first_page=1, step=1, concurrency=None, is_last_page=None):
+        """
+        Fetches the pages of a page-number or offset paginated endpoint with up to ``concurrency`` requests
+        in flight, and yields them in order. Pages are requested ahead in a sliding window, so at most
+        ``concurrency - 1`` requests past the last page are wasted.
+
+        Args:
+            fetch_page (callable): Fetches one page given its number or offset.
+            first_page (int): The number or offset of the first page.
+            step (int): The increment between pages, 1 for page numbers or the page size for offsets.
+            concurrency (int, optional): The number of requests in flight. Defaults to page_concurrency.
+            is_last_page (callable, optional): Tells from a page whether it is past the end, in which case
+                it is not yielded. Defaults to an empty page.
+
+        Yields:
+            The pages returned by fetch_page, in order.
+        """
+        concurrency = max(1, concurrency or self.page_concurrency)
+        is_last_page = is_last_page or (lambda page: not page)
+
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"openetl-{self.api}")
+        pending = deque(executor.submit(fetch_page, first_page + i * step) for i in range(concurrency))
+        next_page = first_page + concurrency * step
+        try:
+            while pending:
+                page = pending.popleft().result()
+                if is_last_page(page):
+                    break
+                yield page
+                pending.append(executor.submit(fetch_page, next_page))
+                next_page += step
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def return_final_df(self, responses) -> pd.DataFrame:
         """
@@ -130,6 +851,10 @@ class API:
         final_arr = []
         if isinstance(responses, list):
             final_arr.append(pd.json_normalize(responses))
+        elif isinstance(responses, dict) and responses and \
+                not any(isinstance(value, list) for value in responses.values()):
+            # a flattened page of a single record holds scalars, not columns
+            return pd.DataFrame([responses])
         else:
             return pd.DataFrame(responses)
         df = pd.concat(final_arr)
@@ -99,18 +99,59 @@ class DB(DatabaseUtils):
 
 
 
-    def read_table(self, table_name,schema_name="public", page_size=10000) -> pd.DataFrame:
+    def read_table_in_batches(self, table_name, key_column, schema_name="public", page_size=10000, last_value=None):
+        """
+        Read a table page by page using keyset (seek) pagination. Each page is fetched with
+        ``WHERE key_column > last_value ORDER BY key_column LIMIT page_size``, so the cost of a page stays
+        constant however deep into the table the read is.
+
+        Parameters:
+            table_name (str): The name of the table to read from.
+            key_column (str): A unique, indexed column to seek on.
+            schema_name (str, optional): The schema of the table. Defaults to "public".
+            page_size (int, optional): The number of rows to read per page. Defaults to 10000.
+            last_value (optional): Resume after this key value. Defaults to reading from the start.
+
+        Yields:
+            pandas.DataFrame: A page of rows, ordered by the key column.
+        """
+        table = Table(table_name, MetaData(), schema=schema_name, autoload_with=self.engine)
+        key = table.columns[key_column]
+
+        while True:
+            page_query = table.select().order_by(key).limit(page_size)
+            if last_value is not None:
+                page_query = page_query.where(key > last_value)
+
+            df = pd.read_sql(page_query, self.engine)
+            if df.empty:
+                break
+
+            yield df
+
+            if len(df) < page_size:
+                break
+            last_value = df[key_column].iloc[-1]
+            # numpy scalars are not bound by DB-API drivers, the next page is sought with the Python value
+            last_value = last_value.item() if hasattr(last_value, "item") else last_value
+
+    def read_table(self, table_name,schema_name="public", page_size=10000, key_column=None) -> pd.DataFrame:
         """
         Read data from a table in etl_batches.
 
         Parameters:
             table_name (str): The name of the table to read from.
             page_size (int, optional): The number of rows to read per page. Defaults to 10000.
+            key_column (str, optional): A unique column to page on with keyset pagination instead of offsets.
 
         Returns:
             pandas.DataFrame: The DataFrame containing the data from the table.
         """
         try:
+            if key_column:
+                dfs = list(self.read_table_in_batches(table_name, key_column, schema_name, page_size))
+                return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
             table_name = f"{schema_name}.{table_name}"
 
             metadata = MetaData()
@@ -0,0 +1,283 @@
+"""
+This module contains the in-process pandas engine, used instead of Spark for integrations small enough
+that starting a JVM costs more than moving the data.
+
+Classes:
+- BatchAccumulator: Regroups DataFrame pages of any size into batches of a fixed size.
+
+Functions:
+- estimate_row_count: Returns the planner's row estimate of a source table.
+- quote_source_table: Quotes a source table the way estimate_row_count looks it up.
+- read_query_in_chunks: Streams a query through a server-side cursor as DataFrame chunks.
+- to_records: Converts a DataFrame to row tuples for a DB-API write.
+- normalize_nulls: Turns null-like strings into nulls and fills nulls per dtype kind, column-wise.
+- write_dataframe: Appends or merges a DataFrame into a target table.
+"""
+import json
+import uuid
+from collections import deque
+
+import pandas as pd
+from sqlalchemy import text, inspect
+
+from openetl_utils.bulk_load_utils import get_bulk_loader
+
+
+class BatchAccumulator:
+    """
+    Regroups DataFrame pages of any size into batches of exactly ``batch_size`` rows. Pages are kept as
+    they are and concatenated once per emitted batch, so each row is copied once and memory stays around
+    one batch whatever the number of pages.
+
+    Pages carrying a ``resume_state`` attr pass it on to the batches: a batch carries the state after the
+    last page it completes, so resuming from it reads the rows of a page split across batches twice at most.
+
+    Usage:
+        accumulator = BatchAccumulator(batch_size)
+        for page in pages:
+            yield from accumulator.add(page)
+        yield from accumulator.flush()
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self._frames = deque()
+        self._rows = 0
+        self._resume_state = None
+        self._resumable = False
+
+    def __len__(self):
+        return self._rows
+
+    def add(self, df):
+        """
+        Adds a page and yields the batches it completes. Without a batch size the page is yielded as is.
+        """
+        if df.empty:
+            return
+        if not self.batch_size:
+            yield df.reset_index(drop=True)
+            return
+
+        self._frames.append(df)
+        self._rows += len(df)
+        while self._rows >= self.batch_size:
+            yield self._take(self.batch_size)
+
+    def flush(self):
+        """
+        Yields the rows left over as a last, smaller batch.
+        """
+        if self._rows:
+            yield self._take(self._rows)
+
+    def _take(self, count):
+        parts, needed = [], count
+        while needed:
+            frame = self._frames[0]
+            if len(frame) <= needed:
+                parts.append(self._frames.popleft())
+                needed -= len(frame)
+                if "resume_state" in frame.attrs:
+                    self._resume_state, self._resumable = frame.attrs["resume_state"], True
+            else:
+                parts.append(frame.iloc[:needed])
+                self._frames[0] = frame.iloc[needed:]
+                needed = 0
+        self._rows -= count
+        batch = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].reset_index(drop=True)
+        batch.attrs.pop("resume_state", None)
+        if self._resumable:
+            batch.attrs["resume_state"] = self._resume_state
+        return batch
+
+
+def estimate_row_count(engine, engine_name, table, schema=None):
+    """
+    Returns the row estimate the source database keeps for a table, without scanning it.
+
+    Args:
+        engine: The SQLAlchemy engine of the source database.
+        engine_name (str): The engine of the source connector.
+        table (str): The source table.
+        schema (str, optional): The schema of the table (PostgreSQL).
+
+    Returns:
+        int: The estimated number of rows, or None if the engine keeps no estimate or the table
+        was never analyzed. PostgreSQL before 14 reports 0 rows for a table never analyzed, and InnoDB
+        may too, so 0 is unknown as well.
+    """
+    if engine_name == "PostgreSQL":
+        query = text("SELECT c.reltuples FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                     "WHERE c.relname = :table AND n.nspname = :schema")
+        params = {"table": table, "schema": schema or "public"}
+    elif engine_name in ("MySQL", "MariaDB"):
+        query = text("SELECT table_rows FROM information_schema.tables "
+                     "WHERE table_schema = DATABASE() AND table_name = :table")
+        params = {"table": table}
+    else:
+        return None
+
+    with engine.connect() as con:
+        estimate = con.execute(query, params).scalar()
+    return int(estimate) if estimate is not None and estimate > 0 else None
+
+
+def quote_source_table(engine, engine_name, table, schema=None):
+    """
+    Quotes a source table for a query, qualified with the schema estimate_row_count looks it up in: the
+    schema (default public) on PostgreSQL, the database of the connection elsewhere.
+
+    Args:
+        engine: The SQLAlchemy engine of the source database.
+        engine_name (str): The engine of the source connector.
+        table (str): The source table.
+        schema (str, optional): The schema of the table (PostgreSQL).
+
+    Returns:
+        str: The quoted table name.
+    """
+    preparer = engine.dialect.identifier_preparer
+    if engine_name == "PostgreSQL":
+        return f"{preparer.quote_schema(schema or 'public')}.{preparer.quote(table)}"
+    return preparer.quote(table)
+
+
+def read_query_in_chunks(engine, query, chunk_size=100000):
+    """
+    Streams the result of a query as DataFrame chunks through a server-side cursor, so only one chunk
+    is held in memory.
+
+    Args:
+        engine: The SQLAlchemy engine of the source database.
+        query (str): The query to run.
+        chunk_size (int): The number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows.
+    """
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_size) as con:
+        for chunk in pd.read_sql(text(query), con, chunksize=chunk_size):
+            yield chunk
+
+
+def to_records(df):
+    """
+    Converts a DataFrame to row tuples for a DB-API write, with None for missing values and JSON for
+    nested values.
+    """
+    df = df.astype(object).where(df.notna(), None)
+    for column in df.columns:
+        if df[column].map(lambda value: isinstance(value, (dict, list))).any():
+            df[column] = df[column].map(lambda value: json.dumps(value, default=str)
+                                        if isinstance(value, (dict, list)) else value)
+    return df.itertuples(index=False, name=None)
+
+
+default_fill_values = {
+    "integer": 0,
+    "float": 0.0,
+    "boolean": False,
+    "string": "",
+    "datetime": pd.Timestamp("1970-01-01"),
+    "timedelta": pd.Timedelta(0),
+    "complex": 0j,
+    "bytes": b"",
+}
+
+_dtype_kinds = {"i": "integer", "u": "integer", "f": "float", "b": "boolean", "O": "string", "U": "string",
+                "M": "datetime", "m": "timedelta", "c": "complex", "S": "bytes"}
+
+
+def normalize_nulls(df, null_handling=None):
+    """
+    Normalizes the missing values of a batch in one vectorized pass per column: strings such as "NaN"
+    become nulls, then nulls are filled with a value per dtype kind.
+
+    Args:
+        df (pd.DataFrame): The batch.
+        null_handling (dict, optional): Per-integration options.
+            - mode (str): "fill" (default) fills nulls, "keep" only normalizes null-like strings so nulls
+              reach the target as NULL.
+            - fill_values (dict): Overrides of default_fill_values, keyed by dtype kind ("integer",
+              "float", "boolean", "string", "datetime", "timedelta", "complex", "bytes").
+            - null_strings (list): Strings treated as null, compared trimmed and case-insensitively.
+              Defaults to ["nan"].
+
+    Returns:
+        pd.DataFrame: The normalized batch.
+    """
+    null_handling = null_handling or {}
+    fill = null_handling.get("mode", "fill") == "fill"
+    fill_values = {**default_fill_values, **null_handling.get("fill_values", {})}
+    null_strings = [value.lower() for value in null_handling.get("null_strings", ["nan"])]
+
+    df = df.copy()
+    for column in df.columns:
+        series = df[column]
+        kind = _dtype_kinds.get(series.dtype.kind)
+
+        if kind == "string" and pd.api.types.infer_dtype(series, skipna=True) in ("string", "mixed", "mixed-integer",
+                                                                                   "mixed-integer-float"):
+            # .str yields NaN for non-string values, so mixed columns keep their other values
+            series = series.mask(series.str.strip().str.lower().isin(null_strings))
+
+        if fill and kind and series.hasnans:
+            value = fill_values[kind]
+            if kind == "datetime" and getattr(series.dtype, "tz", None) and value.tzinfo is None:
+                value = value.tz_localize(series.dtype.tz)
+            if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+                series = series.cat.add_categories([value])
+            series = series.fillna(value)
+
+        df[column] = series
+    return df
+
+
+def _append(df, table, db_class, engine_name, credentials, write_config):
+    loader = get_bulk_loader(engine_name) if write_config.get("method", "jdbc") == "bulk" else None
+    if loader:
+        loader(to_records(df), table=table, columns=list(df.columns), credentials=credentials)
+    else:
+        df.to_sql(table, db_class.engine, schema=credentials.get("schema"), if_exists="append", index=False,
+                  chunksize=write_config.get("batchsize", 10000))
+
+
+def write_dataframe(df, table, db_class, engine_name, credentials, write_config=None):
+    """
+    Writes a DataFrame to a target table through the target's SQLAlchemy engine: executemany, or COPY /
+    LOAD DATA / bulk copy with ``write_config.method`` "bulk" where the engine has a bulk loader. The table is created from the
+    DataFrame if it is missing. ``write_config.mode`` "merge" upserts through a staging table on
+    ``key_columns`` like the Spark writer.
+
+    Args:
+        df (pd.DataFrame): The rows to write.
+        table (str): The target table.
+        db_class (DatabaseUtils): The target database.
+        engine_name (str): The engine of the target connector.
+        credentials (dict): The target connection credentials.
+        write_config (dict, optional): The write options of the integration.
+    """
+    write_config = write_config or {}
+    schema = credentials.get("schema")
+
+    if not inspect(db_class.engine).has_table(table, schema=schema):
+        df.head(0).to_sql(table, db_class.engine, schema=schema, index=False)
+        if write_config.get("mode") == "merge":
+            qualified_table = f"{schema}.{table}" if schema else table
+            with db_class.engine.begin() as con:
+                con.execute(text(f"ALTER TABLE {qualified_table} "
+                                 f"ADD PRIMARY KEY ({', '.join(write_config['key_columns'])})"))
+
+    if write_config.get("mode", "append") != "merge":
+        _append(df, table, db_class, engine_name, credentials, write_config)
+        return
+
+    staging_table = f"{table}_openetl_stage_{uuid.uuid4().hex[:8]}"
+    db_class.create_staging_table(table, staging_table, engine_name, schema_name=schema)
+    try:
+        _append(df, staging_table, db_class, engine_name, credentials, write_config)
+        db_class.merge_staging_table(table, staging_table, list(df.columns), write_config["key_columns"], engine_name,
+                                     schema_name=schema)
+    finally:
+        db_class.drop_staging_table(staging_table, schema_name=schema)
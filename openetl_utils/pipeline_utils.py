@@ -16,20 +16,26 @@ import sys
 # sys.path.append(base_dir)
 import uuid
 
-import numpy as np
 import pandas as pd
 from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
 from pyspark.sql.types import *
 
-from sqlalchemy import MetaData, inspect
+from sqlalchemy import MetaData, inspect, text
 from sqlalchemy import Table, MetaData, Column, Integer, Float, String, Boolean, DateTime, BigInteger
+from sqlalchemy.schema import CreateTable
 
 import openetl_utils.connector_utils as con_utils
-from openetl_utils.enums import RunStatus, ConnectionType, ColumnActions
-from openetl_utils.__migrations__.batch import OpenETLBatch
+from openetl_utils.enums import RunStatus, ConnectionType, ColumnActions, ReadMode, IntegrationType, ExecutionEngine
+from openetl_utils.__migrations__.batch import OpenETLBatch, OpenETLWatermark, OpenETLSchema, OpenETLCheckpoint, \
+    OpenETLResponseCache
+from openetl_utils.main_api_class import HTTPCache
 from datetime import datetime
 import openetl_utils.spark_utils as sp_ut
 import openetl_utils.database_utils as database_utils
+import openetl_utils.cdc_utils as cdc_utils
+import openetl_utils.bulk_load_utils as bulk_load_utils
+import openetl_utils.pandas_utils as pandas_utils
 import logging
 
 from openetl_utils.cache import jdbc_connection_strings, jdbc_engine_drivers, jdbc_database_jars
@@ -39,14 +45,16 @@ logger = logging.getLogger(__name__)
 
 
 def read_data(connector_name, auth_values, auth_type, table, connection_type, schema="public", config={},
-              batch_size=None, logger=None):
-    main_df = pd.DataFrame()
+              batch_size=None, incremental=None, resume_state=None, http_cache=None, logger=None):
+    accumulator = pandas_utils.BatchAccumulator(batch_size)
 
     if connection_type.lower() not in [ConnectionType.DATABASE.value, ConnectionType.API.value]:
         raise ValueError(f"Unsupported connection type: {connection_type}")
 
     if connection_type.lower() == ConnectionType.API.value:
-        gen = con_utils.fetch_data_from_connector(connector_name, auth_values, auth_type, table, connection_type, schema=schema)
+        gen = con_utils.fetch_data_from_connector(connector_name, auth_values, auth_type, table, connection_type, schema=schema,
+                                                  incremental=incremental, properties=config.get("properties"),
+                                                  resume_state=resume_state, http_cache=http_cache)
         for i, data in enumerate(gen):
 
             logger.info("RUNNING PAGE NUMBER {}".format(i + 1))
@@ -62,22 +70,61 @@ def read_data(connector_name, auth_values, auth_type, table, connection_type, sc
             if not isinstance(data, pd.DataFrame):
                 raise ValueError("Fetched data must be a pandas DataFrame")
 
-            main_df = pd.concat([main_df, data], ignore_index=True)
+            if incremental and incremental.get("watermark") is not None:
+                data = filter_past_watermark(data, incremental["cursor_column"], incremental["watermark"])
 
-            while len(main_df) >= batch_size:
-                yield main_df.iloc[:batch_size].copy()
-                main_df = main_df.iloc[batch_size:].reset_index(drop=True)
+            yield from accumulator.add(data)
 
-    if batch_size and not main_df.empty:
-        logger.info(f"Yielding leftover {len(main_df)} rows")
-        yield main_df
+    if len(accumulator):
+        logger.info(f"Yielding leftover {len(accumulator)} rows")
+        yield from accumulator.flush()
 
 
 
 
+def filter_past_watermark(df, cursor_column, watermark):
+    """
+    Keeps the rows of a page whose cursor is past the watermark. Connectors that cannot push the
+    watermark into the API query return every record, so incremental runs filter them here.
+
+    Args:
+        df (pd.DataFrame): A page of records.
+        cursor_column (str): The column the watermark is kept on.
+        watermark (str): The stored watermark.
+
+    Returns:
+        pd.DataFrame: The rows past the watermark.
+    """
+    if cursor_column not in df.columns:
+        raise ValueError(f"Cursor column {cursor_column} not found in source data")
+
+    cursor = df[cursor_column]
+    if pd.api.types.is_numeric_dtype(cursor):
+        return df[cursor > float(watermark)]
+    if pd.api.types.is_datetime64_any_dtype(cursor):
+        return df[cursor > pd.Timestamp(watermark)]
+    return df[cursor.astype(str) > str(watermark)]
+
+
+def with_last_flag(gen):
+    """
+    Yields ``(item, is_last)`` pairs from a generator by looking one item ahead.
+    """
+    iterator = iter(gen)
+    try:
+        previous = next(iterator)
+    except StopIteration:
+        return
+    for item in iterator:
+        yield previous, False
+        previous = item
+    yield previous, True
+
+
 def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=None, job_type=None,
                  source_table=None, source_schema=None, target_table=None, target_schema=None,
-                 source_connection_details=None, target_connection_details=None, batch_size=100000, logger=None):
+                 source_connection_details=None, target_connection_details=None, batch_size=100000, read_config=None,
+                 write_config=None, spark_pool=None, logger=None):
     """
     A function that runs a pipeline with the specified configurations, particularly used in the airflow DAG to run a pipeline.
 
@@ -91,6 +138,24 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
         source_connection_details:
         target_connection_details:
         batch_size:
+        read_config (dict, optional): Source read options. ``mode`` is one of the ReadMode values and
+            defaults to partitioned for database sources; ``partition_column``, ``num_partitions`` and
+            ``fetchsize`` tune the partitioned read, ``key_column`` is required by the keyset read. Incremental
+            keyset reads seek on the cursor column and ``key_column``, a unique column breaking its ties.
+            ``cursor_column`` is required by incremental integrations. CDC integrations take
+            ``key_columns`` (defaults to the source primary key), ``slot_name`` and ``server_id``
+            (MySQL, defaults to an id derived from the integration, see cdc_utils.replica_server_id).
+            ``engine`` is one of the ExecutionEngine values and defaults to "spark"; "auto" runs database
+            sources whose row estimate is under ``in_process_max_rows`` (default 100000) in process with pandas.
+            ``null_handling`` configures how API batches treat missing values, see
+            pandas_utils.normalize_nulls. ``properties`` limits API sources that support it to these fields.
+        write_config (dict, optional): Target write options, ``method`` ("bulk" or "jdbc") and the JDBC
+            options accepted by spark_utils.build_jdbc_write_options. Defaults to JDBC, "bulk" loads
+            through the native bulk load of PostgreSQL, MySQL/MariaDB (needs ``local_infile = ON``) and SQL
+            Server targets. ``mode`` "merge" upserts each batch on ``key_columns`` through a
+            staging table instead of appending it.
+        spark_pool (SparkSessionPool, optional): Borrow the Spark session from a long-lived pool instead
+            of starting a new Spark application for the run.
         source_table (str): The name of the source table.
         source_schema (str): The schema of the source table.
         spark_config (dict, optional): The Spark configuration. Defaults to None.
@@ -108,10 +173,18 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
     run_status = None
     row_count = 0
     run_id = uuid.uuid4()
+    read_config = read_config or {}
     try:
 
         logger.info("RUNNING PIPELINE")
 
+        incremental = job_type == IntegrationType.INCREMENTAL.value
+        cdc = job_type == IntegrationType.CDC.value
+        cursor_column = read_config.get("cursor_column")
+        if incremental and not cursor_column:
+            raise ValueError("read_config.cursor_column is required for incremental integrations")
+        sp_ut.validate_write_config(write_config)
+
         target_credentials = target_connection_details['connection_credentials']
         source_credentials = source_connection_details['connection_credentials']
 
@@ -132,6 +205,26 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
             db.engine, db.session = con_utils.create_db_connector_engine(target_connection_details['connector_name'], **target_credentials)
 
             db.create_table_from_base(base=OpenETLBatch)
+            db.create_table_from_base(base=OpenETLWatermark)
+            db.create_table_from_base(base=OpenETLSchema)
+            db.create_table_from_base(base=OpenETLCheckpoint)
+            db.create_table_from_base(base=OpenETLResponseCache)
+            watermark = db.get_watermark(job_id, cursor_column) if incremental else None
+            batch_type = job_type if incremental or cdc else "full"
+
+            if not cdc and use_in_process_engine(read_config, source_connection_details, source_engine, source_table,
+                                                 source_schema, logger):
+                run_status = run_in_process_source(db=db, source_connection_details=source_connection_details,
+                                                   source_engine=source_engine,
+                                                   source_table=source_table, source_schema=source_schema,
+                                                   target_table=target_table, target_engine=engine,
+                                                   target_credentials=target_credentials, job_id=job_id,
+                                                   job_name=job_name, run_id=run_id, batch_type=batch_type,
+                                                   incremental=incremental, cursor_column=cursor_column,
+                                                   watermark=watermark, batch_size=batch_size,
+                                                   read_config=read_config, write_config=write_config,
+                                                   logger=logger)
+                return
 
             logger.info("PRINTING OUT JARS")
             logger.info(jar)
@@ -139,33 +232,102 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
             spark_class = sp_ut.SparkConnection(spark_configuration=spark_config,
                                                 hadoop_configuration=hadoop_config,
                                                 jar=jars,
-                                                connection_string=con_string)
+                                                connection_string=con_string,
+                                                pool=spark_pool)
             spark_session = spark_class.initializeSpark()
             spark_config["spark.app.name"] = spark_config[
                                                  "spark.app.name"] + f"_read_source_table{source_table}"
 
-            if source_connection_details["connection_type"].lower() == ConnectionType.DATABASE.value:
-
-                connection_details_upper = {key.upper(): value for key, value in connection_details.items()}
-                spark_conn_url = {"url": jdbc_connection_strings[engine].format(**connection_details_upper),
+            if cdc:
+                if source_connection_details["connection_type"].lower() != ConnectionType.DATABASE.value:
+                    raise NotImplementedError("CDC integrations are only supported for database sources")
+
+                run_status = run_cdc_source(db=db, spark_class=spark_class, spark_session=spark_session,
+                                            source_connection_details=source_connection_details,
+                                            source_engine=source_engine, source_table=source_table,
+                                            source_schema=source_schema, target_table=target_table,
+                                            target_schema=target_credentials.get("schema", "public"),
+                                            target_connection_details=target_connection_details,
+                                            write_config=write_config,
+                                            con_string=con_string, driver=driver, job_id=job_id, job_name=job_name,
+                                            run_id=run_id, read_config=read_config, batch_size=batch_size,
+                                            logger=logger)
+
+            elif source_connection_details["connection_type"].lower() == ConnectionType.DATABASE.value:
+
+                source_connection_details_upper = {key.upper(): value for key, value in source_credentials.items()}
+                spark_conn_url = {"url": jdbc_connection_strings[source_engine].format(**source_connection_details_upper),
                                   "dbtable": source_table,
-                                  "driver": jdbc_engine_drivers[engine]}
+                                  "driver": jdbc_engine_drivers[source_engine]}
+
+                read_mode = ReadMode(read_config.get("mode", ReadMode.PARTITIONED.value))
+                upper_watermark = None
+                key_column = read_config.get("key_column")
+                if incremental:
+                    # Batches must either cover the whole run or be ordered on the cursor, otherwise an
+                    # advanced watermark could skip rows of batches that were not written yet.
+                    if read_mode == ReadMode.PAGINATED:
+                        raise ValueError("Incremental integrations need a partitioned or a keyset read")
+                    if read_mode == ReadMode.KEYSET:
+                        # The cursor is rarely unique, rows sharing its value at a batch boundary would be
+                        # skipped by a seek on the cursor alone
+                        if not key_column or key_column == cursor_column:
+                            raise ValueError("Incremental keyset reads need read_config.key_column, a unique "
+                                             "column breaking ties of the cursor column")
+                        key_column = [cursor_column, key_column]
+
+                    _, upper_watermark = spark_class.get_partition_bounds(spark_conn_url, cursor_column, widen=False)
+                    logger.info(f"Extracting {cursor_column} in ({watermark}, {upper_watermark}]")
+                    spark_conn_url["dbtable"] = sp_ut.build_incremental_query(source_table, cursor_column,
+                                                                              watermark, upper_watermark)
+
+                if read_mode == ReadMode.PARTITIONED:
+                    gen = spark_class.read_via_spark_partitioned(spark_conn_url,
+                                                                 partition_column=read_config.get("partition_column"),
+                                                                 num_partitions=read_config.get("num_partitions"),
+                                                                 fetchsize=read_config.get("fetchsize", 10000))
+                elif read_mode == ReadMode.KEYSET:
+                    if not key_column:
+                        raise ValueError("read_config.key_column is required for keyset reads")
+                    gen = spark_class.read_via_spark_keyset(spark_conn_url,
+                                                            key_column=key_column,
+                                                            batch_size=batch_size,
+                                                            engine=source_engine,
+                                                            fetchsize=read_config.get("fetchsize", 10000))
+                else:
+                    gen = spark_class.read_via_spark(spark_conn_url, batch_size=batch_size)
 
-                for df in spark_class.read_via_spark(spark_conn_url):
+                for df in gen:
 
-                    if not df.empty:
-                        batch_id = create_batch(db, job_id, job_name, logger)
+                    if not df.isEmpty():
+                        batch_id = create_batch(db, job_id, job_name, logger, run_id, batch_type)
 
                         row_count = df.count()
+                        batch_watermark = None
+                        if incremental and (read_mode == ReadMode.PARTITIONED or row_count < batch_size):
+                            batch_watermark = upper_watermark
+                        elif incremental:
+                            # The rows sharing the last cursor value of a full keyset batch may continue in
+                            # the next batch, the watermark only moves past the values the batch completes
+                            last_cursor = df.agg(F.max(cursor_column)).collect()[0][0]
+                            batch_watermark = df.filter(F.col(cursor_column) < last_cursor) \
+                                .agg(F.max(cursor_column)).collect()[0][0]
                         run_status = RunStatus.SUCCESS if run_pipeline_target(df=df, integration_id=job_id,
                                                                               spark_class=spark_class,
                                                                               con_string=con_string,
                                                                               target_table=target_table, job_id=job_id,
                                                                               job_name=job_name, driver=driver,
                                                                               spark_session=spark_session, db_class=db,
-                                                                              logger=logger) else RunStatus.FAILED
+                                                                              logger=logger,
+                                                                              watermark=make_watermark(cursor_column, batch_watermark, run_id),
+                                                                              target_connection_details=target_connection_details,
+                                                                              write_config=write_config) else RunStatus.FAILED
 
             elif source_connection_details["connection_type"].lower() == ConnectionType.API.value:
+                resume_state = db.get_checkpoint(job_id, source_table)
+                if resume_state:
+                    logger.info(f"Resuming {source_table} from checkpoint {resume_state}")
+                http_cache = HTTPCache(db.get_response_cache(job_id))
                 gen = read_data(connector_name=source_connection_details['connector_name'],
                                     auth_values=source_credentials,
                                     auth_type=source_connection_details['auth_type'],
@@ -173,40 +335,30 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
                                     connection_type=source_connection_details['connection_type'],
                                     schema=source_schema,
                                     batch_size=batch_size,
+                                    incremental={"cursor_column": cursor_column, "watermark": watermark} if incremental else None,
+                                    resume_state=resume_state,
+                                    http_cache=http_cache,
+                                    config=read_config,
                                     logger=logger)
-                for df in gen:
+                run_watermark = None
+                checkpoint = None
+                # API pages are not ordered on the cursor, so the watermark only advances with the last batch
+                for df, is_last in with_last_flag(gen):
                     row_count = 0
+                    checkpoint = make_checkpoint(source_table, df, run_id)
+
+                    if incremental and not df.empty:
+                        batch_max = df[cursor_column].max()
+                        run_watermark = batch_max if run_watermark is None else max(run_watermark, batch_max)
 
                     if not df.empty:
-                        batch_id = create_batch(db, job_id, job_name, logger, run_id)
+                        batch_id = create_batch(db, job_id, job_name, logger, run_id, batch_type)
 
 
                         logger.info(df)
 
-                        df = coerce_inferable_columns(df, spark_session, logger)
-                        logger.info("DF AFTER INFERABLE CONVERSION")
-                        logger.info(df)
-                        logger.info(df.dtypes)
-
                         logger.info("Replacing null values")
-                        df = df.fillna(np.nan)  # optional, Pandas already treats NaNs as NaNs
-                        fill_map = {
-                            'int': 0,
-                            'float': 0.0,
-                            'bool': False,
-                            'string': '',
-                            'object': '',
-                            'datetime': pd.Timestamp('1970-01-01'),
-                            'timedelta': pd.Timedelta(0),
-                            'category': '',
-                            'bytes': b'',
-                            'complex': 0j,
-                        }
-
-                        df = df.fillna({
-                            col: next((v for k, v in fill_map.items() if k in str(df[col].dtype).lower()), '')
-                            for col in df.columns
-                        })
+                        df = pandas_utils.normalize_nulls(df, read_config.get("null_handling"))
 
                         logger.info("DF AFTER REPLACING NULL VALUES")
                         logger.info(df)
@@ -215,7 +367,10 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
                         df.columns = [col.replace('.', '_').replace(' ', '_') for col in df.columns]
                         logger.info("Sanitized column names: " + str(df.columns))
 
-                        df = spark_session.createDataFrame(df)
+                        df = pandas_to_spark_registered(df=df, spark_session=spark_session, db=db, job_id=job_id,
+                                                        source_table=source_table, target_table=target_table,
+                                                        target_schema=target_credentials['schema'], run_id=run_id,
+                                                        logger=logger)
                         logger.info("DF AFTER CONVERSION TO SPARK DF")
                         logger.info(df)
                         logger.info(df.dtypes)
@@ -229,10 +384,24 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
                         run_status = RunStatus.SUCCESS if run_pipeline_target(df=df, integration_id=job_id, spark_class=spark_class,
                                             con_string=con_string,
                                             target_table=target_table, job_id=job_id, job_name=job_name, driver=driver,
-                                            spark_session=spark_session, db_class=db, logger=logger) else RunStatus.FAILED
+                                            spark_session=spark_session, db_class=db, logger=logger,
+                                            watermark=make_watermark(cursor_column, run_watermark if is_last else None, run_id),
+                                            checkpoint=checkpoint,
+                                            target_connection_details=target_connection_details,
+                                            write_config=write_config) else RunStatus.FAILED
+
+                # The source was read in full, the next run starts over
+                if resume_state or checkpoint:
+                    db.set_checkpoint(job_id, source_table, None, run_id=str(run_id))
+                # Every page is written, so the next run can skip those that did not change
+                db.set_response_cache(job_id, http_cache.in_use, run_id=str(run_id))
+                run_status = run_status or RunStatus.SUCCESS
 
             elif source_connection_details['connection_type'].lower() == ConnectionType.STORAGE.value:
 
+                if incremental:
+                    raise NotImplementedError("Incremental integrations are not supported for storage sources")
+
                 spark_workflow = con_utils.get_spark_workflow_for_storage(
                     connector_name=source_connection_details['connector_name'],
                     connection_type=source_connection_details['connection_type'],
@@ -240,8 +409,7 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
                     auth_params=source_credentials
                 )
 
-                for k, v in spark_workflow["hadoop_config"].items():
-                    spark_session._jsc.hadoopConfiguration().set(k, v)
+                spark_class.set_hadoop_configuration(spark_workflow["hadoop_config"])
 
                 spark_connection_details = {k: v for k, v in spark_workflow.items() if k not in ["hadoop_config", "read_path"]}
                 source_format = spark_workflow["format"].replace('.', '')
@@ -267,7 +435,9 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
                         driver=driver,
                         spark_session=spark_session,
                         db_class=db,
-                        logger=logger
+                        logger=logger,
+                        target_connection_details=target_connection_details,
+                        write_config=write_config
                     ) else RunStatus.FAILED
 
         elif target_connection_details['connection_type'].lower() == ConnectionType.API.value:
@@ -290,6 +460,227 @@ def run_pipeline(spark_config=None, hadoop_config=None, job_name=None, job_id=No
 
 
 
+def run_cdc_source(db, spark_class, spark_session, source_connection_details, source_engine, source_table,
+                   source_schema, target_table, target_schema, target_connection_details, con_string, driver, job_id,
+                   job_name, run_id, read_config, batch_size, logger, write_config=None):
+    """
+    Runs a change-data-capture integration. The first run records the current log position and loads a
+    snapshot of the source table. Later runs read the change log from the stored position and apply
+    each micro-batch to the target by deleting the changed keys and appending their latest image.
+
+    The log position is stored in the watermark table and committed with each batch. A batch that fails
+    after its deletes is read again on the next run, which converges since applying a batch is idempotent.
+
+    Returns:
+        RunStatus: The status of the run.
+    """
+    global row_count, batch_id
+    run_status = RunStatus.SUCCESS
+    source_credentials = source_connection_details['connection_credentials']
+    source_db_engine, _ = con_utils.create_db_connector_engine(source_connection_details['connector_name'],
+                                                               **source_credentials)
+
+    key_columns = read_config.get("key_columns") or \
+        inspect(source_db_engine).get_pk_constraint(source_table, schema=source_schema)["constrained_columns"]
+    if not key_columns:
+        raise ValueError(f"{source_table} has no primary key, set read_config.key_columns for CDC")
+
+    reader = cdc_utils.get_cdc_reader(
+        source_engine,
+        engine=source_db_engine,
+        credentials=source_credentials,
+        table=source_table,
+        schema=source_schema if source_engine == "PostgreSQL" else source_credentials["database"],
+        slot_name=read_config.get("slot_name", f"openetl_{str(job_id).replace('-', '_')}"),
+        server_id=read_config.get("server_id") or cdc_utils.replica_server_id(job_id),
+    )
+    position = db.get_watermark(job_id, reader.position_column)
+
+    if position is None:
+        # Record the position before the snapshot, changes made while it runs are replayed on the next run
+        position = reader.current_position()
+        logger.info(f"Loading initial snapshot of {source_table} at {reader.position_column} {position}")
+
+        source_connection_details_upper = {key.upper(): value for key, value in source_credentials.items()}
+        spark_conn_url = {"url": jdbc_connection_strings[source_engine].format(**source_connection_details_upper),
+                          "dbtable": source_table,
+                          "driver": jdbc_engine_drivers[source_engine]}
+
+        loaded = False
+        for df in spark_class.read_via_spark_partitioned(spark_conn_url, fetchsize=read_config.get("fetchsize", 10000)):
+            batch_id = create_batch(db, job_id, job_name, logger, run_id, IntegrationType.CDC.value)
+            row_count = df.count()
+            loaded = True
+            run_pipeline_target(df=df, integration_id=job_id, spark_class=spark_class, con_string=con_string,
+                                target_table=target_table, job_id=job_id, job_name=job_name, driver=driver,
+                                spark_session=spark_session, db_class=db, logger=logger,
+                                watermark=make_watermark(reader.position_column, position, run_id),
+                                target_connection_details=target_connection_details,
+                                write_config=write_config)
+        if not loaded:
+            db.set_watermark(job_id, reader.position_column, position, run_id=str(run_id))
+        return run_status
+
+    target_fields = spark_session.read.format("jdbc") \
+        .options(url=con_string, dbtable=target_table, driver=driver).load().schema.fields
+
+    for events, position in reader.read_changes(position, batch_size=batch_size):
+        if not events:
+            # Nothing to apply, but the log moved on, keep the stored position ahead of the log purge
+            db.set_watermark(job_id, reader.position_column, position, run_id=str(run_id))
+            continue
+
+        upserts, keys = cdc_utils.compact_changes(events, key_columns)
+        batch_id = create_batch(db, job_id, job_name, logger, run_id, IntegrationType.CDC.value)
+        logger.info(f"Applying {len(events)} changes to {target_table}: {len(upserts)} upserts, "
+                    f"{len(keys) - len(upserts)} deletes")
+
+        db.delete_rows_by_keys(target_table, key_columns, keys, schema_name=target_schema)
+        row_count = len(upserts)
+        watermark = make_watermark(reader.position_column, position, run_id)
+
+        if not upserts:
+            complete_batch(db, batch_id, job_id, row_count, logger, watermark=watermark)
+            continue
+
+        # Build the batch as strings and cast to the target types, change logs carry loosely typed values
+        fields = [field for field in target_fields if field.name in upserts[0]]
+        rows = [tuple(None if row.get(field.name) is None else str(row.get(field.name)) for field in fields)
+                for row in upserts]
+        df = spark_session.createDataFrame(rows, StructType([StructField(field.name, StringType()) for field in fields]))
+        df = df.select([F.col(field.name).cast(field.dataType) for field in fields])
+
+        run_status = RunStatus.SUCCESS if run_pipeline_target(df=df, integration_id=job_id, spark_class=spark_class,
+                                                              con_string=con_string, target_table=target_table,
+                                                              job_id=job_id, job_name=job_name, driver=driver,
+                                                              spark_session=spark_session, db_class=db,
+                                                              logger=logger, watermark=watermark,
+                                                              target_connection_details=target_connection_details,
+                                                              write_config=write_config) else RunStatus.FAILED
+
+    return run_status
+
+
+def use_in_process_engine(read_config, source_connection_details, source_engine, source_table, source_schema,
+                          logger):
+    """
+    Decides whether a run uses the in-process pandas engine instead of Spark, from ``read_config.engine``
+    or, when it is "auto", from the row estimate of a database source. Runs use Spark unless the engine is
+    set, a missing estimate is not taken as a small table.
+
+    Returns:
+        bool: True to run in process.
+    """
+    engine = read_config.get("engine", ExecutionEngine.SPARK.value)
+    if engine == ExecutionEngine.PANDAS.value:
+        return True
+    if engine == ExecutionEngine.SPARK.value or \
+            source_connection_details["connection_type"].lower() != ConnectionType.DATABASE.value:
+        return False
+
+    source_db_engine, _ = con_utils.create_db_connector_engine(source_connection_details['connector_name'],
+                                                               **source_connection_details['connection_credentials'])
+    try:
+        estimate = pandas_utils.estimate_row_count(source_db_engine, source_engine, source_table, source_schema)
+    except Exception as e:
+        logger.warning(f"Unable to estimate the size of {source_table}: {e}")
+        return False
+
+    max_rows = read_config.get("in_process_max_rows", 100000)
+    logger.info(f"Estimated {estimate} rows in {source_table}, in-process limit is {max_rows}")
+    return estimate is not None and estimate < max_rows
+
+
+def run_in_process_source(db, source_connection_details, source_engine, source_table, source_schema, target_table,
+                          target_engine, target_credentials, job_id, job_name, run_id, batch_type, incremental,
+                          cursor_column, watermark, batch_size, read_config, write_config, logger):
+    """
+    Runs an integration in process with pandas. Database sources are streamed through a server-side
+    cursor, API sources through their page generators, and batches are written with executemany or, with
+    ``write_config.method`` "bulk", the bulk loader of the target's SQLAlchemy engine.
+
+    Incremental runs only commit the new watermark with the last batch. API sources that support resuming
+    commit a checkpoint with each batch and resume from it after a failed run. API list pages not modified
+    since the last successful run are skipped.
+
+    Returns:
+        RunStatus: The status of the run.
+    """
+    global row_count, batch_id
+    logger.info("RUNNING PIPELINE IN PROCESS")
+    source_credentials = source_connection_details['connection_credentials']
+    run_watermark = None
+    resume_state = None
+    http_cache = None
+
+    if source_connection_details["connection_type"].lower() == ConnectionType.DATABASE.value:
+        source_db_engine, _ = con_utils.create_db_connector_engine(source_connection_details['connector_name'],
+                                                                   **source_credentials)
+        # The same table the row estimate was looked up for, see use_in_process_engine
+        quoted_table = pandas_utils.quote_source_table(source_db_engine, source_engine, source_table, source_schema)
+        query_table = quoted_table
+        if incremental:
+            quoted_cursor = source_db_engine.dialect.identifier_preparer.quote(cursor_column)
+            with source_db_engine.connect() as con:
+                run_watermark = con.execute(text(f"SELECT MAX({quoted_cursor}) FROM {quoted_table}")).scalar()
+            query_table = sp_ut.build_incremental_query(quoted_table, quoted_cursor, watermark, run_watermark)
+        gen = pandas_utils.read_query_in_chunks(source_db_engine, f"SELECT * FROM {query_table}", batch_size)
+
+    elif source_connection_details["connection_type"].lower() == ConnectionType.API.value:
+        resume_state = db.get_checkpoint(job_id, source_table)
+        if resume_state:
+            logger.info(f"Resuming {source_table} from checkpoint {resume_state}")
+        http_cache = HTTPCache(db.get_response_cache(job_id))
+        gen = read_data(connector_name=source_connection_details['connector_name'],
+                        auth_values=source_credentials,
+                        auth_type=source_connection_details['auth_type'],
+                        table=source_table,
+                        connection_type=source_connection_details['connection_type'],
+                        schema=source_schema,
+                        batch_size=batch_size,
+                        incremental={"cursor_column": cursor_column, "watermark": watermark} if incremental else None,
+                        resume_state=resume_state,
+                        http_cache=http_cache,
+                        config=read_config,
+                        logger=logger)
+    else:
+        raise NotImplementedError("The in-process engine does not support storage sources")
+
+    checkpoint = None
+    for df, is_last in with_last_flag(gen):
+        if df.empty:
+            continue
+        checkpoint = make_checkpoint(source_table, df, run_id)
+
+        if incremental and source_connection_details["connection_type"].lower() == ConnectionType.API.value:
+            batch_max = df[cursor_column].max()
+            run_watermark = batch_max if run_watermark is None else max(run_watermark, batch_max)
+
+        if source_connection_details["connection_type"].lower() == ConnectionType.API.value:
+            df = pandas_utils.normalize_nulls(df, read_config.get("null_handling"))
+
+        df.columns = [str(col).replace('.', '_').replace(' ', '_') for col in df.columns]
+        batch_id = create_batch(db, job_id, job_name, logger, run_id, batch_type)
+        row_count = len(df)
+
+        logger.info(f"Writing {row_count} rows to target table: {target_table}")
+        pandas_utils.write_dataframe(df, target_table, db, target_engine, target_credentials, write_config)
+
+        complete_batch(db, batch_id, job_id, row_count, logger,
+                       watermark=make_watermark(cursor_column, run_watermark if is_last else None, run_id),
+                       checkpoint=checkpoint)
+        update_integration_row_in_db(job_id, row_count)
+
+    # The source was read in full, the next run starts over
+    if resume_state or checkpoint:
+        db.set_checkpoint(job_id, source_table, None, run_id=str(run_id))
+    # Every page is written, so the next run can skip those that did not change
+    if http_cache is not None:
+        db.set_response_cache(job_id, http_cache.in_use, run_id=str(run_id))
+
+    return RunStatus.SUCCESS
+
+
 def update_integration_in_db(celery_task_id, integration, error_message, run_status, start_date):
     db = database_utils.DatabaseUtils(**database_utils.get_open_etl_document_connection_details())
     db.update_integration(record_id=integration, is_running=False)
@@ -304,22 +695,50 @@ def update_integration_row_in_db(integration, row_count):
 
 
 
-def create_batch(db_class, job_id, job_name, logger, run_id):
+def create_batch(db_class, job_id, job_name, logger, run_id, batch_type="full"):
     batch_id = str(uuid.uuid4())
     logger.info(f"Creating batch ID: {batch_id}")
     db_class.insert_openetl_batch(
         batch_id=batch_id,
         integration_id=str(job_id),
         start_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        batch_type="full",
+        batch_type=batch_type,
         batch_status=RunStatus.RUNNING,
         integration_name=job_name,
         run_id=str(run_id)
     )
     return batch_id
 
-def complete_batch(db_class, batch_id, integration_id, batch_df_size, logger, batch_status=RunStatus.SUCCESS):
+def make_watermark(cursor_column, value, run_id):
+    """
+    Builds the watermark a batch advances on completion, or None if the batch does not advance it.
+    """
+    if value is None:
+        return None
+    return {"cursor_column": cursor_column, "value": str(value), "run_id": str(run_id)}
+
+
+def make_checkpoint(source_table, df, run_id):
+    """
+    Builds the checkpoint a batch of a resumable API source commits on completion, or None if the source
+    does not support resuming.
+    """
+    if "resume_state" not in df.attrs:
+        return None
+    return {"source_table": source_table, "state": df.attrs["resume_state"], "run_id": str(run_id)}
+
+
+def complete_batch(db_class, batch_id, integration_id, batch_df_size, logger, batch_status=RunStatus.SUCCESS,
+                   watermark=None, checkpoint=None):
     logger.info(f"Completing batch ID: {batch_id}")
+    if watermark and batch_status == RunStatus.SUCCESS:
+        # Staged on the same session, so it is committed together with the batch status
+        logger.info(f"Advancing watermark on {watermark['cursor_column']} to {watermark['value']}")
+        db_class.set_watermark(integration_id=integration_id, cursor_column=watermark["cursor_column"],
+                               watermark_value=watermark["value"], run_id=watermark["run_id"], commit=False)
+    if checkpoint and batch_status == RunStatus.SUCCESS:
+        db_class.set_checkpoint(integration_id=integration_id, source_table=checkpoint["source_table"],
+                                state=checkpoint["state"], run_id=checkpoint["run_id"], commit=False)
     db_class.update_openetl_batch(
         batch_id=batch_id,
         integration_id=integration_id,
@@ -330,18 +749,50 @@ def complete_batch(db_class, batch_id, integration_id, batch_df_size, logger, ba
 
 
 def run_pipeline_target(df, integration_id, spark_class, job_id, job_name, con_string, target_table, driver,
-                        spark_session, db_class, logger):
+                        spark_session, db_class, logger, watermark=None, target_connection_details=None,
+                        write_config=None, checkpoint=None):
     logger.info("Initializing writing to target")
     logger.info(df.limit(2))
     logger.info(df.dtypes)
     logger.debug(df.show(truncate=False))
 
-    logger.info(f"Writing full DataFrame to target table: {target_table}")
-    success, message = spark_class.write_via_spark(df, conn_string=con_string, table=target_table, driver=driver)
+    target_engine = con_utils.get_connector_engine(target_connection_details['connector_name']) \
+        if target_connection_details else None
+
+    write_config = write_config or {}
+
+    if write_config.get("mode", "append") == "merge":
+        key_columns = write_config["key_columns"]
+        target_schema = target_connection_details['connection_credentials'].get("schema")
+        create_table_from_spark_df(df=df, engine=db_class.engine, table_name=target_table, schema_name=target_schema,
+                                   primary_key_columns=key_columns)
+
+        # Load the batch next to the target and upsert it in one statement
+        staging_table = f"{target_table}_openetl_stage_{uuid.uuid4().hex[:8]}"
+        db_class.create_staging_table(target_table, staging_table, target_engine, schema_name=target_schema)
+        try:
+            success, message = write_to_target(df=df, table=staging_table, spark_class=spark_class,
+                                               con_string=con_string, driver=driver, db_class=db_class,
+                                               target_engine=target_engine,
+                                               target_connection_details=target_connection_details,
+                                               write_config=write_config, logger=logger)
+            if success:
+                logger.info(f"Merging {staging_table} into {target_table} on {key_columns}")
+                db_class.merge_staging_table(target_table, staging_table, df.columns, key_columns, target_engine,
+                                             schema_name=target_schema)
+        finally:
+            db_class.drop_staging_table(staging_table, schema_name=target_schema)
+    else:
+        success, message = write_to_target(df=df, table=target_table, spark_class=spark_class,
+                                           con_string=con_string, driver=driver, db_class=db_class,
+                                           target_engine=target_engine,
+                                           target_connection_details=target_connection_details,
+                                           write_config=write_config, logger=logger)
 
     if success:
         logger.info("Data written successfully. Updating batch status.")
-        complete_batch(db_class, batch_id, integration_id, row_count, logger)
+        complete_batch(db_class, batch_id, integration_id, row_count, logger, watermark=watermark,
+                       checkpoint=checkpoint)
         update_integration_row_in_db(integration_id, row_count)
     else:
         logger.error(message)
@@ -349,29 +800,99 @@ def run_pipeline_target(df, integration_id, spark_class, job_id, job_name, con_s
 
     return success
 
-def coerce_inferable_columns(df: pd.DataFrame, spark_session: SparkSession, logger):
+
+def write_to_target(df, table, spark_class, con_string, driver, db_class, target_engine, target_connection_details,
+                    write_config, logger):
     """
-    Attempt to create a Spark DataFrame from each column individually to detect schema inference issues.
-    If inference fails for any column, it is cast to string to avoid Spark type merge errors.
-    Args:
-        df (pd.DataFrame): The input Pandas DataFrame.
-        spark_session (SparkSession): Active Spark session for testing type inference.
-        logger: Logger instance for warning messages.
+    Appends a DataFrame to a target table through JDBC inserts, or through the native bulk load of the
+    target engine when ``write_config.method`` is "bulk" and the engine has one.
+
     Returns:
-        pd.DataFrame: Cleaned DataFrame with problematic columns coerced to string.
+        tuple: (success, message)
     """
-    for col in df.columns:
-        try:
-            _ = spark_session.createDataFrame(df[[col]])
-        except Exception as e:
-            logger.warning(f"Unable to infer type for column {col}: {e}")
-            df[col] = df[col].astype(str)
-    return df
+    if write_config.get("method", "jdbc") == "bulk" and target_engine in bulk_load_utils.bulk_loaders:
+        # Bulk loads do not create the table like a JDBC append does
+        target_credentials = target_connection_details['connection_credentials']
+        create_table_from_spark_df(df=df, engine=db_class.engine, table_name=table,
+                                   schema_name=target_credentials.get("schema"))
+
+        logger.info(f"Bulk loading full DataFrame into target table: {table}")
+        return spark_class.write_via_bulk_load(df, engine=target_engine, credentials=target_credentials, table=table,
+                                               num_partitions=write_config.get("numPartitions"))
+
+    options = sp_ut.build_jdbc_write_options(target_engine, write_config)
+    # The table is created in the schema of the target, see create_table_from_spark_df
+    table = database_utils.qualify_table_name(
+        table, target_connection_details['connection_credentials'].get("schema") if target_connection_details else None)
+    logger.info(f"Writing full DataFrame to target table: {table} with options {options}")
+    return spark_class.write_via_spark(df, conn_string=con_string, table=table, driver=driver, options=options)
 
 
-def map_spark_type_to_sqlalchemy(spark_type, max_len=None):
+def pandas_to_spark_registered(df, spark_session, db, job_id, source_table, target_table, target_schema, run_id,
+                               logger):
+    """
+    Converts an API batch to Spark with the schema registered for its source table, so only columns not
+    seen before are inferred. New columns are added to the target table and registered as a new schema
+    version. A batch that no longer fits the registered types is inferred again and the conflicting
+    columns are widened to strings, in the registry and in the target table.
+
+    Returns:
+        pyspark.sql.DataFrame: The batch as a Spark DataFrame.
+    """
+    registered = db.get_registered_schema(job_id, source_table)
+    known = {field.name: field for field in StructType.fromJson(registered.spark_schema).fields} if registered else {}
+
+    new_columns = [column for column in df.columns if column not in known]
+    if new_columns:
+        inferred, _ = sp_ut.spark_schema_from_pandas(df[new_columns])
+        known.update({field.name: field for field in inferred.fields})
+
+    widened = []
+    try:
+        spark_df = sp_ut.pandas_to_spark(df, spark_session, logger,
+                                         schema=StructType([known[column] for column in df.columns]))
+    except Exception as e:
+        logger.warning(f"Batch does not match the registered schema of {source_table}, inferring it again: {e}")
+        inferred, _ = sp_ut.spark_schema_from_pandas(df)
+        for field in inferred.fields:
+            if known[field.name].dataType != field.dataType and not isinstance(known[field.name].dataType, StringType):
+                known[field.name] = StructField(field.name, StringType(), True)
+                widened.append(field.name)
+        spark_df = sp_ut.pandas_to_spark(df, spark_session, logger,
+                                         schema=StructType([known[column] for column in df.columns]))
+
+    if registered is None or new_columns or widened:
+        inspector = inspect(db.engine)
+        if registered is not None and inspector.has_table(target_table, schema=target_schema):
+            existing = {column["name"] for column in inspector.get_columns(target_table, schema=target_schema)}
+            for column in new_columns:
+                if column not in existing:
+                    db.alter_table_column_add_or_drop_alembic(
+                        target_table, column_details=Column(column, map_spark_type_to_sqlalchemy(known[column].dataType)),
+                        schema_name=target_schema)
+            for column in widened:
+                if column in existing:
+                    db.alter_table_column_add_or_drop_alembic(
+                        target_table, column_name=column, action=ColumnActions.MODIFY, schema_name=target_schema,
+                        column_details=Column(column, map_spark_type_to_sqlalchemy(StringType()), nullable=True))
+
+        schema = StructType(list(known.values()))
+        target_ddl = str(CreateTable(Table(target_table, MetaData(schema=target_schema),
+                                           *[Column(field.name, map_spark_type_to_sqlalchemy(field.dataType))
+                                             for field in schema.fields])).compile(db.engine))
+        version = db.register_schema(job_id, source_table, schema.jsonValue(), target_ddl=target_ddl, run_id=str(run_id))
+        logger.info(f"Registered schema version {version.version} of {source_table}, new columns: {new_columns}, "
+                    f"widened to string: {widened}")
+
+    return spark_df
+
+
+def map_spark_type_to_sqlalchemy(spark_type, max_len=None, profile=None):
     from sqlalchemy import Integer, BigInteger, Float, Boolean, DateTime
 
+    if profile is not None and max_len is None:
+        max_len = profile.max_length
+
     if isinstance(spark_type, IntegerType):
         return Integer
     elif isinstance(spark_type, LongType):
@@ -387,22 +908,22 @@ def map_spark_type_to_sqlalchemy(spark_type, max_len=None):
     else:
         return String(255)
 
-def create_table_from_spark_df(df, engine, table_name, schema_name="public"):
+def create_table_from_spark_df(df, engine, table_name, schema_name="public", primary_key_columns=None):
     inspector = inspect(engine)
     if inspector.has_table(table_name, schema=schema_name):
         return  # Table exists, do nothing
 
     metadata = MetaData(schema=schema_name)
     columns = []
+    profiles = sp_ut.profile_columns(df)
 
     for field in df.schema.fields:
-        max_len = None
-        if isinstance(field.dataType, StringType):
-            max_len = df.selectExpr(f"length({field.name})").agg({"length({})".format(field.name): "max"}).collect()[0][0]
-            max_len = max_len if max_len else 0
-
-        col_type = map_spark_type_to_sqlalchemy(field.dataType, max_len)
-        col = Column(field.name, col_type, nullable=field.nullable)
+        profile = profiles[field.name]
+        col_type = map_spark_type_to_sqlalchemy(field.dataType, profile=profile)
+        primary_key = field.name in (primary_key_columns or [])
+        if primary_key and profile.has_nulls:
+            raise ValueError(f"Primary key column {field.name} of {table_name} has {profile.null_count} null values")
+        col = Column(field.name, col_type, nullable=field.nullable and not primary_key, primary_key=primary_key)
         columns.append(col)
 
     sql_table = Table(table_name, metadata, *columns)
@@ -118,7 +118,7 @@ def check_and_schedule_tasks():
     for integration in integrations:
         job_id = str(integration.id)  # Safely convert to string
         job_name = str(integration.integration_name)
-        job_type = str(integration.integration_type)
+        job_type = integration.integration_type.value
         cron_time = integration.cron_expression
         source_connection = integration.source_connection
         target_connection = integration.target_connection
@@ -129,6 +129,8 @@ def check_and_schedule_tasks():
         spark_config = integration.spark_config
         hadoop_config = integration.hadoop_config
         batch_size = integration.batch_size
+        read_config = integration.read_config
+        write_config = integration.write_config
 
         source_details = db.get_created_connections(id=source_connection)[0]
         target_details = db.get_created_connections(id=target_connection)[0]
@@ -142,7 +144,7 @@ def check_and_schedule_tasks():
                     trigger=CronTrigger.from_crontab(cron),
                     args=[job_id, job_name, job_type, source_details, target_details, source_table, target_table,
                           source_schema, target_schema, spark_config, hadoop_config, batch_size],
-                    kwargs={},
+                    kwargs={"read_config": read_config, "write_config": write_config},
                     id=job_id,
                     replace_existing=True,
                 )
@@ -3,22 +3,50 @@ This module contains utility functions and classes for working with Apache Spark
 
 Classes:
 - SparkConnection: Represents a connection to a Spark cluster.
+- SparkSessionPool: Keeps a warm Spark application per worker process for consecutive runs.
+- ColumnProfile: Null count, string length and value range of a DataFrame column.
 
 Functions:
 - initializeSpark: Initializes a Spark connection and configures the Spark session based on the connection and configuration details.
 - read_via_spark: Reads data using Spark based on the specified connection format and credentials.
+- read_via_spark_partitioned: Reads a JDBC source in parallel, split on a numeric or date column.
+- read_via_spark_keyset: Reads a JDBC source in fixed-size batches using keyset (seek) pagination.
+- write_via_bulk_load: Writes a DataFrame through the native bulk-load path of the target database.
+- spark_schema_from_pandas: Builds a StructType for a pandas DataFrame from its dtypes.
+- pandas_to_spark: Converts a pandas DataFrame to Spark through Arrow with an explicit schema.
+- profile_columns: Profiles all columns of a DataFrame in a single aggregation.
+- fit_partitions: Sets the number of partitions of a DataFrame before a write.
+- validate_write_config: Validates the write options of an integration.
+- build_jdbc_write_options: Builds the JDBC write options for a target from engine defaults and the integration.
+- build_keyset_query: Builds the pushed-down query for a single keyset batch.
+- build_incremental_query: Builds the pushed-down query selecting rows between two watermarks.
 - other_function_name(): Description of what this function does.
 - another_function_name(): Description of what this function does.
 """
+import hashlib
+import json
+import math
+import threading
 import uuid
+from decimal import Decimal
 
 from pyspark.sql import functions as F
+from pyspark.sql.types import NumericType, DateType, TimestampType, IntegralType, StructType, StructField, \
+    StringType, LongType, IntegerType, DoubleType, BooleanType
 from pyspark.sql.window import Window
 from pyspark.sql import SparkSession
 from pyspark.conf import SparkConf
 import os
 
 import logging
+
+import pandas as pd
+
+from openetl_utils.bulk_load_utils import get_bulk_loader
+from openetl_utils.cache import jdbc_write_defaults
+from openetl_utils.jar_utils import resolve_jars, cached_driver_jars
+
+
 class SparkConnection():
     
     """
@@ -33,6 +61,8 @@ class SparkConnection():
     Methods:
         initializeSpark(): Initializes a Spark connection and configures the Spark session.
         read_via_spark(): Reads data using Spark based on the specified connection format and credentials.
+        read_via_spark_partitioned(): Reads a JDBC source in parallel using partitionColumn/lowerBound/upperBound.
+        read_via_spark_keyset(): Reads a JDBC source in batches of ``WHERE key > last ORDER BY key LIMIT n``.
         write_via_spark(dataframe, conn_string, table, driver, mode="append", format="jdbc"): Writes data using Spark.
         __dispose__(): Disposes the Spark session and engine.
     """
@@ -40,7 +70,8 @@ class SparkConnection():
     def __init__(self, connection_string: str,
                  spark_configuration: dict,
                  hadoop_configuration: dict = None,
-                 jar=None):
+                 jar=None,
+                 pool=None):
         """
         Initializes a SparkConnection object with the provided connection and configuration details.
 
@@ -52,6 +83,8 @@ class SparkConnection():
                 - 'applicationName': The name of the Spark application.
             hadoop_configuration (dict, optional): A dictionary containing the Hadoop configuration details.
                 Defaults to None.
+            pool (SparkSessionPool, optional): Borrow a session from a long-lived pool instead of starting
+                and stopping a Spark application per run. Defaults to None.
             sparkDataframe (pyspark.sql.DataFrame, optional): An optional Spark DataFrame to associate with the SparkConnection.
                 Defaults to None.
 
@@ -74,10 +107,14 @@ class SparkConnection():
         self.spark_configuration = spark_configuration
         self.hadoop_configuration = hadoop_configuration
         self.jar = jar
+        self.pool = pool
+        self.hadoop_overrides = {}  # previous values of the Hadoop settings of the run, see set_hadoop_configuration
 
     def initializeSpark(self) -> SparkSession:
         """
         Initializes a Spark connection and configures the Spark session based on the connection and configuration details.
+        With a pool the session is an isolated ``newSession()`` of a warm application, and its jobs run in a
+        job group named after the run.
 
         Returns:
             pyspark.sql.SparkSession: The initialized SparkSession object.
@@ -85,8 +122,33 @@ class SparkConnection():
         Raises:
             Exception: If an error occurs during Spark initialization.
         """
+        if self.pool is None:
+            self.spark_session = self.build_session()
+            return self.spark_session
+
+        self.job_group = self.spark_configuration.get("spark.app.name", "default") + f"_{uuid.uuid4()}"
+        self.spark_session = self.pool.acquire(self.jar, self.spark_configuration, self.hadoop_configuration,
+                                               builder=self.build_session)
+        self.spark_session.sparkContext.setJobGroup(self.job_group, self.job_group, interruptOnCancel=True)
+        return self.spark_session
+
+    def build_session(self, jars=None) -> SparkSession:
+        """
+        Builds the Spark session from the jars, Spark and Hadoop configuration of the connection. Driver jars
+        are loaded from the local jar cache, only the ones that cannot be cached are resolved by Spark.
+
+        Args:
+            jars (str or list, optional): The jars to load instead of the jars of the connection.
+
+        Returns:
+            pyspark.sql.SparkSession: The new SparkSession object.
+        """
         spark_conf = SparkConf()
-        spark_conf.set("spark.jars.packages", self.jar)
+        local_jars, packages = resolve_jars(self.jar if jars is None else jars)
+        if local_jars:
+            spark_conf.set("spark.jars", ",".join(local_jars))
+        if packages:
+            spark_conf.set("spark.jars.packages", ",".join(packages))
 
         # Set Spark configurations
         try:
@@ -108,7 +170,6 @@ class SparkConnection():
                 for name, value in self.hadoop_configuration.items():
                     hadoop_conf.set(name, value)
 
-            self.spark_session = spark_session
             return spark_session
 
         except Exception as e:
@@ -143,14 +204,156 @@ class SparkConnection():
                 .filter((F.col("row_number") > start) & (F.col("row_number") <= start + batch_size)) \
                 .drop("row_number")
 
-            if paginated_df.count() == 0:
+            if paginated_df.isEmpty():
                 break
 
             yield paginated_df
 
             start += batch_size
 
-    def write_via_spark(self, dataframe, conn_string, table,driver, mode="append",format="jdbc"):
+    def find_partition_column(self, schema):
+        """
+        Picks a column a JDBC read can be split on. Spark only accepts numeric, date and timestamp
+        columns as a partitionColumn. Integral columns are preferred (an ``id`` column first), then
+        dates and timestamps, then any other numeric column.
+
+        Args:
+            schema (pyspark.sql.types.StructType): The schema of the source table.
+
+        Returns:
+            str | None: The name of the column to split on, or None if the table has no usable column.
+        """
+        def rank(field):
+            name = field.name.lower()
+            if isinstance(field.dataType, IntegralType):
+                return 0 if name == "id" else 1 if name.endswith("id") else 2
+            if isinstance(field.dataType, (DateType, TimestampType)):
+                return 3
+            return 4
+
+        candidates = [field for field in schema.fields
+                      if isinstance(field.dataType, (NumericType, DateType, TimestampType))]
+        if not candidates:
+            return None
+        return min(candidates, key=rank).name
+
+    def get_partition_bounds(self, spark_connection_details, partition_column, widen=True):
+        """
+        Probes the min and max of the partition column. The aggregate is pushed down to the source
+        as a subquery, so only a single row travels over JDBC.
+
+        Args:
+            spark_connection_details (dict): The JDBC connection details (url, dbtable, driver).
+            partition_column (str): The column to probe.
+            widen (bool): Floor / ceil fractional bounds to whole numbers, as partition bounds need. Pass
+                False for the raw values, e.g. an incremental watermark, which must not pass the real max.
+
+        Returns:
+            tuple: (lower_bound, upper_bound); both are None if the table is empty.
+        """
+        bounds_query = f"(SELECT MIN({partition_column}) AS lower_bound, MAX({partition_column}) AS upper_bound " \
+                       f"FROM {spark_connection_details['dbtable']}) openetl_bounds"
+        options = {**spark_connection_details, "dbtable": bounds_query}
+        row = self.spark_session.read.format("jdbc").options(**options).load().collect()[0]
+        lower_bound, upper_bound = row["lower_bound"], row["upper_bound"]
+
+        # Spark parses numeric bounds as longs, widen fractional bounds so no rows fall outside them
+        if widen and isinstance(lower_bound, (float, Decimal)):
+            lower_bound, upper_bound = math.floor(lower_bound), math.ceil(upper_bound)
+        return lower_bound, upper_bound
+
+    def read_via_spark_partitioned(self, spark_connection_details, partition_column=None, num_partitions=None,
+                                   fetchsize=10000):
+        """
+        Reads a JDBC source in parallel. The table is split into ``num_partitions`` ranges of the
+        partition column, so each executor core scans its own slice of the table exactly once.
+
+        If no partition column is given, one is picked from the source schema. Tables without a numeric
+        or date column are read in a single partition.
+
+        Args:
+            spark_connection_details (dict): The JDBC connection details (url, dbtable, driver).
+            partition_column (str, optional): The column to split on. Detected if not provided.
+            num_partitions (int, optional): Number of parallel reads. Defaults to the default parallelism of the session.
+            fetchsize (int): Number of rows fetched per round trip by the JDBC driver.
+
+        Yields:
+            pyspark.sql.DataFrame: A single Spark DataFrame covering the whole table.
+        """
+        options = {**spark_connection_details, "fetchsize": str(fetchsize)}
+
+        if partition_column is None:
+            schema = self.spark_session.read.format("jdbc").options(**options).load().schema
+            partition_column = self.find_partition_column(schema)
+
+        if partition_column is None:
+            logging.warning("No numeric or date column found, reading %s in a single partition",
+                            spark_connection_details["dbtable"])
+            yield self.spark_session.read.format("jdbc").options(**options).load()
+            return
+
+        lower_bound, upper_bound = self.get_partition_bounds(spark_connection_details, partition_column)
+        if lower_bound is None:
+            return
+
+        num_partitions = num_partitions or self.spark_session.sparkContext.defaultParallelism
+        options.update({
+            "partitionColumn": partition_column,
+            "lowerBound": str(lower_bound),
+            "upperBound": str(upper_bound),
+            "numPartitions": str(num_partitions),
+        })
+        logging.info("Reading %s with %s partitions on %s", spark_connection_details["dbtable"], num_partitions,
+                     partition_column)
+        yield self.spark_session.read.format("jdbc").options(**options).load()
+
+    def read_via_spark_keyset(self, spark_connection_details, key_column, batch_size=100000, engine=None,
+                              last_value=None, fetchsize=10000):
+        """
+        Reads a JDBC source in batches using keyset (seek) pagination. Every batch is pushed down to the
+        source as ``WHERE key > last_value ORDER BY key LIMIT batch_size``, so the cost of a batch does not
+        grow with how far into the table the read is.
+
+        The key must be unique and indexed on the source, otherwise rows sharing a key at a batch boundary
+        can be skipped and every batch turns into a sort of the table. A non-unique column, e.g. an
+        ``updated_at`` cursor, is made unique by seeking on it together with a unique column.
+
+        Args:
+            spark_connection_details (dict): The JDBC connection details (url, dbtable, driver).
+            key_column (str or list): The unique, ordered column to seek on, or the columns of a unique
+                composite key in seek order.
+            batch_size (int): The number of rows per batch.
+            engine (str, optional): The source engine, used to pick the row limiting syntax.
+            last_value (optional): Resume after this key value, a tuple for a composite key. Defaults to
+                reading from the start.
+            fetchsize (int): Number of rows fetched per round trip by the JDBC driver.
+
+        Yields:
+            pyspark.sql.DataFrame: A Spark DataFrame containing a batch of rows.
+        """
+        table = spark_connection_details["dbtable"]
+        composite = not isinstance(key_column, str)
+        # structs compare field by field, so the max struct is the last composite key of the batch
+        last_key = F.max(F.struct(*key_column)) if composite else F.max(key_column)
+        while True:
+            options = {**spark_connection_details,
+                       "dbtable": build_keyset_query(table, key_column, batch_size, last_value, engine),
+                       "fetchsize": str(fetchsize)}
+            df = self.spark_session.read.format("jdbc").options(**options).load().persist()
+
+            stats = df.agg(F.count(F.lit(1)).alias("rows"), last_key.alias("last_value")).collect()[0]
+            if stats["rows"] == 0:
+                df.unpersist()
+                break
+
+            yield df
+
+            df.unpersist()
+            if stats["rows"] < batch_size:
+                break
+            last_value = tuple(stats["last_value"]) if composite else stats["last_value"]
+
+    def write_via_spark(self, dataframe, conn_string, table,driver, mode="append",format="jdbc", options=None):
         """
         The write_via_spark method is used to write data using Spark based on the specified connection format and credentials. 
         It takes the DataFrame stored in the sparkDataframe attribute of the SparkConnection object and writes it to the target data destination.
@@ -165,15 +368,24 @@ class SparkConnection():
         Please note that in the provided code snippet, the variables connection_type, connection_dict, and mode are not defined. 
         Make sure to replace them with the appropriate values based on your implementation.
 
+        Args:
+            options (dict, optional): Extra JDBC write options, see build_jdbc_write_options.
+
         Raises:
             Exception: If an error occurs during the data writing process.
         """
         try:
+            options = {key: str(value).lower() if isinstance(value, bool) else str(value)
+                       for key, value in (options or {}).items()}
+            if "numPartitions" in options:
+                dataframe = fit_partitions(dataframe, int(options["numPartitions"]))
+
             dataframe.write \
                 .format(format) \
                 .option("url", conn_string) \
                 .option("dbtable", table) \
                 .option("driver", driver) \
+                .options(**options) \
                 .mode(mode) \
                 .save()
 
@@ -181,11 +393,560 @@ class SparkConnection():
         except Exception as e:
             logging.error(str(e))
             return False, str(e)
-        
+
+    def write_via_bulk_load(self, dataframe, engine, credentials, table, chunk_size=100000, num_partitions=None):
+        """
+        Writes a DataFrame through the native bulk-load path of the target database, COPY for PostgreSQL,
+        LOAD DATA LOCAL INFILE for MySQL/MariaDB and bulk copy for SQL Server. Each partition is loaded
+        on its executor over its own connection.
+
+        Args:
+            dataframe (DataFrame): The data to write, its columns must exist in the target table.
+            engine (str): The engine of the target connector.
+            credentials (dict): The target connection credentials.
+            table (str): The target table.
+            chunk_size (int): The number of rows sent per bulk-load statement.
+            num_partitions (int, optional): The number of concurrent connections to load with.
+
+        Returns:
+            tuple: (success, message), like write_via_spark.
+        """
+        try:
+            loader = get_bulk_loader(engine)
+            if loader is None:
+                return False, f"Bulk load is not supported for {engine}"
+
+            if num_partitions:
+                dataframe = fit_partitions(dataframe, int(num_partitions))
+
+            columns = dataframe.columns
+            dataframe.foreachPartition(lambda rows: loader(rows, table=table, columns=columns,
+                                                           credentials=credentials, chunk_size=chunk_size))
+            return True, "Data written successfully"
+        except Exception as e:
+            logging.error(str(e))
+            return False, str(e)
+
+    def set_hadoop_configuration(self, settings):
+        """
+        Sets Hadoop settings of the run, e.g. storage credentials. The Hadoop configuration belongs to the
+        SparkContext, so a pooled application gets the previous values back on release.
+
+        Args:
+            settings (dict): The Hadoop settings.
+        """
+        hadoop_conf = self.spark_session.sparkContext._jsc.hadoopConfiguration()
+        for name, value in settings.items():
+            self.hadoop_overrides.setdefault(name, hadoop_conf.get(name))
+            hadoop_conf.set(name, value)
+
     def __dispose__(self):
         """
         Dispose the session and engine.
         """
+        if self.pool is not None:
+            logging.info("RELEASING SPARK SESSION TO POOL")
+            self.pool.release(self.spark_session, self.job_group, hadoop_overrides=self.hadoop_overrides)
+            self.hadoop_overrides = {}
+            return
+
         logging.info("DISPOSING SPARK SESSION")
         self.spark_session.stop()
 
+
+class SparkSessionPool:
+    """
+    Keeps a warm Spark application per worker process so runs skip the JVM start and jar resolution.
+
+    A process can only run one SparkContext, so the pool holds a single application keyed by the
+    fingerprint of its Spark and Hadoop configuration. A run asking for a different fingerprint replaces it.
+    Runs are isolated with ``newSession()``, which gives each its own SQL configuration and temporary views,
+    and with a job group per run. The application is recycled after ``max_runs`` runs or once the JVM heap
+    still in use after a GC is above ``max_heap_fraction``.
+
+    Jars are left out of the fingerprint: they only reach the driver classpath when the JVM starts, and a
+    replaced application keeps the JVM of the process. The first application of a process therefore loads
+    every driver of the jar cache besides the jars it asks for; the Celery worker fills the cache on start.
+    A later run needing a jar the JVM was not started with fails fast instead of with "No suitable driver".
+
+    Methods:
+        acquire(): Returns an isolated session on the pooled application, building it if needed.
+        release(): Cancels the leftover jobs of a run and clears its cached data.
+        shutdown(): Stops the pooled application.
+    """
+
+    def __init__(self, max_runs=None, max_heap_fraction=None):
+        """
+        Args:
+            max_runs (int, optional): Runs served before the application is recycled.
+                Defaults to the OPENETL_SPARK_POOL_MAX_RUNS environment variable, or 50.
+            max_heap_fraction (float, optional): Used share of the JVM heap above which the application is
+                recycled. Defaults to the OPENETL_SPARK_POOL_MAX_HEAP_FRACTION environment variable, or 0.7.
+        """
+        self.max_runs = int(max_runs or os.getenv("OPENETL_SPARK_POOL_MAX_RUNS", 50))
+        self.max_heap_fraction = float(max_heap_fraction or os.getenv("OPENETL_SPARK_POOL_MAX_HEAP_FRACTION", 0.7))
+        self._lock = threading.Lock()
+        self._session = None
+        self._fingerprint = None
+        self._runs = 0
+        self._jvm_jars = None  # the jars the JVM of the process was started with, they outlive _stop
+
+    @staticmethod
+    def fingerprint(spark_configuration, hadoop_configuration=None):
+        """
+        Returns a stable key for the settings a Spark application is started with. The application name is
+        left out since it differs per integration and does not change the application.
+        """
+        spark_configuration = {key: value for key, value in (spark_configuration or {}).items()
+                               if key != "spark.app.name"}
+        settings = json.dumps([spark_configuration, hadoop_configuration or {}], sort_keys=True, default=str)
+        return hashlib.sha256(settings.encode()).hexdigest()
+
+    @staticmethod
+    def _coordinates(jars):
+        if isinstance(jars, str):
+            jars = jars.split(",")
+        return {jar.strip() for jar in jars or [] if jar.strip()}
+
+    def acquire(self, jars, spark_configuration, hadoop_configuration=None, builder=None) -> SparkSession:
+        """
+        Returns an isolated session on the pooled application, building or replacing the application when
+        its fingerprint differs or it is due for recycling.
+
+        Args:
+            jars (str): The jars of the application.
+            spark_configuration (dict): The Spark configuration of the application.
+            hadoop_configuration (dict, optional): The Hadoop configuration of the application.
+            builder (callable): Builds a new application session from a list of jars, e.g.
+                SparkConnection.build_session.
+
+        Returns:
+            pyspark.sql.SparkSession: A new session sharing the pooled SparkContext.
+
+        Raises:
+            RuntimeError: If the run needs jars the JVM of the process was not started with.
+        """
+        fingerprint = self.fingerprint(spark_configuration, hadoop_configuration)
+        requested = self._coordinates(jars)
+        with self._lock:
+            if self._jvm_jars is not None and not requested <= self._jvm_jars:
+                raise RuntimeError(f"{', '.join(sorted(requested - self._jvm_jars))} is not on the classpath of "
+                                   f"this worker's JVM. Add it to the jar cache (python -m openetl_utils.jar_utils) "
+                                   f"so worker processes load it on start.")
+
+            if self._session is not None and (fingerprint != self._fingerprint or self._needs_recycle()):
+                self._stop()
+
+            if self._session is None:
+                logging.info("STARTING POOLED SPARK SESSION")
+                load = sorted(requested | set(cached_driver_jars())) if self._jvm_jars is None \
+                    else sorted(self._jvm_jars)
+                self._session = builder(load)
+                self._jvm_jars = set(load)
+                self._fingerprint = fingerprint
+                self._runs = 0
+
+            self._runs += 1
+            return self._session.newSession()
+
+    def release(self, session, job_group=None, hadoop_overrides=None):
+        """
+        Cancels the leftover jobs of a run, clears the data it cached and restores the Hadoop settings it
+        changed, leaving the application running.
+
+        Args:
+            session (pyspark.sql.SparkSession): The session returned by acquire.
+            job_group (str, optional): The job group of the run.
+            hadoop_overrides (dict, optional): The Hadoop settings the run changed and their previous values,
+                None for settings that were unset.
+        """
+        spark_context = session.sparkContext
+        hadoop_conf = spark_context._jsc.hadoopConfiguration()
+        for name, value in (hadoop_overrides or {}).items():
+            # Storage credentials of one integration must not reach the next run on the shared context
+            if value is None:
+                hadoop_conf.unset(name)
+            else:
+                hadoop_conf.set(name, value)
+        if job_group:
+            spark_context.cancelJobGroup(job_group)
+        spark_context.setLocalProperty("spark.jobGroup.id", None)
+        spark_context.setLocalProperty("spark.job.description", None)
+        session.catalog.clearCache()
+
+    def shutdown(self):
+        """
+        Stops the pooled application.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._stop()
+
+    def _needs_recycle(self):
+        if self._runs >= self.max_runs:
+            return True
+        try:
+            runtime = self._session._jvm.java.lang.Runtime.getRuntime()
+            used = runtime.totalMemory() - runtime.freeMemory()
+            if used / runtime.maxMemory() <= self.max_heap_fraction:
+                return False
+            # The reading includes garbage not collected yet, only a heap still over the limit after a
+            # full collection is recycled. Runs under the limit never pay for the pause.
+            runtime.gc()
+            used = runtime.totalMemory() - runtime.freeMemory()
+            return used / runtime.maxMemory() > self.max_heap_fraction
+        except Exception as e:
+            # A dead JVM cannot be reused either
+            logging.warning(f"Unable to read Spark heap usage, recycling session: {e}")
+            return True
+
+    def _stop(self):
+        logging.info("STOPPING POOLED SPARK SESSION")
+        try:
+            self._session.stop()
+        finally:
+            self._session = None
+            self._fingerprint = None
+
+
+spark_session_pool = SparkSessionPool()
+
+
+def _spark_type_for_column(column):
+    """
+    Maps a pandas column to a Spark type, None if the column has to be converted to strings.
+    """
+    kind = column.dtype.kind
+    if kind == "b":
+        return BooleanType()
+    if kind in "iu":
+        return IntegerType() if column.dtype.itemsize <= 4 and kind == "i" else LongType()
+    if kind == "f":
+        return DoubleType()
+    if kind == "M":
+        return TimestampType()
+    if kind not in "OSU":
+        return None
+
+    inferred = pd.api.types.infer_dtype(column, skipna=True)
+    return {
+        "string": StringType(),
+        "empty": StringType(),
+        "integer": LongType(),
+        "floating": DoubleType(),
+        "mixed-integer-float": DoubleType(),
+        "boolean": BooleanType(),
+        "datetime": TimestampType(),
+        "datetime64": TimestampType(),
+        "date": DateType(),
+    }.get(inferred)
+
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def spark_schema_from_pandas(df):
+    """
+    Builds a StructType for a pandas DataFrame from its dtypes, looking at the values of object columns
+    once with ``infer_dtype``. Columns without a safe Spark type (mixed values, dicts, lists, decimals)
+    are typed as strings.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to describe.
+
+    Returns:
+        tuple: (StructType, list of the columns typed as strings because no other type fits)
+    """
+    fields, fallback = [], []
+    for name in df.columns:
+        spark_type = _spark_type_for_column(df[name])
+        if spark_type is None:
+            spark_type = StringType()
+            fallback.append(name)
+        fields.append(StructField(str(name), spark_type, nullable=True))
+    return StructType(fields), fallback
+
+
+def pandas_to_spark(df, spark_session, logger=None, schema=None):
+    """
+    Converts a pandas DataFrame to Spark through Arrow with an explicit schema, so Spark does not infer
+    types row by row. Only the columns without a fitting type are converted to strings, nested values
+    as JSON. Spark's silent fallback is off: a DataFrame Arrow cannot convert is logged, then converted
+    row by row.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to convert.
+        spark_session (SparkSession): The session to create the DataFrame in.
+        logger (optional): Logger for the columns falling back to strings.
+        schema (StructType, optional): A known schema for the DataFrame, e.g. from the schema registry.
+            Skips the inference; values of its string columns that are not strings are converted, nested
+            values as JSON.
+
+    Returns:
+        pyspark.sql.DataFrame: The Spark DataFrame.
+    """
+    spark_session.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
+    spark_session.conf.set("spark.sql.execution.arrow.pyspark.fallback.enabled", "false")
+
+    if schema is None:
+        schema, fallback = spark_schema_from_pandas(df)
+    else:
+        fallback = [field.name for field in schema.fields if isinstance(field.dataType, StringType)
+                    and pd.api.types.infer_dtype(df[field.name], skipna=True) not in ("string", "empty")]
+    if fallback:
+        (logger or logging).warning(f"Converting columns without a Spark type to string: {fallback}")
+        df = df.copy()
+        for name in fallback:
+            df[name] = df[name].map(_to_string)
+
+    try:
+        return spark_session.createDataFrame(df, schema=schema)
+    except Exception as e:
+        (logger or logging).warning(f"Arrow could not convert the DataFrame, converting it row by row: {e}")
+        spark_session.conf.set("spark.sql.execution.arrow.pyspark.enabled", "false")
+        try:
+            return spark_session.createDataFrame(df, schema=schema)
+        finally:
+            spark_session.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
+
+
+class ColumnProfile:
+    """
+    The null count, maximum string length and value range of a DataFrame column, as computed by
+    profile_columns.
+    """
+
+    def __init__(self, name, data_type, nullable, null_count=0, max_length=None, min_value=None, max_value=None):
+        self.name = name
+        self.data_type = data_type
+        self.nullable = nullable
+        self.null_count = null_count
+        self.max_length = max_length
+        self.min_value = min_value
+        self.max_value = max_value
+
+    @property
+    def has_nulls(self):
+        return bool(self.null_count)
+
+    def fits(self, sql_type):
+        """
+        Checks whether the profiled values fit a SQLAlchemy column type: string lengths against a sized
+        String, ranges against Integer and SmallInteger. Other types are not checked.
+        """
+        from sqlalchemy import String, Integer, SmallInteger, BigInteger
+
+        sql_type = sql_type() if isinstance(sql_type, type) else sql_type
+        if isinstance(sql_type, String) and sql_type.length and self.max_length is not None:
+            return self.max_length <= sql_type.length
+        if isinstance(sql_type, Integer) and not isinstance(sql_type, BigInteger) and self.min_value is not None:
+            bound = 2 ** 15 if isinstance(sql_type, SmallInteger) else 2 ** 31
+            return -bound <= self.min_value and self.max_value < bound
+        return True
+
+    def __repr__(self):
+        return (f"ColumnProfile({self.name!r}, {self.data_type.simpleString()}, null_count={self.null_count}, "
+                f"max_length={self.max_length}, min_value={self.min_value!r}, max_value={self.max_value!r})")
+
+
+def profile_columns(dataframe, columns=None):
+    """
+    Profiles the columns of a DataFrame in a single aggregation, i.e. one Spark job whatever the width
+    of the DataFrame: the null count of every column, the maximum length of string columns and the
+    range of numeric, date and timestamp columns.
+
+    Args:
+        dataframe (pyspark.sql.DataFrame): The DataFrame to profile.
+        columns (list, optional): The columns to profile, all of them if omitted.
+
+    Returns:
+        dict: The ColumnProfile of each column, by name.
+    """
+    fields = [field for field in dataframe.schema.fields if columns is None or field.name in columns]
+    aggregations = []
+    for i, field in enumerate(fields):
+        column = dataframe[field.name]
+        aggregations.append(F.count(F.when(column.isNull(), 1)).alias(f"nulls_{i}"))
+        if isinstance(field.dataType, StringType):
+            aggregations.append(F.max(F.length(column)).alias(f"length_{i}"))
+        elif isinstance(field.dataType, (NumericType, DateType, TimestampType)):
+            aggregations.append(F.min(column).alias(f"min_{i}"))
+            aggregations.append(F.max(column).alias(f"max_{i}"))
+
+    if not aggregations:
+        return {}
+    row = dataframe.agg(*aggregations).collect()[0].asDict()
+
+    return {
+        field.name: ColumnProfile(field.name, field.dataType, field.nullable,
+                                  null_count=row[f"nulls_{i}"],
+                                  max_length=row.get(f"length_{i}"),
+                                  min_value=row.get(f"min_{i}"),
+                                  max_value=row.get(f"max_{i}"))
+        for i, field in enumerate(fields)
+    }
+
+
+def fit_partitions(dataframe, num_partitions):
+    """
+    Sets the number of partitions, and so concurrent target connections, of a DataFrame before a write.
+    Spark only ever coalesces to ``numPartitions`` on a JDBC write, this also spreads a DataFrame with
+    fewer partitions.
+    """
+    current = dataframe.rdd.getNumPartitions()
+    if current > num_partitions:
+        return dataframe.coalesce(num_partitions)
+    if current < num_partitions:
+        return dataframe.repartition(num_partitions)
+    return dataframe
+
+
+def validate_write_config(write_config):
+    """
+    Validates the write options of an integration.
+
+    Args:
+        write_config (dict): The write options, see build_jdbc_write_options.
+
+    Raises:
+        ValueError: If an option is unknown or has an invalid value.
+    """
+    for key, value in (write_config or {}).items():
+        if key not in write_config_options:
+            raise ValueError(f"Unknown write option {key}, expected one of {sorted(write_config_options)}")
+        if not write_config_options[key](value):
+            raise ValueError(f"Invalid value {value!r} for write option {key}")
+
+    if (write_config or {}).get("mode") == "merge" and not write_config.get("key_columns"):
+        raise ValueError("Write option key_columns is required by the merge mode")
+
+
+def build_jdbc_write_options(engine, write_config=None):
+    """
+    Builds the JDBC write options for a target, the engine defaults overridden by the integration.
+
+    Args:
+        engine (str): The engine of the target connector.
+        write_config (dict, optional): The write options of the integration. ``batchsize``,
+            ``numPartitions`` and ``isolationLevel`` are Spark JDBC options, ``rewriteBatchedStatements``
+            (MySQL) and ``reWriteBatchedInserts`` (PostgreSQL) are passed to the driver. ``method`` picks
+            between JDBC inserts (default) and the native bulk load, ``mode`` ("append" or "merge") and ``key_columns``
+            pick how rows are applied; they are not JDBC options.
+
+    Returns:
+        dict: The options to pass to write_via_spark.
+
+    Raises:
+        ValueError: If the write options are invalid.
+    """
+    validate_write_config(write_config)
+    options = dict(jdbc_write_defaults.get(engine, jdbc_write_defaults["default"]))
+    options.update({key: value for key, value in (write_config or {}).items() if key in jdbc_write_option_names})
+    return options
+
+
+def _positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _boolean(value):
+    return isinstance(value, bool) or str(value).lower() in ("true", "false")
+
+
+jdbc_write_option_names = {"batchsize", "numPartitions", "isolationLevel", "rewriteBatchedStatements",
+                           "reWriteBatchedInserts", "useBulkCopyForBatchInsert"}
+
+write_config_options = {
+    "method": lambda value: value in ("bulk", "jdbc"),
+    "mode": lambda value: value in ("append", "merge"),
+    "key_columns": lambda value: isinstance(value, list) and all(isinstance(column, str) for column in value),
+    "batchsize": _positive_int,
+    "numPartitions": _positive_int,
+    "isolationLevel": lambda value: value in ("NONE", "READ_UNCOMMITTED", "READ_COMMITTED", "REPEATABLE_READ",
+                                              "SERIALIZABLE"),
+    "rewriteBatchedStatements": _boolean,
+    "reWriteBatchedInserts": _boolean,
+    "useBulkCopyForBatchInsert": _boolean,
+}
+
+
+def _sql_literal(value):
+    """
+    Renders a key value as a SQL literal for a pushed-down JDBC query.
+    """
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+def build_keyset_query(table, key_column, batch_size, last_value=None, engine=None):
+    """
+    Builds the subquery for one keyset batch, usable as a JDBC ``dbtable``.
+
+    A composite key is compared column by column, ``(a, b) > (x, y)`` is written out as
+    ``a > x OR (a = x AND b > y)`` since SQL Server and Oracle have no row value comparison.
+
+    Args:
+        table (str): The source table.
+        key_column (str or list): The column to seek on, or the columns of a composite key.
+        batch_size (int): The number of rows in the batch.
+        last_value (optional): The last key of the previous batch, a tuple for a composite key, None for
+            the first batch.
+        engine (str, optional): The source engine. SQL Server and Oracle do not support LIMIT.
+
+    Returns:
+        str: An aliased subquery selecting the next batch.
+    """
+    key_columns = [key_column] if isinstance(key_column, str) else list(key_column)
+    where = ""
+    if last_value is not None:
+        last_values = [last_value] if isinstance(key_column, str) else list(last_value)
+        seeks = []
+        for index, column in enumerate(key_columns):
+            equal = [f"{previous} = {_sql_literal(value)}"
+                     for previous, value in zip(key_columns[:index], last_values[:index])]
+            seeks.append(" AND ".join(equal + [f"{column} > {_sql_literal(last_values[index])}"]))
+        where = f" WHERE {seeks[0]}" if len(seeks) == 1 else f" WHERE ({') OR ('.join(seeks)})"
+    order_by = ", ".join(key_columns)
+
+    if engine == "Microsoft SQL Server":
+        query = f"SELECT TOP {batch_size} * FROM {table}{where} ORDER BY {order_by}"
+    elif engine == "Oracle":
+        query = f"SELECT * FROM {table}{where} ORDER BY {order_by} FETCH FIRST {batch_size} ROWS ONLY"
+    else:
+        query = f"SELECT * FROM {table}{where} ORDER BY {order_by} LIMIT {batch_size}"
+
+    return f"({query}) openetl_keyset"
+
+
+def build_incremental_query(table, cursor_column, lower_watermark=None, upper_watermark=None):
+    """
+    Builds a subquery selecting the rows of an incremental run, usable as a JDBC ``dbtable``.
+
+    Args:
+        table (str): The source table.
+        cursor_column (str): The column the watermark is kept on.
+        lower_watermark (optional): Exclusive lower bound, the watermark of the previous run.
+        upper_watermark (optional): Inclusive upper bound, probed when the run starts so rows written
+            during the run are left for the next one.
+
+    Returns:
+        str: An aliased subquery selecting the rows past the watermark.
+    """
+    conditions = []
+    if lower_watermark is not None:
+        conditions.append(f"{cursor_column} > {_sql_literal(lower_watermark)}")
+    if upper_watermark is not None:
+        conditions.append(f"{cursor_column} <= {_sql_literal(upper_watermark)}")
+
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"(SELECT * FROM {table}{where}) openetl_incremental"
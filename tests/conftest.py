@@ -0,0 +1,161 @@
+"""
+Shared fixtures of the OpenETL test suite.
+
+The package reads OPENETL_HOME when it is imported, it is pointed at a scratch directory so the tests
+leave no logs or jar cache in the checkout. Spark and HTTP are replaced by in-memory fakes: the tests
+cover the query building, batching and pagination logic, not the JVM or the network.
+"""
+import json
+import os
+import tempfile
+
+os.environ.setdefault("OPENETL_HOME", tempfile.mkdtemp(prefix="openetl-tests-"))
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeFrame:
+    """
+    A loaded JDBC DataFrame: its schema and the rows ``collect`` returns.
+    """
+
+    def __init__(self, schema=None, rows=()):
+        self.schema = schema
+        self.rows = list(rows)
+
+    def collect(self):
+        return self.rows
+
+
+class FakeSparkSession:
+    """
+    Records the options of every ``read.format(...).options(...).load()`` and answers it with
+    ``loader(options)``.
+    """
+
+    def __init__(self, loader, default_parallelism=4):
+        self.loader = loader
+        self.loads = []
+        self.sparkContext = type("SparkContext", (), {"defaultParallelism": default_parallelism})()
+
+    @property
+    def read(self):
+        return self
+
+    def format(self, source_format):
+        self.source_format = source_format
+        return self
+
+    def options(self, **options):
+        self.pending_options = options
+        return self
+
+    def load(self, *args):
+        self.loads.append(self.pending_options)
+        return self.loader(self.pending_options)
+
+
+class ArrowSession:
+    """
+    Records the Spark settings of pandas_to_spark and returns ``(df, schema)`` from ``createDataFrame``,
+    after failing its first ``failures`` calls.
+    """
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.settings = []
+        self.created = []
+        self.conf = type("Conf", (), {"set": lambda conf, name, value: self.settings.append((name, value))})()
+
+    def createDataFrame(self, df, schema):
+        self.created.append(df)
+        if len(self.created) <= self.failures:
+            raise ValueError("unsupported type")
+        return df, schema
+
+
+class FakeAdapter(BaseAdapter):
+    """
+    A requests transport answering every request with ``responder(request)``: a (status, body, headers)
+    tuple, the body JSON encoded unless it is bytes. The requests sent are kept in ``requests``.
+    """
+
+    def __init__(self, responder):
+        super().__init__()
+        self.responder = responder
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status, body, headers = self.responder(request)
+        response = requests.Response()
+        response.status_code = status
+        response._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+        response.headers.update(headers or {})
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def example_api(**attributes):
+    """
+    Returns an API connector for https://api.example.com, built like the connector modules of connectors/api
+    with ``attributes`` as class attributes, e.g. its ``pagination``.
+    """
+    from openetl_utils.main_api_class import API
+
+    connector = type("ExampleConnector", (API,), {"api": "example", "base_url": "https://api.example.com",
+                                                  "required_libs": [], **attributes})
+    return connector()
+
+
+def load_connector(name, connection_type="api"):
+    """
+    Returns the Connector of a connector module of the checkout, loaded like connector_utils does.
+    """
+    from openetl_utils.connector_utils import import_module
+
+    return import_module(name, f"{REPOSITORY}/connectors/{connection_type}/{name}.py")
+
+
+def fake_session(responder):
+    """
+    Returns a requests.Session sending every request to a FakeAdapter with ``responder``.
+    """
+    session = requests.Session()
+    session.mount("https://", FakeAdapter(responder))
+    return session
+
+
+@pytest.fixture
+def spark_connection():
+    from openetl_utils.spark_utils import SparkConnection
+
+    return SparkConnection("", {"spark.app.name": "tests"})
+
+
+@pytest.fixture
+def document_db():
+    """
+    A DatabaseUtils on an in-memory SQLite database holding the OpenETL batch tables (watermarks,
+    checkpoints, response caches and the schema registry).
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    from openetl_utils.__migrations__.batch import Base
+    from openetl_utils.database_utils import DatabaseUtils
+
+    db = DatabaseUtils()
+    db.engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(db.engine)
+    db.create_session()
+    yield db
+    db.close_session()
@@ -0,0 +1,84 @@
+from openetl_utils.bulk_load_utils import _csv_field, _qualify, get_bulk_loader, mysql_bulk_load, \
+    postgres_bulk_load, sqlserver_bulk_load
+
+CREDENTIALS = {"hostname": "localhost", "port": "5432", "username": "etl", "password": "", "database": "dwh",
+               "schema": "sales"}
+
+
+class FakeConnection:
+    """
+    A DB-API connection recording the statements and the data sent to it.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self.committed = self.closed = False
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def copy_expert(self, statement, buffer):
+        self.statements.append((statement, buffer.read()))
+
+    def execute(self, statement, params=None):
+        data = None
+        if statement.startswith("LOAD DATA"):
+            with open(params[0], encoding="utf-8") as file:
+                data = file.read()
+        self.statements.append((statement, data))
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        self.closed = True
+
+
+def test_csv_fields_quote_values_and_write_nulls_bare():
+    assert _csv_field(None, "NULL") == "NULL"
+    assert _csv_field('say "hi"', "") == '"say ""hi"""'
+    assert _csv_field(True, "") == '"1"'
+    assert _csv_field({"a": 1}, "") == '"{""a"": 1}"'
+
+
+def test_tables_are_qualified_with_the_target_schema():
+    assert _qualify("users", CREDENTIALS) == "sales.users"
+    assert _qualify("other.users", CREDENTIALS) == "other.users"
+    assert _qualify("users", {}) == "users"
+
+
+def test_bulk_loaders_by_engine():
+    assert get_bulk_loader("PostgreSQL") is postgres_bulk_load
+    assert get_bulk_loader("MariaDB") is mysql_bulk_load
+    assert get_bulk_loader("Microsoft SQL Server") is sqlserver_bulk_load
+    assert get_bulk_loader("Oracle") is None
+
+
+def test_postgres_bulk_load_copies_chunks_into_the_qualified_table(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr("psycopg2.connect", lambda **kwargs: connection)
+
+    postgres_bulk_load([(1, "a"), (2, None), (3, "c")], "users", ["id", "name"], CREDENTIALS, chunk_size=2)
+
+    statement = 'COPY "sales"."users" ("id", "name") FROM STDIN WITH (FORMAT csv)'
+    assert connection.statements == [(statement, '"1","a"\n"2",\n'), (statement, '"3","c"\n')]
+    assert connection.committed and connection.closed
+
+
+def test_mysql_bulk_load_loads_a_file_per_chunk(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr("pymysql.connect", lambda **kwargs: connection)
+
+    mysql_bulk_load([(1, None)], "users", ["id", "name"], CREDENTIALS)
+
+    statement, data = connection.statements[0]
+    assert statement.startswith("LOAD DATA LOCAL INFILE %s INTO TABLE `sales`.`users`")
+    assert statement.endswith("(`id`, `name`)")
+    assert data == '"1",NULL\n'
+    assert connection.committed and connection.closed
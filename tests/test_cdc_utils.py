@@ -0,0 +1,101 @@
+import pytest
+
+from openetl_utils.cdc_utils import MySQLCDCReader, compact_changes, get_cdc_reader, replica_server_id
+
+
+def test_compact_changes_keeps_the_latest_image_per_key():
+    events = [{"op": "insert", "data": {"id": 1, "name": "a"}},
+              {"op": "update", "data": {"id": 1, "name": "b"}},
+              {"op": "insert", "data": {"id": 2, "name": "c"}},
+              {"op": "delete", "data": {"id": 2}}]
+
+    upserts, keys = compact_changes(events, ["id"])
+
+    assert upserts == [{"id": 1, "name": "b"}]
+    assert keys == [(1,), (2,)]
+
+
+def test_replica_server_id_is_stable_and_clear_of_real_replicas():
+    server_ids = {replica_server_id(f"integration-{index}") for index in range(100)}
+
+    assert replica_server_id("integration-1") == replica_server_id("integration-1")
+    assert len(server_ids) == 100
+    assert all(65536 <= server_id < 2 ** 32 for server_id in server_ids)
+
+
+def test_get_cdc_reader_rejects_engines_without_a_change_log():
+    with pytest.raises(NotImplementedError):
+        get_cdc_reader("Oracle")
+
+
+class FakeBinLogStream:
+    """
+    Replays ``(event, log_file, log_pos)`` tuples, exposing the position after each event as the
+    python-mysql-replication stream does.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.closed = False
+
+    def __iter__(self):
+        for event, self.log_file, self.log_pos in self.entries:
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+def binlog_event(event_class, rows=()):
+    event = event_class.__new__(event_class)
+    event._RowsEvent__rows = list(rows)  # rows are decoded lazily from the packet otherwise
+    return event
+
+
+@pytest.fixture
+def mysql_reader(monkeypatch):
+    pytest.importorskip("pymysqlreplication")
+    reader = MySQLCDCReader.__new__(MySQLCDCReader)
+    reader.credentials = {"hostname": "localhost", "port": 3306, "username": "etl", "password": ""}
+    reader.schema, reader.table, reader.server_id = "shop", "orders", 1001
+
+    def replay(entries):
+        stream = FakeBinLogStream(entries)
+        monkeypatch.setattr("pymysqlreplication.BinLogStreamReader", lambda **kwargs: stream)
+        return stream
+    return reader, replay
+
+
+def test_mysql_batches_are_cut_at_commits(mysql_reader):
+    from pymysqlreplication.event import XidEvent
+    from pymysqlreplication.row_event import WriteRowsEvent, DeleteRowsEvent
+
+    reader, replay = mysql_reader
+    stream = replay([(binlog_event(WriteRowsEvent, [{"values": {"id": 1}}, {"values": {"id": 2}}]), "bin.1", 200),
+                     (binlog_event(XidEvent), "bin.1", 300),
+                     (binlog_event(DeleteRowsEvent, [{"values": {"id": 1}}]), "bin.1", 400),
+                     (binlog_event(XidEvent), "bin.1", 500),
+                     # a transaction without its commit yet is read again by the next run
+                     (binlog_event(WriteRowsEvent, [{"values": {"id": 3}}]), "bin.1", 600)])
+
+    batches = list(reader.read_changes("bin.1:100", batch_size=2))
+
+    assert batches == [([{"op": "insert", "data": {"id": 1}}, {"op": "insert", "data": {"id": 2}}], "bin.1:300"),
+                       ([{"op": "delete", "data": {"id": 1}}], "bin.1:500")]
+    assert stream.closed
+
+
+def test_mysql_position_advances_over_commits_of_other_tables(mysql_reader):
+    from pymysqlreplication.event import XidEvent, RotateEvent
+
+    reader, replay = mysql_reader
+    replay([(binlog_event(XidEvent), "bin.1", 300), (binlog_event(RotateEvent), "bin.2", 4)])
+
+    assert list(reader.read_changes("bin.1:100")) == [([], "bin.2:4")]
+
+
+def test_mysql_idle_log_yields_nothing(mysql_reader):
+    reader, replay = mysql_reader
+    replay([])
+
+    assert list(reader.read_changes("bin.1:100")) == []
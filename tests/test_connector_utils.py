@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from openetl_utils.connector_utils import prefetch, page_to_df
+from openetl_utils.main_api_class import Page
+from tests.conftest import example_api
+
+
+def test_prefetch_yields_the_items_in_order():
+    assert list(prefetch(iter(range(10)), depth=3)) == list(range(10))
+    assert list(prefetch(iter(range(3)), depth=0)) == [0, 1, 2]
+
+
+def test_prefetch_reads_ahead_in_another_thread():
+    threads = []
+
+    def pages():
+        for page in range(3):
+            threads.append(threading.current_thread())
+            yield page
+
+    assert list(prefetch(pages(), depth=2)) == [0, 1, 2]
+    assert threading.current_thread() not in threads
+
+
+def test_prefetch_raises_the_errors_of_the_iterable():
+    def pages():
+        yield 1
+        raise ConnectionError("reset by peer")
+
+    consumed = []
+    with pytest.raises(ConnectionError, match="reset by peer"):
+        for page in prefetch(pages(), depth=2):
+            consumed.append(page)
+    assert consumed == [1]
+
+
+def test_closing_prefetch_stops_the_producer():
+    produced = []
+
+    def pages():
+        for page in range(100):
+            produced.append(page)
+            yield page
+
+    items = prefetch(pages(), depth=1)
+    next(items)
+    items.close()
+    time.sleep(0.3)
+    count = len(produced)
+    time.sleep(0.3)
+
+    assert count < 100 and len(produced) == count
+
+
+def test_page_to_df_passes_the_resume_state_on():
+    api = example_api()
+
+    df = page_to_df(api, Page({"id": [1, 2]}, resume_state={"position": "abc"}))
+
+    assert df["id"].tolist() == [1, 2]
+    assert df.attrs["resume_state"] == {"position": "abc"}
+    assert "resume_state" not in page_to_df(api, {"id": [1]}).attrs
+
+
+def test_pages_fetched_in_parallel_are_yielded_in_order():
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def fetch_page(page):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        # later pages answer first
+        time.sleep(0.05 / page)
+        with lock:
+            in_flight[0] -= 1
+        return [page] if page <= 7 else []
+
+    pages = list(example_api().fetch_pages_in_parallel(fetch_page, concurrency=3))
+
+    assert pages == [[page] for page in range(1, 8)]
+    assert peak[0] <= 3
+
+
+def test_pages_fetched_in_parallel_by_offset_stop_at_the_last_page():
+    requested = []
+
+    def fetch_page(offset):
+        requested.append(offset)
+        return {"offset": offset, "records": 100 if offset < 300 else 0}
+
+    pages = list(example_api().fetch_pages_in_parallel(fetch_page, first_page=0, step=100, concurrency=2,
+                                               is_last_page=lambda page: not page["records"]))
+
+    assert [page["offset"] for page in pages] == [0, 100, 200]
+    # a sliding window wastes at most concurrency - 1 requests past the end
+    assert sorted(requested) == [0, 100, 200, 300, 400]
@@ -0,0 +1,233 @@
+import pandas as pd
+import pytest
+
+from tests.conftest import fake_session, load_connector
+
+SALESFORCE = "https://acme.my.salesforce.com/services/data/v62.0"
+
+ACCOUNT_FIELDS = [{"name": "Id", "type": "id"}, {"name": "NumberOfEmployees", "type": "int"},
+                  {"name": "AnnualRevenue", "type": "currency"}, {"name": "IsDeleted", "type": "boolean"},
+                  {"name": "BillingAddress", "type": "address"}, {"name": "BillingCity", "type": "string"},
+                  {"name": "SystemModstamp", "type": "datetime"}]
+
+
+def record_ids(pages):
+    """
+    The ids of the records of flattened pages, a page of one record holds its id alone.
+    """
+    return [record_id for page in pages for record_id in (page["id"] if isinstance(page["id"], list) else [page["id"]])]
+
+
+@pytest.fixture
+def salesforce():
+    connector = load_connector("salesforce")
+    connector.base_url = SALESFORCE
+    return connector
+
+
+def salesforce_bulk(result_pages=None):
+    """
+    Answers a Bulk API 2.0 query job of Account, with its results in result pages or, when ``result_pages``
+    is None, by locator.
+    """
+    chunks = ["Id,NumberOfEmployees,AnnualRevenue,IsDeleted,BillingCity\n001,12,1000.5,false,Paris\n",
+              "Id,NumberOfEmployees,AnnualRevenue,IsDeleted,BillingCity\n002,,,true,\n"]
+
+    def respond(request):
+        path = request.url.split("?")[0]
+        if path.endswith("/describe"):
+            return 200, {"fields": ACCOUNT_FIELDS}, {}
+        if path.endswith("/jobs/query"):
+            return 200, {"id": "750"}, {}
+        if path.endswith("/jobs/query/750"):
+            return 200, {"id": "750", "state": "JobComplete"}, {}
+        if path.endswith("/resultPages"):
+            if result_pages is None:
+                return 404, {}, {}
+            return 200, {"resultPages": [{"resultLink": link} for link in result_pages]}, {}
+        if path.endswith("/results"):
+            if "locator=" in request.url:
+                return 200, chunks[1].encode(), {"Sforce-Locator": "null"}
+            return 200, chunks[0].encode(), {"Sforce-Locator": "MjAwMA"}
+        if "/results/" in path:
+            return 200, chunks[int(path[-1])].encode(), {}
+        return 404, {}, {}
+    return respond
+
+
+def test_salesforce_soql_selects_every_field_but_compound_ones(salesforce):
+    session = fake_session(salesforce_bulk())
+
+    soql = salesforce.build_soql(session, "Account", {"cursor_column": "SystemModstamp",
+                                                      "watermark": "2024-01-02 03:04:05.678+01:00"})
+
+    assert soql == "SELECT Id, NumberOfEmployees, AnnualRevenue, IsDeleted, BillingCity, SystemModstamp " \
+                   "FROM Account WHERE SystemModstamp > 2024-01-02T02:04:05.678Z"
+
+
+@pytest.mark.parametrize("result_pages", [None, ["/services/data/v62.0/jobs/query/750/results/0",
+                                                 "/services/data/v62.0/jobs/query/750/results/1"]])
+def test_salesforce_bulk_results_are_typed_like_rest_records(salesforce, result_pages):
+    salesforce.query_mode = "bulk"
+
+    df = pd.concat(salesforce.fetch_data(fake_session(salesforce_bulk(result_pages)), "get_all_accounts"),
+                   ignore_index=True)
+
+    assert df["Id"].tolist() == ["001", "002"]
+    assert df["NumberOfEmployees"].dtype == "Int64" and df["NumberOfEmployees"].tolist()[0] == 12
+    assert df["AnnualRevenue"].tolist()[0] == 1000.5 and pd.isna(df["AnnualRevenue"][1])
+    assert df["IsDeleted"].tolist() == [False, True]
+    assert df["BillingCity"].tolist()[0] == "Paris" and pd.isna(df["BillingCity"][1])
+
+
+def test_salesforce_pages_through_the_rest_api_by_default(salesforce):
+    def respond(request):
+        if "query-2" in request.url:
+            return 200, {"records": [{"Id": "002"}], "done": True, "totalSize": 2}, {}
+        return 200, {"records": [{"Id": "001"}], "done": False, "totalSize": 2,
+                     "nextRecordsUrl": f"{SALESFORCE}/query/query-2"}, {}
+
+    pages = list(salesforce.fetch_data(fake_session(respond), "get_all_accounts"))
+
+    assert [page["Id"] for page in pages] == ["001", "002"]
+    assert pages[0].resume_state["position"] == f"{SALESFORCE}/query/query-2"
+    assert pages[1].resume_state is None
+
+
+def hubspot_search(dates):
+    """
+    Answers the search API of deals over records modified at ``dates`` (epoch milliseconds), like HubSpot:
+    sorted, filtered on hs_lastmodifieddate and paged with ``after`` offsets.
+    """
+    import json
+
+    records = [{"id": str(index), "properties": {"hs_lastmodifieddate": str(date)}} for index, date in enumerate(dates)]
+    bodies = []
+
+    def respond(request):
+        body = json.loads(request.body)
+        bodies.append(body)
+        condition = body["filterGroups"][0]["filters"][0]
+        since = int(condition["value"])
+        matches = [record for record in records if int(record["properties"]["hs_lastmodifieddate"]) > since
+                   or (condition["operator"] == "GTE" and int(record["properties"]["hs_lastmodifieddate"]) == since)]
+        offset = int(body.get("after", 0))
+        page = {"total": len(matches), "results": matches[offset:offset + body["limit"]]}
+        if offset + body["limit"] < len(matches):
+            page["paging"] = {"next": {"after": str(offset + body["limit"]), "link": "https://api.hubapi.com/next"}}
+        return 200, page, {}
+    return respond, bodies
+
+
+@pytest.fixture
+def hubspot():
+    connector = load_connector("hubspot")
+    # a 4 result window of 2 result pages, instead of 10,000 results of 200
+    connector.search_limit, connector.search_max_results = 2, 4
+    connector.search_rate_limit = {"requests": 1000, "per": 1}
+    return connector
+
+
+def test_hubspot_incremental_runs_search_past_the_result_window(hubspot):
+    respond, bodies = hubspot_search([1000, 2000, 3000, 4000, 5000, 6000, 7000])
+
+    pages = list(hubspot.fetch_data(fake_session(respond), "get_all_deals", properties=["dealname"],
+                                    incremental={"cursor_column": "hs_lastmodifieddate", "watermark": 1000}))
+
+    # the search restarts at the last modification date it reached, whose records come twice
+    assert record_ids(pages) == ["1", "2", "3", "4", "4", "5", "6"]
+    assert bodies[0]["filterGroups"][0]["filters"][0] == {"propertyName": "hs_lastmodifieddate", "operator": "GT",
+                                                          "value": "1000"}
+    assert bodies[2]["filterGroups"][0]["filters"][0]["operator"] == "GTE"
+    assert bodies[0]["properties"] == ["dealname", "hs_lastmodifieddate"]
+    assert all("paging_next_after" not in page for page in pages)
+
+
+def test_hubspot_search_skips_a_date_shared_by_more_records_than_the_window(hubspot, caplog):
+    respond, bodies = hubspot_search([1000, 2000, 2000, 2000, 2000, 2000, 2000, 3000])
+
+    pages = list(hubspot.fetch_data(fake_session(respond), "get_all_deals",
+                                    incremental={"cursor_column": "hs_lastmodifieddate", "watermark": 0}))
+
+    assert pages[-1]["id"] == "7"
+    assert "some of them are skipped" in caplog.text
+
+
+def test_hubspot_full_runs_walk_the_list_endpoint(hubspot):
+    def respond(request):
+        assert request.method == "GET" and "/crm/v3/objects/deals" in request.url
+        if "after=" in request.url:
+            return 200, {"results": [{"id": "2"}]}, {}
+        return 200, {"results": [{"id": "1"}], "paging": {"next": {"after": "1"}}}, {}
+
+    pages = list(hubspot.fetch_data(fake_session(respond), "get_all_deals"))
+
+    assert [page["id"] for page in pages] == ["1", "2"]
+    assert pages[0].resume_state["position"] == "1"
+
+
+@pytest.mark.parametrize("watermark, expected", [(1700000000000, 1700000000000), ("1700000000000", 1700000000000),
+                                                 ("2023-11-14 22:13:20", 1700000000000),
+                                                 ("2023-11-14T23:13:20+01:00", 1700000000000)])
+def test_hubspot_watermarks_are_converted_to_epoch_millis(hubspot, watermark, expected):
+    assert hubspot.to_epoch_millis(watermark) == expected
+
+
+@pytest.fixture
+def freshdesk():
+    connector = load_connector("freshdesk")
+    connector.base_url = "https://acme.freshdesk.com"
+    connector.pagination = {**connector.pagination, "page_size": 2}
+    return connector
+
+
+def freshdesk_tickets(count, ignore_page=False):
+    """
+    Answers the ticket list of Freshdesk over ``count`` tickets, ignoring the page parameter like an endpoint
+    without pagination when ``ignore_page`` is set.
+    """
+    from urllib.parse import parse_qs, urlsplit
+
+    requested = []
+
+    def respond(request):
+        params = {key: values[0] for key, values in parse_qs(urlsplit(request.url).query).items()}
+        requested.append(params)
+        page = 1 if ignore_page else int(params["page"])
+        size = int(params["per_page"])
+        return 200, [{"id": index} for index in range((page - 1) * size + 1, min(page * size, count) + 1)], {}
+    return respond, requested
+
+
+def test_freshdesk_lists_tickets_updated_since_the_watermark(freshdesk):
+    respond, requested = freshdesk_tickets(5)
+
+    pages = list(freshdesk.fetch_data(fake_session(respond), "get_all_tickets",
+                                      incremental={"cursor_column": "updated_at",
+                                                   "watermark": "2024-03-01T12:00:00+02:00"}))
+
+    assert record_ids(pages) == [1, 2, 3, 4, 5]
+    assert requested[0] == {"updated_since": "2024-03-01T10:00:00Z", "order_by": "updated_at", "order_type": "asc",
+                            "page": "1", "per_page": "2"}
+    # the last page is short, so the resume state of its page is None
+    assert [page.resume_state and page.resume_state["position"] for page in pages] == [2, 3, None]
+
+
+def test_freshdesk_full_runs_list_tickets_since_the_epoch(freshdesk):
+    respond, requested = freshdesk_tickets(2)
+
+    list(freshdesk.fetch_data(fake_session(respond), "get_all_tickets"))
+    list(freshdesk.fetch_data(fake_session(respond), "get_all_contacts"))
+
+    assert requested[0]["updated_since"] == "1970-01-01T00:00:00Z"
+    assert requested[-1]["_updated_since"] == "1970-01-01T00:00:00Z" and "order_by" not in requested[-1]
+
+
+def test_freshdesk_paging_stops_when_the_endpoint_ignores_the_page(freshdesk, caplog):
+    respond, requested = freshdesk_tickets(10, ignore_page=True)
+
+    pages = list(freshdesk.fetch_data(fake_session(respond), "get_all_tickets"))
+
+    assert record_ids(pages) == [1, 2]
+    assert "repeats the previous page" in caplog.text
+    assert len(requested) <= 1 + freshdesk.page_concurrency
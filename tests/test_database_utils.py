@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_watermark_round_trip(document_db):
+    assert document_db.get_watermark("integration", "updated_at") is None
+
+    document_db.set_watermark("integration", "updated_at", "2024-01-01", run_id="run-1")
+    document_db.set_watermark("integration", "updated_at", "2024-02-01", run_id="run-2")
+
+    assert document_db.get_watermark("integration", "updated_at") == "2024-02-01"
+
+
+def test_watermark_of_another_cursor_column_is_ignored(document_db):
+    document_db.set_watermark("integration", "updated_at", "2024-01-01")
+
+    assert document_db.get_watermark("integration", "id") is None
+
+
+def test_staged_watermark_is_discarded_with_its_batch(document_db):
+    document_db.set_watermark("integration", "id", "10")
+    document_db.set_watermark("integration", "id", "20", commit=False)
+    document_db.session.rollback()
+
+    assert document_db.get_watermark("integration", "id") == "10"
+
+
+def test_merge_query_upserts_on_the_key_columns():
+    from openetl_utils.database_utils import build_merge_query
+
+    assert build_merge_query("PostgreSQL", "sales.users", "sales.users_stage", ["id", "name"], ["id"]) == \
+        "INSERT INTO sales.users (id, name) SELECT DISTINCT ON (id) id, name FROM sales.users_stage " \
+        "ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name"
+    assert build_merge_query("MySQL", "users", "users_stage", ["id", "name"], ["id"]) == \
+        "INSERT INTO users (id, name) SELECT id, name FROM users_stage ON DUPLICATE KEY UPDATE name = VALUES(name)"
+
+
+def test_merge_query_deduplicates_the_batch_on_sql_server():
+    from openetl_utils.database_utils import build_merge_query
+
+    query = build_merge_query("Microsoft SQL Server", "users", "users_stage", ["id", "region", "name"],
+                              ["id", "region"])
+
+    assert "ROW_NUMBER() OVER (PARTITION BY id, region ORDER BY id, region)" in query
+    assert "ON target.id = source.id AND target.region = source.region" in query
+    assert "WHEN MATCHED THEN UPDATE SET name = source.name" in query
+    assert query.endswith("VALUES (source.id, source.region, source.name);")
+
+
+def test_merge_query_of_a_key_only_table_inserts_missing_rows():
+    from openetl_utils.database_utils import build_merge_query
+
+    assert build_merge_query("PostgreSQL", "tags", "tags_stage", ["id"], ["id"]).endswith("ON CONFLICT (id) DO NOTHING")
+    assert build_merge_query("MariaDB", "tags", "tags_stage", ["id"], ["id"]).endswith("UPDATE id = VALUES(id)")
+    assert "WHEN MATCHED" not in build_merge_query("Snowflake", "tags", "tags_stage", ["id"], ["id"])
+
+
+def test_merge_query_rejects_unsupported_engines():
+    from openetl_utils.database_utils import build_merge_query
+
+    with pytest.raises(NotImplementedError):
+        build_merge_query("SQLite", "users", "users_stage", ["id"], ["id"])
+
+
+def test_qualify_table_name_keeps_qualified_names():
+    from openetl_utils.database_utils import qualify_table_name
+
+    assert qualify_table_name("users", "sales") == "sales.users"
+    assert qualify_table_name("crm.users", "sales") == "crm.users"
+    assert qualify_table_name("users") == "users"
+
+
+def test_staging_table_copies_the_target_columns(document_db):
+    from sqlalchemy import inspect, text
+
+    with document_db.engine.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("INSERT INTO users VALUES (1, 'ada')"))
+
+    document_db.create_staging_table("users", "users_stage", "SQLite")
+    columns = [column["name"] for column in inspect(document_db.engine).get_columns("users_stage")]
+    with document_db.engine.connect() as connection:
+        rows = connection.execute(text("SELECT COUNT(*) FROM users_stage")).scalar()
+
+    assert (columns, rows) == (["id", "name"], 0)
+
+    document_db.drop_staging_table("users_stage")
+    document_db.drop_staging_table("users_stage")
+    assert not inspect(document_db.engine).has_table("users_stage")
+
+
+def test_registered_schema_versions_are_numbered_per_source_table(document_db):
+    assert document_db.get_registered_schema("integration", "contacts") is None
+
+    document_db.register_schema("integration", "contacts", {"type": "struct", "fields": []}, run_id="run-1")
+    document_db.register_schema("integration", "contacts", {"type": "struct", "fields": []}, run_id="run-2")
+    document_db.register_schema("integration", "deals", {"type": "struct", "fields": []})
+
+    latest = document_db.get_registered_schema("integration", "contacts")
+    assert (latest.version, latest.run_id) == (2, "run-2")
+    assert document_db.get_registered_schema("integration", "deals").version == 1
+
+
+@pytest.mark.parametrize("values, expected", [
+    (["a", "b"], str), ([1, 2], int), ([1.5, None], float), ([True, False], int), ([b"a"], bytes),
+    ([[1], [2, 3]], list), ([{"a": 1}, {"a": 2, "b": [1]}], dict), ([[1], {"a": 1}, [2]], list),
+    (["a", 1, 2], int), (["a", 1, "b", 2.5], str),
+])
+def test_infer_majority_type(values, expected):
+    from openetl_utils.database_utils import infer_majority_type
+
+    assert infer_majority_type(pd.Series(values)) is expected
+
+
+def test_infer_majority_type_of_temporal_columns():
+    from openetl_utils.database_utils import infer_majority_type
+
+    assert infer_majority_type(pd.Series(pd.to_datetime(["2024-01-01"]))) is np.datetime64
+    assert infer_majority_type(pd.Series(pd.to_timedelta(["1 day"]))) is np.timedelta64
+
+
+def test_infer_majority_type_only_looks_at_the_sample():
+    from openetl_utils.database_utils import infer_majority_type
+
+    assert infer_majority_type(pd.Series([1, 2, "a", "b", "c"], dtype=object), sample_size=2) is int
+
+
+@pytest.fixture
+def column_types(monkeypatch):
+    from cachetools import LRUCache
+
+    from openetl_utils.database_utils import DatabaseUtils
+
+    monkeypatch.setattr(DatabaseUtils, "_column_types", LRUCache(maxsize=100))
+    return DatabaseUtils._column_types
+
+
+def test_cast_columns_reuses_the_types_of_a_table(document_db, column_types):
+    document_db.cast_columns(pd.DataFrame({"id": [1, 2], "tags": [["a"], ["b"]]}), cache_key="contacts")
+    df = document_db.cast_columns(pd.DataFrame({"id": ["3"], "tags": [["c"]]}), cache_key="contacts")
+
+    assert df["id"].tolist() == [3]
+    assert df["tags"].tolist() == ["['c']"]
+    assert {key[2:] for key in column_types} == {("contacts", "id"), ("contacts", "tags")}
+
+
+def test_cast_columns_keys_types_by_schema_and_forgets_them(document_db, column_types):
+    document_db.cast_columns(pd.DataFrame({"id": [1]}), cache_key="contacts", schema_name="crm")
+    document_db.cast_columns(pd.DataFrame({"id": ["a"]}), cache_key="contacts", schema_name="sales")
+
+    df = document_db.cast_columns(pd.DataFrame({"id": ["1"]}), cache_key="contacts", schema_name="sales")
+    assert df["id"].tolist() == ["1"]
+
+    document_db.forget_column_types("contacts", "sales")
+    assert [key[1] for key in column_types] == ["crm"]
+
+
+def test_checkpoint_of_another_source_table_is_ignored(document_db):
+    state = {"style": "cursor", "position": "abc", "page_size": 100}
+    document_db.set_checkpoint("integration", "contacts", state, run_id="run-1")
+
+    assert document_db.get_checkpoint("integration", "contacts") == state
+    assert document_db.get_checkpoint("integration", "deals") is None
+
+
+def test_checkpoint_is_cleared_once_the_source_is_read(document_db):
+    document_db.set_checkpoint("integration", "contacts", {"style": "page", "position": 3, "page_size": 100})
+    document_db.set_checkpoint("integration", "contacts", None)
+
+    assert document_db.get_checkpoint("integration", "contacts") is None
+
+
+def test_staged_checkpoint_is_discarded_with_its_batch(document_db):
+    document_db.set_checkpoint("integration", "contacts", {"style": "page", "position": 2, "page_size": 100})
+    document_db.set_checkpoint("integration", "contacts", {"style": "page", "position": 3, "page_size": 100},
+                               commit=False)
+    document_db.session.rollback()
+
+    assert document_db.get_checkpoint("integration", "contacts")["position"] == 2
+
+
+def test_response_cache_round_trip(document_db):
+    entries = {"https://api.example.com/contacts?limit=100": {"etag": '"v1"', "last_modified": None, "records": 100,
+                                                              "next": "abc"}}
+
+    assert document_db.get_response_cache("integration") == {}
+    document_db.set_response_cache("integration", entries, run_id="run-1")
+    document_db.set_response_cache("integration", {**entries, "https://api.example.com/x": {"etag": '"v2"'}})
+
+    assert set(document_db.get_response_cache("integration")) == {"https://api.example.com/contacts?limit=100",
+                                                                  "https://api.example.com/x"}
@@ -0,0 +1,94 @@
+import pytest
+
+from openetl_utils import jar_utils
+
+POM = """<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <properties>
+    <slf4j.version>2.0.9</slf4j.version>
+    <api.version>${slf4j.version}</api.version>
+  </properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency><groupId>com.google.protobuf</groupId><artifactId>protobuf-java</artifactId>
+        <version>3.25.1</version></dependency>
+    </dependencies>
+  </dependencyManagement>
+  <dependencies>
+    <dependency><groupId>org.slf4j</groupId><artifactId>slf4j-api</artifactId>
+      <version>${api.version}</version></dependency>
+    <dependency><groupId>com.google.protobuf</groupId><artifactId>protobuf-java</artifactId></dependency>
+    <dependency><groupId>junit</groupId><artifactId>junit</artifactId><version>4.13</version>
+      <scope>test</scope></dependency>
+    <dependency><groupId>com.oracle</groupId><artifactId>ojdbc</artifactId><version>1</version>
+      <optional>true</optional></dependency>
+  </dependencies>
+</project>
+"""
+
+EMPTY_POM = "<project><dependencies/></project>"
+
+
+@pytest.fixture
+def jar_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(jar_utils, "jars_directory", str(tmp_path))
+
+    def cache(coordinate, pom=EMPTY_POM, jar=True):
+        if jar:
+            open(jar_utils.jar_path(coordinate), "wb").close()
+        with open(jar_utils.pom_path(coordinate), "w") as file:
+            file.write(pom)
+    return cache
+
+
+def test_jar_path_of_a_coordinate(jar_cache):
+    assert jar_utils.jar_path("org.postgresql:postgresql:42.7.4") == f"{jar_utils.jars_directory}/postgresql-42.7.4.jar"
+    assert jar_utils.pom_path("org.postgresql:postgresql:42.7.4").endswith("/postgresql-42.7.4.pom")
+    assert jar_utils.jar_path("org.postgresql:postgresql") is None
+
+
+def test_read_dependencies_expands_properties_and_skips_test_and_optional_scopes(jar_cache):
+    jar_cache("com.mysql:mysql-connector-j:9.1.0", POM)
+
+    assert jar_utils.read_dependencies("com.mysql:mysql-connector-j:9.1.0", offline=True) == \
+        ["org.slf4j:slf4j-api:2.0.9", "com.google.protobuf:protobuf-java:3.25.1"]
+
+
+@pytest.mark.parametrize("version", ["", "${parent.version}", "[1.0,2.0)"])
+def test_read_dependencies_rejects_unpinned_versions(jar_cache, version):
+    jar_cache("com.example:driver:1.0", "<project><dependencies><dependency><groupId>com.example</groupId>"
+                                        f"<artifactId>core</artifactId><version>{version}</version>"
+                                        "</dependency></dependencies></project>")
+
+    with pytest.raises(ValueError, match="does not pin the version"):
+        jar_utils.read_dependencies("com.example:driver:1.0", offline=True)
+
+
+def test_read_dependencies_offline_without_a_pom(jar_cache):
+    with pytest.raises(ValueError, match="not in the jar cache"):
+        jar_utils.read_dependencies("com.example:driver:1.0", offline=True)
+
+
+def test_resolve_jars_offline_leaves_uncached_drivers_to_spark(jar_cache):
+    jar_cache("com.mysql:mysql-connector-j:9.1.0", POM)
+    jar_cache("org.slf4j:slf4j-api:2.0.9")
+    jar_cache("com.google.protobuf:protobuf-java:3.25.1")
+
+    paths, unresolved = jar_utils.resolve_jars("com.mysql:mysql-connector-j:9.1.0, org.postgresql:postgresql:42.7.4,"
+                                               "invalid", offline=True)
+
+    assert [path.rsplit("/", 1)[-1] for path in paths] == \
+        ["mysql-connector-j-9.1.0.jar", "slf4j-api-2.0.9.jar", "protobuf-java-3.25.1.jar"]
+    assert unresolved == ["org.postgresql:postgresql:42.7.4", "invalid"]
+
+
+def test_cached_driver_jars_needs_the_whole_dependency_tree(jar_cache, monkeypatch):
+    monkeypatch.setattr(jar_utils, "jdbc_database_jars", {"MySQL": "com.mysql:mysql-connector-j:9.1.0",
+                                                          "PostgreSQL": "org.postgresql:postgresql:42.7.4"})
+    jar_cache("com.mysql:mysql-connector-j:9.1.0", POM)
+    jar_cache("org.slf4j:slf4j-api:2.0.9")
+    jar_cache("org.postgresql:postgresql:42.7.4")
+
+    assert jar_utils.cached_driver_jars() == ["org.postgresql:postgresql:42.7.4"]
+
+    jar_cache("com.google.protobuf:protobuf-java:3.25.1")
+    assert jar_utils.cached_driver_jars() == ["com.mysql:mysql-connector-j:9.1.0", "org.postgresql:postgresql:42.7.4"]
@@ -0,0 +1,491 @@
+import pytest
+
+from openetl_utils import main_api_class
+from openetl_utils.main_api_class import RateLimitedSession, TokenBucket
+from tests.conftest import FakeAdapter
+
+
+class FakeClock:
+    """
+    Stands in for the time module of main_api_class: sleeping moves the clock forward.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(main_api_class, "time", clock)
+    monkeypatch.setattr(main_api_class.random, "uniform", lambda low, high: high)
+    return clock
+
+
+def test_token_bucket_allows_bursts_then_the_rate(clock):
+    bucket = TokenBucket(requests=2, per=1)
+
+    for _ in range(4):
+        bucket.acquire()
+
+    assert bucket.rate == 2
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_paused_token_bucket_holds_requests(clock):
+    bucket = TokenBucket(requests=10, per=1)
+
+    bucket.pause(3)
+    bucket.pause(1)
+    bucket.acquire()
+
+    assert clock.now == pytest.approx(1003)
+
+
+def test_token_bucket_resizes_to_the_reported_limit(clock):
+    bucket = TokenBucket(requests=10, per=1)
+
+    bucket.resize(4)
+    assert (bucket.capacity, bucket.tokens) == (4, 4)
+    bucket.resize(0)
+    assert bucket.capacity == 4
+
+
+def test_rate_limiters_are_shared_per_account():
+    first = main_api_class.get_rate_limiter(("tests", "https://api.example.com", "account"), {"requests": 5, "per": 1})
+    second = main_api_class.get_rate_limiter(("tests", "https://api.example.com", "account"), {"requests": 9, "per": 1})
+
+    assert first is second and first.capacity == 5
+
+
+def session_with(responses, **kwargs):
+    session = RateLimitedSession(**kwargs)
+    adapter = FakeAdapter(lambda request: responses.pop(0))
+    session.mount("https://", adapter)
+    return session, adapter
+
+
+def test_throttled_requests_are_retried_after_retry_after(clock):
+    session, adapter = session_with([(429, {}, {"Retry-After": "2"}), (200, {"ok": True}, {})],
+                                    limiter=TokenBucket(10, 1))
+
+    response = session.get("https://api.example.com/contacts")
+
+    assert response.json() == {"ok": True} and len(adapter.requests) == 2
+    # the bucket is held for the delay plus up to a second of jitter
+    assert clock.now == pytest.approx(1003)
+
+
+def test_server_errors_are_only_retried_for_idempotent_requests(clock):
+    session, adapter = session_with([(502, {}, {}), (200, {}, {})])
+    assert session.get("https://api.example.com/contacts").status_code == 200
+    assert clock.sleeps == [1.0]
+
+    session, adapter = session_with([(502, {}, {}), (200, {}, {})])
+    assert session.post("https://api.example.com/search").status_code == 502
+
+    session, adapter = session_with([(503, {}, {}), (200, {}, {})])
+    assert session.post("https://api.example.com/search").status_code == 200
+
+
+def test_retries_give_up_after_max_retries(clock):
+    session, adapter = session_with([(500, {}, {})] * 3, max_retries=2, backoff_cap=1.5)
+
+    assert session.get("https://api.example.com/contacts").status_code == 500
+    assert clock.sleeps == [1.0, 1.5]
+
+
+def test_retry_after_in_seconds_or_as_a_date(clock):
+    def response(value):
+        return type("Response", (), {"headers": {"Retry-After": value} if value else {}})()
+
+    clock.now = 1700000000.0
+    assert RateLimitedSession.retry_after(response("5")) == 5.0
+    assert RateLimitedSession.retry_after(response("Tue, 14 Nov 2023 22:13:30 GMT")) == 10.0
+    assert RateLimitedSession.retry_after(response("soon")) is None
+    assert RateLimitedSession.retry_after(response(None)) is None
+
+
+@pytest.mark.parametrize("headers, paused", [
+    ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "30"}, 30),
+    ({"RateLimit-Remaining": "0", "RateLimit-Reset": "1700000045"}, 45),
+    ({"X-HubSpot-RateLimit-Remaining": "0", "X-HubSpot-RateLimit-Interval-Milliseconds": "10000"}, 10),
+    ({"X-RateLimit-Remaining": "0"}, 0.1),
+    ({"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "30"}, None),
+])
+def test_exhausted_quota_holds_the_bucket_until_its_reset(clock, headers, paused):
+    bucket = TokenBucket(10, 1)
+    session = RateLimitedSession(limiter=bucket)
+
+    clock.now = 1700000000.0
+    session.observe_limits(type("Response", (), {"headers": headers})())
+
+    if paused is None:
+        assert bucket.paused_until == 0
+    else:
+        assert bucket.paused_until - clock.now == pytest.approx(paused)
+
+
+def test_adaptive_session_resizes_the_bucket_to_the_plan_limit(clock):
+    bucket = TokenBucket(10, 1)
+
+    RateLimitedSession(limiter=bucket).observe_limits(type("Response", (), {"headers": {"X-RateLimit-Total": "40"}})())
+    assert bucket.capacity == 10
+
+    RateLimitedSession(limiter=bucket, adaptive=True).observe_limits(
+        type("Response", (), {"headers": {"X-RateLimit-Total": "40"}})())
+    assert bucket.capacity == 40
+
+
+@pytest.fixture
+def httpx_session():
+    import httpx
+    import requests
+
+    def handler(request):
+        if request.url.path == "/old":
+            return httpx.Response(301, headers={"Location": "https://api.example.com/contacts"})
+        if request.url.path == "/slow":
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, json={"path": request.url.path, "auth": request.headers.get("Authorization")})
+
+    session = requests.Session()
+    session.mount("https://", main_api_class.HTTPXAdapter(httpx.Client(transport=httpx.MockTransport(handler))))
+    session.headers["Authorization"] = "Bearer token"
+    return session
+
+
+def test_httpx_adapter_returns_requests_responses(httpx_session):
+    response = httpx_session.get("https://api.example.com/contacts", timeout=(3, 10))
+
+    assert response.json() == {"path": "/contacts", "auth": "Bearer token"}
+    assert response.headers["content-type"] == "application/json"
+    assert response.elapsed.total_seconds() > 0
+    assert response.raw.read() == response.content
+
+
+def test_httpx_adapter_follows_redirects_and_closes(httpx_session):
+    import requests
+
+    response = httpx_session.get("https://api.example.com/old")
+
+    assert response.json()["path"] == "/contacts"
+    assert [redirect.status_code for redirect in response.history] == [301]
+    with pytest.raises(requests.Timeout):
+        httpx_session.get("https://api.example.com/slow")
+    httpx_session.close()
+
+
+def test_http_adapters_are_shared_per_connector():
+    first = main_api_class.get_http_adapter("tests-pooled", pool_maxsize=8)
+
+    assert main_api_class.get_http_adapter("tests-pooled") is first
+    assert isinstance(first, main_api_class.PooledHTTPAdapter)
+    first.close()
+    assert first.poolmanager.pools is not None
+
+
+@pytest.mark.parametrize("installed, expected", [(True, "br, gzip, deflate"), (False, "gzip, deflate")])
+def test_accept_encoding_asks_for_brotli_when_it_can_decode_it(monkeypatch, installed, expected):
+    monkeypatch.setattr(main_api_class.importlib.util, "find_spec", lambda name: object() if installed else None)
+
+    assert main_api_class.accept_encoding() == expected
+
+
+def test_api_sessions_share_the_connector_adapter_and_limiter():
+    from tests.conftest import example_api
+
+    api = example_api(rate_limit={"requests": 5, "per": 1})
+
+    first = api.connect_to_api("bearer", token="a")
+    second = api.connect_to_api("bearer", token="a")
+    other = api.connect_to_api("bearer", token="b")
+
+    assert first.get_adapter("https://api.example.com") is other.get_adapter("https://api.example.com")
+    assert first.limiter is second.limiter and first.limiter is not other.limiter
+    assert first.headers["Accept-Encoding"] == main_api_class.accept_encoding()
+
+
+def flatten_with_flatten_json(payload, main_response_key=None):
+    # the flattening fetch_data did before flatten_response, kept as the reference of its output
+    import flatten_json
+
+    cleaned = {}
+    for key, value in flatten_json.flatten(payload).items():
+        key = "_".join(part for part in key.split("_") if not part.isdigit() and part != main_response_key)
+        if key in cleaned:
+            cleaned[key] = cleaned[key] + [value] if isinstance(cleaned[key], list) else [cleaned[key], value]
+        else:
+            cleaned[key] = value
+    return cleaned
+
+
+@pytest.mark.parametrize("payload, main_response_key", [
+    ({"results": [{"id": 1, "properties": {"email": "a@b.c", "tags": ["x", "y"]}}, {"id": 2, "properties": {}}],
+      "paging": {"next": {"after": "2"}}}, "results"),
+    ({"data": [{"id": 1, "custom_fields": {"tier_2": None}}, {"id": 2, "custom_fields": {"tier_2": "gold"}}]}, None),
+    ({"records": [{"Id": "a", "attributes": {"type": "Account"}, "tags": []}]}, "records"),
+    ({"id": 7}, None),
+])
+def test_flatten_response_matches_flatten_json(payload, main_response_key):
+    from openetl_utils.main_api_class import flatten_response
+
+    assert flatten_response(payload, main_response_key) == flatten_with_flatten_json(payload, main_response_key)
+
+
+def test_flatten_response_gathers_the_values_of_a_column():
+    from openetl_utils.main_api_class import flatten_response
+
+    assert flatten_response({"results": [{"id": 1}, {"id": 2}, {"id": 3}]}, "results") == {"id": [1, 2, 3]}
+    assert flatten_response(None) == {} and flatten_response([]) == {}
+
+
+def test_flatten_response_caches_the_column_names_of_an_endpoint():
+    from openetl_utils.main_api_class import flatten_response
+
+    key_paths = {}
+    flatten_response({"results": [{"id": 1, "owner": {"name": "ada"}}]}, "results", key_paths)
+    columns = dict(key_paths["columns"])
+
+    assert flatten_response({"results": [{"id": 2, "owner": {"name": "bob"}}]}, "results", key_paths) == \
+        {"id": 2, "owner_name": "bob"}
+    assert key_paths["columns"] == columns
+
+
+def test_flattened_key_paths_are_kept_per_connector_instance():
+    from tests.conftest import example_api
+
+    first, second = example_api(), example_api()
+    first.flatten_page({"results": [{"id": 1}]}, "https://api.example.com/contacts?page=2", "results")
+
+    assert list(first._key_paths) == [("api.example.com", "/contacts", "results")]
+    assert second._key_paths == {}
+    assert first.flatten_page({"results": [{"id": 1}], "paging": {"next": 2}}, "https://api.example.com/contacts",
+                              "results", drop_keys=("paging",)) == {"id": 1}
+
+
+def test_paginator_rejects_unknown_styles_and_cursors_without_a_path():
+    from openetl_utils.main_api_class import Paginator
+
+    with pytest.raises(ValueError):
+        Paginator("token")
+    with pytest.raises(ValueError):
+        Paginator("cursor")
+
+
+def test_paginator_resumes_a_stored_state_of_its_style():
+    from openetl_utils.main_api_class import Paginator
+
+    paginator = Paginator("offset", page_size=50)
+
+    assert paginator.initial_state() == {"style": "offset", "position": 0, "page_size": 50}
+    assert paginator.resume({"style": "offset", "position": 150, "page_size": 25}) == \
+        {"style": "offset", "position": 150, "page_size": 25}
+    assert paginator.resume({"style": "cursor", "position": "abc", "page_size": 50}) == paginator.initial_state()
+    assert paginator.resume(None) == paginator.initial_state()
+
+
+@pytest.mark.parametrize("options, state, expected", [
+    ({"style": "cursor", "cursor_path": "paging.next.after"}, None, {"limit": 100}),
+    ({"style": "cursor", "cursor_path": "paging.next.after"}, "abc", {"limit": 100, "after": "abc"}),
+    ({"style": "offset", "size_param": None}, 200, {"offset": 200}),
+    ({"style": "page", "size_param": "per_page", "page_param": "p"}, 3, {"per_page": 100, "p": 3}),
+])
+def test_paginator_request_params(options, state, expected):
+    from openetl_utils.main_api_class import Paginator
+
+    paginator = Paginator(**options)
+
+    assert paginator.request_params({**paginator.initial_state(), "position": state}, {"archived": False}) == \
+        {"archived": False, **expected}
+
+
+def test_paginator_next_position_of_each_style():
+    import requests
+
+    from openetl_utils.main_api_class import Paginator
+
+    response = requests.Response()
+    response.url = "https://api.example.com/contacts?page=1"
+    response.headers["Link"] = '</contacts?page=2>; rel="next"'
+    state = {"position": 100, "page_size": 100}
+
+    cursor = Paginator("cursor", cursor_path="paging.next.after")
+    assert cursor.next_position(state, {"paging": {"next": {"after": "xyz"}}}, response, 100) == "xyz"
+    assert cursor.next_position(state, {"results": []}, response, 0) is None
+    assert Paginator("offset").next_position(state, {}, response, 100) == 200
+    assert Paginator("offset").next_position(state, {}, response, 99) is None
+    assert Paginator("page").next_position({"position": 3, "page_size": 100}, {}, response, 100) == 4
+    assert Paginator("link").next_position(state, {}, response, 100) == "https://api.example.com/contacts?page=2"
+    assert Paginator("link", next_url_path="next").next_position(
+        state, {"next": "/contacts?cursor=b"}, response, 100) == "https://api.example.com/contacts?cursor=b"
+
+
+@pytest.mark.parametrize("latency, size, page_size", [(10, 100, 50), (0.1, 30 * 1024 * 1024, 50), (0.1, 100, 200),
+                                                      (2, 100, 100)])
+def test_paginator_adapts_the_page_size_to_the_responses(latency, size, page_size):
+    from datetime import timedelta
+
+    import requests
+
+    from openetl_utils.main_api_class import Paginator
+
+    paginator = Paginator("offset", page_size=100, min_page_size=50, max_page_size=200)
+    response = requests.Response()
+    response.elapsed, response._content = timedelta(seconds=latency), b"x" * size
+    state = paginator.initial_state()
+
+    paginator.adapt(state, response)
+
+    assert state["page_size"] == page_size
+
+
+def cursor_pages(pages):
+    """
+    Answers a cursor paginated endpoint whose ``after`` cursor is the index of the page.
+    """
+    from urllib.parse import parse_qs, urlsplit
+
+    def respond(request):
+        index = int(parse_qs(urlsplit(request.url).query).get("after", ["0"])[0])
+        payload = {"results": [{"id": record_id} for record_id in pages[index]]}
+        if index + 1 < len(pages):
+            payload["paging"] = {"next": {"after": str(index + 1)}}
+        return 200, payload, {"ETag": f'"page-{index}"'}
+    return respond
+
+
+def test_paginate_yields_pages_with_the_state_to_resume_from():
+    from tests.conftest import example_api, fake_session
+
+    api = example_api(pagination={"style": "cursor", "cursor_path": "paging.next.after", "drop_keys": ["paging"]})
+    session = fake_session(cursor_pages([[1, 2], [3, 4], [5]]))
+
+    pages = list(api.paginate(session, "https://api.example.com/contacts", main_response_key="results"))
+    assert [page["id"] for page in pages] == [[1, 2], [3, 4], 5]
+    assert [page.resume_state for page in pages] == [{"style": "cursor", "position": "1", "page_size": 100},
+                                                     {"style": "cursor", "position": "2", "page_size": 100}, None]
+
+    resumed = list(api.paginate(session, "https://api.example.com/contacts", main_response_key="results",
+                                resume_state=pages[0].resume_state))
+    assert [page["id"] for page in resumed] == [[3, 4], 5]
+
+
+def test_page_resume_state_reaches_the_dataframe():
+    from openetl_utils.connector_utils import page_to_df
+    from tests.conftest import example_api, fake_session
+
+    api = example_api(pagination={"style": "cursor", "cursor_path": "paging.next.after", "drop_keys": ["paging"]})
+    pages = api.paginate(fake_session(cursor_pages([[1, 2], [3]])), "https://api.example.com/contacts",
+                         main_response_key="results")
+
+    assert [page_to_df(api, page).attrs["resume_state"] for page in pages] == \
+        [{"style": "cursor", "position": "1", "page_size": 100}, None]
+
+
+def test_http_cache_keys_pages_by_their_full_url():
+    from openetl_utils.main_api_class import HTTPCache
+
+    assert HTTPCache.key("https://api.example.com/contacts", {"limit": 100, "after": "a b"}) == \
+        "https://api.example.com/contacts?limit=100&after=a+b"
+
+
+def test_http_cache_keeps_the_validators_of_the_pages_requested():
+    import requests
+
+    from openetl_utils.main_api_class import HTTPCache
+
+    cache = HTTPCache({"https://api.example.com/a": {"etag": '"v1"', "last_modified": None, "records": 2, "next": "b"},
+                       "https://api.example.com/stale": {"etag": '"v0"'}})
+    response = requests.Response()
+
+    assert cache.conditional_headers("https://api.example.com/a") == {"If-None-Match": '"v1"'}
+    assert cache.conditional_headers("https://api.example.com/new") == {}
+    assert cache.revalidated("https://api.example.com/a")["next"] == "b"
+
+    cache.store("https://api.example.com/b", response, 2, None)
+    response.headers["Last-Modified"] = "Wed, 01 May 2024 10:00:00 GMT"
+    cache.store("https://api.example.com/c", response, 1, None)
+
+    assert set(cache.in_use) == {"https://api.example.com/a", "https://api.example.com/c"}
+    assert cache.in_use["https://api.example.com/c"] == {"etag": None, "last_modified": "Wed, 01 May 2024 10:00:00 GMT",
+                                                        "records": 1, "next": None}
+
+
+def cached_pages(pages, versions):
+    """
+    Answers a cursor paginated endpoint like cursor_pages, with an ETag per page version and 304 Not Modified
+    for a page requested with its current ETag.
+    """
+    from urllib.parse import parse_qs, urlsplit
+
+    def respond(request):
+        index = int(parse_qs(urlsplit(request.url).query).get("after", ["0"])[0])
+        etag = f'"page-{index}-v{versions[index]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return 304, b"", {"ETag": etag}
+        payload = {"results": [{"id": record_id} for record_id in pages[index]]}
+        if index + 1 < len(pages):
+            payload["paging"] = {"next": {"after": str(index + 1)}}
+        return 200, payload, {"ETag": etag}
+    return respond
+
+
+def test_paginate_skips_the_pages_not_modified_since_the_last_run():
+    from openetl_utils.main_api_class import HTTPCache
+    from tests.conftest import example_api, fake_session
+
+    api = example_api(pagination={"style": "cursor", "cursor_path": "paging.next.after", "drop_keys": ["paging"]})
+    versions = [1, 1, 1]
+    session = fake_session(cached_pages([[1, 2], [3, 4], [5]], versions))
+
+    api.http_cache = HTTPCache()
+    first = list(api.paginate(session, "https://api.example.com/contacts", main_response_key="results"))
+    versions[1] = 2
+    api.http_cache = HTTPCache(api.http_cache.in_use)
+    second = list(api.paginate(session, "https://api.example.com/contacts", main_response_key="results"))
+
+    assert [page["id"] for page in first] == [[1, 2], [3, 4], 5]
+    assert [page["id"] for page in second] == [[3, 4]]
+    assert [page.resume_state["position"] for page in second] == ["2"]
+    assert len(api.http_cache.in_use) == 3
+
+
+def test_page_numbered_pagination_skips_pages_not_modified():
+    from urllib.parse import parse_qs, urlsplit
+
+    from openetl_utils.main_api_class import HTTPCache
+    from tests.conftest import example_api, fake_session
+
+    versions = {1: 1, 2: 1, 3: 1}
+
+    def respond(request):
+        page = int(parse_qs(urlsplit(request.url).query)["page"][0])
+        etag = f'"page-{page}-v{versions.get(page, 0)}"'
+        if request.headers.get("If-None-Match") == etag:
+            return 304, b"", {"ETag": etag}
+        return 200, [{"id": page * 10 + index} for index in range(2 if page < 3 else 1 if page == 3 else 0)], \
+            {"ETag": etag}
+
+    api = example_api(pagination={"style": "page", "page_size": 2, "size_param": "per_page"})
+    session = fake_session(respond)
+
+    api.http_cache = HTTPCache()
+    first = list(api.paginate(session, "https://api.example.com/tickets"))
+    versions[2] = 2
+    api.http_cache = HTTPCache(api.http_cache.in_use)
+    second = list(api.paginate(session, "https://api.example.com/tickets"))
+
+    assert [page["id"] for page in first] == [[10, 11], [20, 21], 30]
+    assert [page["id"] for page in second] == [[20, 21]]
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from openetl_utils.main_db_class import DB
+
+
+@pytest.fixture
+def db():
+    database = DB.__new__(DB)
+    database.engine = create_engine("sqlite://")
+    pd.DataFrame({"id": range(1, 8), "name": list("abcdefg")}).sample(frac=1, random_state=0) \
+        .to_sql("users", database.engine, index=False)
+    return database
+
+
+def test_read_table_in_batches_pages_on_the_key(db):
+    pages = list(db.read_table_in_batches("users", "id", schema_name="main", page_size=3))
+
+    assert [page["id"].tolist() for page in pages] == [[1, 2, 3], [4, 5, 6], [7]]
+
+
+def test_read_table_in_batches_resumes_after_the_last_value(db):
+    pages = list(db.read_table_in_batches("users", "id", schema_name="main", page_size=3, last_value=5))
+
+    assert [page["id"].tolist() for page in pages] == [[6, 7]]
+
+
+def test_read_table_with_a_key_column_concatenates_the_pages(db):
+    df = db.read_table("users", schema_name="main", page_size=2, key_column="id")
+
+    assert df["name"].tolist() == list("abcdefg")
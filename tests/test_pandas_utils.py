@@ -0,0 +1,190 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from openetl_utils import pandas_utils
+
+
+class EstimateEngine:
+    """
+    Answers the row estimate query of estimate_row_count with a fixed value.
+    """
+
+    def __init__(self, estimate):
+        self.estimate = estimate
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query, params):
+        self.params = params
+        return type("Result", (), {"scalar": lambda result: self.estimate})()
+
+
+@pytest.fixture
+def sqlite_db():
+    from openetl_utils.database_utils import DatabaseUtils
+
+    db = DatabaseUtils()
+    db.engine = create_engine("sqlite://", poolclass=StaticPool)
+    return db
+
+
+@pytest.mark.parametrize("estimate, expected", [(1234.0, 1234), (0, None), (-1.0, None), (None, None)])
+def test_row_estimate_of_a_never_analyzed_table_is_unknown(estimate, expected):
+    engine = EstimateEngine(estimate)
+
+    assert pandas_utils.estimate_row_count(engine, "PostgreSQL", "orders") == expected
+    assert engine.params == {"table": "orders", "schema": "public"}
+
+
+def test_row_estimate_of_an_engine_without_statistics():
+    assert pandas_utils.estimate_row_count(EstimateEngine(10), "Oracle", "orders") is None
+
+
+def test_source_table_is_quoted_in_the_schema_of_its_estimate():
+    postgres = create_engine("postgresql+psycopg2://localhost/db")
+    mysql = create_engine("mysql+pymysql://localhost/db")
+
+    assert pandas_utils.quote_source_table(postgres, "PostgreSQL", "Order Items") == 'public."Order Items"'
+    assert pandas_utils.quote_source_table(postgres, "PostgreSQL", "orders", "Sales") == '"Sales".orders'
+    assert pandas_utils.quote_source_table(mysql, "MySQL", "order", "ignored") == "`order`"
+
+
+def test_query_is_read_in_chunks(sqlite_db):
+    pd.DataFrame({"id": range(5)}).to_sql("numbers", sqlite_db.engine, index=False)
+
+    chunks = list(pandas_utils.read_query_in_chunks(sqlite_db.engine, "SELECT id FROM numbers ORDER BY id", 2))
+
+    assert [chunk["id"].tolist() for chunk in chunks] == [[0, 1], [2, 3], [4]]
+
+
+def test_records_have_none_for_missing_and_json_for_nested_values():
+    df = pd.DataFrame({"id": [1, 2], "amount": [1.5, None], "tags": [["a"], None], "meta": [{"b": 1}, "raw"]})
+
+    assert list(pandas_utils.to_records(df)) == [(1, 1.5, '["a"]', '{"b": 1}'), (2, None, None, "raw")]
+
+
+def test_write_dataframe_creates_and_appends_to_the_target(sqlite_db):
+    pandas_utils.write_dataframe(pd.DataFrame({"id": [1], "name": ["ada"]}), "users", sqlite_db, "SQLite", {})
+    pandas_utils.write_dataframe(pd.DataFrame({"id": [2], "name": ["grace"]}), "users", sqlite_db, "SQLite", {})
+
+    with sqlite_db.engine.connect() as connection:
+        rows = connection.execute(text("SELECT id, name FROM users ORDER BY id")).fetchall()
+    assert [tuple(row) for row in rows] == [(1, "ada"), (2, "grace")]
+
+
+def test_write_dataframe_merge_drops_its_staging_table(sqlite_db, monkeypatch):
+    from sqlalchemy import inspect
+
+    with sqlite_db.engine.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"))
+    merges = []
+    monkeypatch.setattr(sqlite_db, "merge_staging_table",
+                        lambda table, staging, columns, keys, engine, schema_name=None:
+                        merges.append((table, columns, keys, inspect(sqlite_db.engine).has_table(staging))))
+
+    pandas_utils.write_dataframe(pd.DataFrame({"id": [1], "name": ["ada"]}), "users", sqlite_db, "SQLite", {},
+                                 {"mode": "merge", "key_columns": ["id"]})
+
+    assert merges == [("users", ["id", "name"], ["id"], True)]
+    assert inspect(sqlite_db.engine).get_table_names() == ["users"]
+
+
+def test_normalize_nulls_fills_each_column_by_its_dtype():
+    df = pd.DataFrame({"count": [1, None], "name": [" NaN ", None], "at": pd.to_datetime(["2024-01-01", None]),
+                       "active": pd.Series([True, None], dtype=object)})
+
+    normalized = pandas_utils.normalize_nulls(df)
+
+    assert normalized["count"].tolist() == [1.0, 0.0]
+    assert normalized["name"].tolist() == ["", ""]
+    assert normalized["at"].tolist() == [pd.Timestamp("2024-01-01"), pd.Timestamp("1970-01-01")]
+    assert normalized["active"].tolist() == [True, ""]
+    assert df["name"].tolist()[0] == " NaN "
+
+
+@pytest.mark.parametrize("values", [["nan", 1, {"a": 1}], ["nan", 1.5, 2], ["nan", b"raw", ["a"]]])
+def test_normalize_nulls_keeps_the_other_values_of_mixed_columns(values):
+    normalized = pandas_utils.normalize_nulls(pd.DataFrame({"value": values}), {"mode": "keep"})["value"]
+
+    assert pd.isna(normalized[0])
+    assert normalized.tolist()[1:] == values[1:]
+
+
+def test_normalize_nulls_with_custom_null_strings_and_fill_values():
+    df = pd.DataFrame({"name": ["N/A", "ada", None], "amount": [None, 2.5, 1.0]})
+
+    normalized = pandas_utils.normalize_nulls(df, {"null_strings": ["n/a"], "fill_values": {"string": "unknown",
+                                                                                           "float": -1.0}})
+
+    assert normalized["name"].tolist() == ["unknown", "ada", "unknown"]
+    assert normalized["amount"].tolist() == [-1.0, 2.5, 1.0]
+
+
+def test_normalize_nulls_keep_mode_leaves_nulls_for_the_target():
+    normalized = pandas_utils.normalize_nulls(pd.DataFrame({"name": ["nan", "ada"], "count": [None, 1.0]}),
+                                              {"mode": "keep"})
+
+    assert normalized["name"].isna().tolist() == [True, False]
+    assert normalized["count"].isna().tolist() == [True, False]
+
+
+def test_normalize_nulls_fills_timezone_aware_and_categorical_columns():
+    df = pd.DataFrame({"at": pd.to_datetime(["2024-01-01", None]).tz_localize("UTC"),
+                       "status": pd.Categorical(["open", None])})
+
+    normalized = pandas_utils.normalize_nulls(df)
+
+    assert normalized["at"][1] == pd.Timestamp("1970-01-01", tz="UTC")
+    assert normalized["status"].tolist() == ["open", ""]
+
+
+def page(start, stop, resume_state=None):
+    df = pd.DataFrame({"id": range(start, stop)})
+    if resume_state is not None:
+        df.attrs["resume_state"] = resume_state
+    return df
+
+
+def accumulate(accumulator, pages):
+    batches = [batch for df in pages for batch in accumulator.add(df)]
+    return batches + list(accumulator.flush())
+
+
+def test_accumulator_regroups_pages_into_fixed_size_batches():
+    accumulator = pandas_utils.BatchAccumulator(4)
+
+    batches = accumulate(accumulator, [page(0, 3), page(3, 3), page(3, 10), page(10, 11)])
+
+    assert [batch["id"].tolist() for batch in batches] == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10]]
+    assert [batch.index.tolist() for batch in batches][-1] == [0, 1, 2]
+    assert len(accumulator) == 0
+
+
+def test_accumulator_without_a_batch_size_passes_pages_through():
+    batches = accumulate(pandas_utils.BatchAccumulator(None), [page(0, 2), page(2, 5)])
+
+    assert [batch["id"].tolist() for batch in batches] == [[0, 1], [2, 3, 4]]
+
+
+def test_accumulator_batches_carry_the_state_of_the_last_completed_page():
+    accumulator = pandas_utils.BatchAccumulator(3)
+
+    batches = accumulate(accumulator, [page(0, 2, {"page": 1}), page(2, 6, {"page": 2}), page(6, 7, {"page": 3})])
+
+    # the first batch ends inside page 2, resuming from it reads page 2 again
+    assert [batch.attrs.get("resume_state") for batch in batches] == [{"page": 1}, {"page": 2}, {"page": 3}]
+
+
+def test_accumulator_batches_of_pages_without_state_carry_none():
+    batches = accumulate(pandas_utils.BatchAccumulator(2), [page(0, 3), page(3, 4)])
+
+    assert all("resume_state" not in batch.attrs for batch in batches)
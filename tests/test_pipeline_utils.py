@@ -0,0 +1,159 @@
+import pandas as pd
+import pytest
+from pyspark.sql.types import StringType
+
+from openetl_utils.pipeline_utils import filter_past_watermark, make_watermark, with_last_flag
+
+
+def test_filter_past_watermark_compares_by_dtype():
+    df = pd.DataFrame({"id": [1, 5, 10], "updated_at": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"]),
+                       "code": ["a", "b", "c"]})
+
+    assert filter_past_watermark(df, "id", "5")["id"].tolist() == [10]
+    assert filter_past_watermark(df, "updated_at", "2024-01-15")["id"].tolist() == [5, 10]
+    assert filter_past_watermark(df, "code", "a")["id"].tolist() == [5, 10]
+
+
+def test_filter_past_watermark_needs_the_cursor_column():
+    with pytest.raises(ValueError):
+        filter_past_watermark(pd.DataFrame({"id": [1]}), "updated_at", "2024-01-01")
+
+
+def test_make_watermark_skips_batches_that_do_not_advance_it():
+    assert make_watermark("updated_at", None, "run") is None
+    assert make_watermark("id", 42, "run") == {"cursor_column": "id", "value": "42", "run_id": "run"}
+
+
+def test_with_last_flag_marks_only_the_last_item():
+    assert list(with_last_flag(iter([1, 2, 3]))) == [(1, False), (2, False), (3, True)]
+    assert list(with_last_flag(iter([]))) == []
+
+
+def test_runs_use_spark_unless_the_engine_is_chosen():
+    import logging
+
+    from openetl_utils.pipeline_utils import use_in_process_engine
+
+    database = {"connection_type": "database", "connector_name": "postgresql", "connection_credentials": {}}
+    logger = logging.getLogger(__name__)
+
+    assert use_in_process_engine({}, database, "PostgreSQL", "orders", None, logger) is False
+    assert use_in_process_engine({"engine": "pandas"}, database, "PostgreSQL", "orders", None, logger) is True
+    assert use_in_process_engine({"engine": "auto"}, {"connection_type": "api"}, "HubSpot", "deals", None,
+                                 logger) is False
+
+
+@pytest.mark.parametrize("estimate, in_process", [(500, True), (500000, False), (None, False)])
+def test_auto_engine_runs_small_tables_in_process(monkeypatch, estimate, in_process):
+    import logging
+
+    from openetl_utils import pipeline_utils
+
+    monkeypatch.setattr(pipeline_utils.con_utils, "create_db_connector_engine",
+                        lambda name, **credentials: (None, None))
+    monkeypatch.setattr(pipeline_utils.pandas_utils, "estimate_row_count", lambda *args: estimate)
+    database = {"connection_type": "database", "connector_name": "postgresql", "connection_credentials": {}}
+
+    assert pipeline_utils.use_in_process_engine({"engine": "auto"}, database, "PostgreSQL", "orders", None,
+                                                logging.getLogger(__name__)) is in_process
+
+
+def test_registered_batch_infers_only_new_columns(document_db, monkeypatch):
+    import logging
+
+    from openetl_utils.pipeline_utils import pandas_to_spark_registered
+    from tests.conftest import ArrowSession
+
+    alters = []
+    monkeypatch.setattr(document_db, "alter_table_column_add_or_drop_alembic",
+                        lambda table, column_name=None, column_details=None, action=None, schema_name=None:
+                        alters.append((table, column_details.name, action)))
+    logger = logging.getLogger(__name__)
+
+    pandas_to_spark_registered(pd.DataFrame({"id": [1], "name": ["ada"]}), ArrowSession(), document_db, "job",
+                               "contacts", "contacts", None, "run-1", logger)
+    pd.DataFrame({"id": [1], "name": ["ada"]}).to_sql("contacts", document_db.engine, index=False)
+    _, schema = pandas_to_spark_registered(pd.DataFrame({"id": ["2"], "name": [None], "email": ["a@b.c"]}),
+                                           ArrowSession(), document_db, "job", "contacts", "contacts", None,
+                                           "run-2", logger)
+
+    # the registered types win over what the batch alone would infer
+    assert [(field.name, field.dataType.typeName()) for field in schema.fields] == \
+        [("id", "long"), ("name", "string"), ("email", "string")]
+    assert [alter[:2] for alter in alters] == [("contacts", "email")]
+    assert document_db.get_registered_schema("job", "contacts").version == 2
+
+
+def test_registered_batch_widens_conflicting_columns_to_strings(document_db, monkeypatch):
+    import logging
+
+    from openetl_utils.enums import ColumnActions
+    from openetl_utils.pipeline_utils import pandas_to_spark_registered
+    from tests.conftest import ArrowSession
+
+    alters = []
+    monkeypatch.setattr(document_db, "alter_table_column_add_or_drop_alembic",
+                        lambda table, column_name=None, column_details=None, action=None, schema_name=None:
+                        alters.append((table, column_details.name, action)))
+    logger = logging.getLogger(__name__)
+
+    pandas_to_spark_registered(pd.DataFrame({"id": [1], "code": [7]}), ArrowSession(), document_db, "job",
+                               "contacts", "contacts", None, "run-1", logger)
+    pd.DataFrame({"id": [1], "code": [7]}).to_sql("contacts", document_db.engine, index=False)
+    # the registered schema fails the batch with and without Arrow
+    _, schema = pandas_to_spark_registered(pd.DataFrame({"id": [2], "code": ["A-7"]}), ArrowSession(failures=2),
+                                           document_db, "job", "contacts", "contacts", None, "run-2", logger)
+
+    assert schema["code"].dataType == StringType()
+    assert alters == [("contacts", "code", ColumnActions.MODIFY)]
+    assert document_db.get_registered_schema("job", "contacts").version == 2
+
+
+def test_string_columns_are_sized_from_their_profile():
+    from openetl_utils.pipeline_utils import map_spark_type_to_sqlalchemy
+    from openetl_utils.spark_utils import ColumnProfile
+
+    assert map_spark_type_to_sqlalchemy(StringType(), profile=ColumnProfile("name", StringType(), True,
+                                                                            max_length=20)).length == 70
+    assert map_spark_type_to_sqlalchemy(StringType(), profile=ColumnProfile("name", StringType(), True)).length == 255
+    assert map_spark_type_to_sqlalchemy(StringType(), max_len=10).length == 60
+
+
+def test_target_table_is_created_from_the_column_profiles(document_db, monkeypatch):
+    from pyspark.sql.types import LongType, StructField, StructType
+    from sqlalchemy import inspect
+
+    from openetl_utils import pipeline_utils
+    from openetl_utils.spark_utils import ColumnProfile
+
+    schema = StructType([StructField("id", LongType()), StructField("name", StringType())])
+    profiles = {"id": ColumnProfile("id", LongType(), True), "name": ColumnProfile("name", StringType(), True,
+                                                                                   null_count=1, max_length=12)}
+    monkeypatch.setattr(pipeline_utils.sp_ut, "profile_columns", lambda df: profiles)
+    df = type("DataFrame", (), {"schema": schema})()
+
+    pipeline_utils.create_table_from_spark_df(df, document_db.engine, "contacts", schema_name=None,
+                                              primary_key_columns=["id"])
+
+    columns = {column["name"]: column for column in inspect(document_db.engine).get_columns("contacts")}
+    assert columns["name"]["type"].length == 62 and columns["name"]["nullable"]
+    assert columns["id"]["primary_key"] and not columns["id"]["nullable"]
+
+    with pytest.raises(ValueError, match="has 1 null values"):
+        pipeline_utils.create_table_from_spark_df(df, document_db.engine, "contacts_copy", schema_name=None,
+                                                  primary_key_columns=["name"])
+
+
+def test_read_data_regroups_api_pages_into_batches(monkeypatch):
+    import logging
+
+    from openetl_utils import pipeline_utils
+
+    pages = [pd.DataFrame({"id": [1, 2, 3]}), pd.DataFrame({"id": [4]}), pd.DataFrame({"id": [5, 6, 7, 8, 9]})]
+    monkeypatch.setattr(pipeline_utils.con_utils, "fetch_data_from_connector", lambda *args, **kwargs: iter(pages))
+
+    batches = pipeline_utils.read_data("hubspot", {}, "bearer", "contacts", "api", batch_size=4,
+                                       incremental={"cursor_column": "id", "watermark": "1"},
+                                       logger=logging.getLogger(__name__))
+
+    assert [batch["id"].tolist() for batch in batches] == [[2, 3, 4, 5], [6, 7, 8, 9]]
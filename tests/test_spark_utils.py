@@ -0,0 +1,334 @@
+import pandas as pd
+import pytest
+from pyspark.sql.types import StructType, StructField, StringType, LongType, IntegerType, DoubleType, DateType, \
+    BooleanType, TimestampType
+
+from tests.conftest import ArrowSession, FakeFrame, FakeSparkSession
+
+
+def bounds_loader(schema, lower_bound, upper_bound):
+    def load(options):
+        if "openetl_bounds" in options["dbtable"]:
+            return FakeFrame(rows=[{"lower_bound": lower_bound, "upper_bound": upper_bound}])
+        return FakeFrame(schema=schema)
+    return load
+
+
+def test_find_partition_column_prefers_id_then_keys_then_dates(spark_connection):
+    schema = StructType([StructField("name", StringType()), StructField("amount", DoubleType()),
+                         StructField("created", DateType()), StructField("customer_id", IntegerType()),
+                         StructField("id", LongType())])
+    assert spark_connection.find_partition_column(schema) == "id"
+
+    schema = StructType(schema.fields[:4])
+    assert spark_connection.find_partition_column(schema) == "customer_id"
+
+    schema = StructType(schema.fields[:3])
+    assert spark_connection.find_partition_column(schema) == "created"
+
+    schema = StructType(schema.fields[:1])
+    assert spark_connection.find_partition_column(schema) is None
+
+
+def test_partitioned_read_splits_on_the_detected_column(spark_connection):
+    schema = StructType([StructField("name", StringType()), StructField("id", LongType())])
+    spark_connection.spark_session = FakeSparkSession(bounds_loader(schema, 1.5, 9.2), default_parallelism=3)
+
+    frames = list(spark_connection.read_via_spark_partitioned({"url": "jdbc:test", "dbtable": "users"},
+                                                              fetchsize=500))
+
+    assert len(frames) == 1
+    options = spark_connection.spark_session.loads[-1]
+    # fractional bounds are widened, so no row falls outside the partitions
+    assert options["partitionColumn"] == "id"
+    assert (options["lowerBound"], options["upperBound"]) == ("1", "10")
+    assert options["numPartitions"] == "3"
+    assert options["fetchsize"] == "500"
+
+
+def test_partitioned_read_without_a_usable_column_reads_one_partition(spark_connection):
+    schema = StructType([StructField("name", StringType())])
+    spark_connection.spark_session = FakeSparkSession(bounds_loader(schema, None, None))
+
+    frames = list(spark_connection.read_via_spark_partitioned({"url": "jdbc:test", "dbtable": "users"}))
+
+    assert len(frames) == 1
+    assert "partitionColumn" not in spark_connection.spark_session.loads[-1]
+
+
+def test_partitioned_read_of_an_empty_table_yields_nothing(spark_connection):
+    spark_connection.spark_session = FakeSparkSession(bounds_loader(None, None, None))
+
+    assert list(spark_connection.read_via_spark_partitioned({"url": "jdbc:test", "dbtable": "users"},
+                                                            partition_column="id")) == []
+
+
+def test_keyset_query_seeks_past_the_last_key():
+    from openetl_utils.spark_utils import build_keyset_query
+
+    assert build_keyset_query("users", "id", 100) == "(SELECT * FROM users ORDER BY id LIMIT 100) openetl_keyset"
+    assert build_keyset_query("users", "id", 100, last_value=42) == \
+        "(SELECT * FROM users WHERE id > 42 ORDER BY id LIMIT 100) openetl_keyset"
+    assert build_keyset_query("users", "email", 100, last_value="o'hara") == \
+        "(SELECT * FROM users WHERE email > 'o''hara' ORDER BY email LIMIT 100) openetl_keyset"
+
+
+def test_keyset_query_limits_rows_per_engine():
+    from openetl_utils.spark_utils import build_keyset_query
+
+    assert build_keyset_query("users", "id", 10, 5, engine="Microsoft SQL Server") == \
+        "(SELECT TOP 10 * FROM users WHERE id > 5 ORDER BY id) openetl_keyset"
+    assert build_keyset_query("users", "id", 10, 5, engine="Oracle") == \
+        "(SELECT * FROM users WHERE id > 5 ORDER BY id FETCH FIRST 10 ROWS ONLY) openetl_keyset"
+
+
+def test_incremental_query_selects_rows_between_the_watermarks():
+    from openetl_utils.spark_utils import build_incremental_query
+
+    assert build_incremental_query("orders", "updated_at") == "(SELECT * FROM orders) openetl_incremental"
+    assert build_incremental_query("orders", "updated_at", "2024-01-01", "2024-02-01") == \
+        "(SELECT * FROM orders WHERE updated_at > '2024-01-01' AND updated_at <= '2024-02-01') openetl_incremental"
+    assert build_incremental_query("orders", "id", upper_watermark=100) == \
+        "(SELECT * FROM orders WHERE id <= 100) openetl_incremental"
+
+
+def test_composite_keyset_query_breaks_ties_of_the_cursor():
+    from openetl_utils.spark_utils import build_keyset_query
+
+    assert build_keyset_query("orders", ["updated_at", "id"], 10, ("2024-01-01", 7)) == \
+        "(SELECT * FROM orders WHERE (updated_at > '2024-01-01') OR (updated_at = '2024-01-01' AND id > 7) " \
+        "ORDER BY updated_at, id LIMIT 10) openetl_keyset"
+
+
+def test_partition_bounds_keep_the_raw_max_for_watermarks(spark_connection):
+    spark_connection.spark_session = FakeSparkSession(bounds_loader(None, 1.5, 9.2))
+    details = {"url": "jdbc:test", "dbtable": "orders"}
+
+    assert spark_connection.get_partition_bounds(details, "amount") == (1, 10)
+    assert spark_connection.get_partition_bounds(details, "amount", widen=False) == (1.5, 9.2)
+
+
+def test_jdbc_write_options_override_the_engine_defaults():
+    from openetl_utils.spark_utils import build_jdbc_write_options
+
+    options = build_jdbc_write_options("PostgreSQL", {"batchsize": 500, "numPartitions": 4, "method": "jdbc",
+                                                      "mode": "merge", "key_columns": ["id"]})
+
+    assert options == {"batchsize": 500, "isolationLevel": "NONE", "reWriteBatchedInserts": "true",
+                       "numPartitions": 4}
+    assert build_jdbc_write_options("Oracle") == {"batchsize": 10000, "isolationLevel": "NONE"}
+
+
+@pytest.mark.parametrize("write_config", [{"batch_size": 10}, {"batchsize": 0}, {"batchsize": True},
+                                          {"isolationLevel": "DIRTY"}, {"method": "copy"}, {"mode": "merge"}])
+def test_invalid_write_options_are_rejected(write_config):
+    from openetl_utils.spark_utils import validate_write_config
+
+    with pytest.raises(ValueError):
+        validate_write_config(write_config)
+
+
+class PartitionedFrame:
+    def __init__(self, partitions):
+        self.rdd = type("RDD", (), {"getNumPartitions": lambda rdd: partitions})()
+        self.calls = []
+
+    def coalesce(self, partitions):
+        self.calls.append(("coalesce", partitions))
+        return self
+
+    def repartition(self, partitions):
+        self.calls.append(("repartition", partitions))
+        return self
+
+
+@pytest.mark.parametrize("partitions, calls", [(8, [("coalesce", 4)]), (2, [("repartition", 4)]), (4, [])])
+def test_fit_partitions_matches_the_write_connections(partitions, calls):
+    from openetl_utils.spark_utils import fit_partitions
+
+    frame = PartitionedFrame(partitions)
+    fit_partitions(frame, 4)
+
+    assert frame.calls == calls
+
+
+class FakeRuntime:
+    def __init__(self, used, collected):
+        self.used, self.collected, self.collections = used, collected, 0
+
+    def totalMemory(self):
+        return self.used
+
+    def freeMemory(self):
+        return 0
+
+    def maxMemory(self):
+        return 100
+
+    def gc(self):
+        self.collections += 1
+        self.used = self.collected
+
+
+class PooledSession:
+    def __init__(self, jars, runtime=None):
+        self.jars = jars
+        self.stopped = False
+        self.runtime = runtime or FakeRuntime(10, 10)
+        self._jvm = type("JVM", (), {})()
+        self._jvm.java = type("Java", (), {})()
+        self._jvm.java.lang = type("Lang", (), {})()
+        self._jvm.java.lang.Runtime = type("Runtime", (), {"getRuntime": lambda: self.runtime})
+
+    def newSession(self):
+        return self
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def session_pool(monkeypatch):
+    from openetl_utils import spark_utils
+
+    monkeypatch.setattr(spark_utils, "cached_driver_jars", lambda: ["org.postgresql:postgresql:42.7.4"])
+    pool = spark_utils.SparkSessionPool(max_runs=3)
+    pool.built = []
+
+    def builder(jars):
+        pool.built.append(PooledSession(jars))
+        return pool.built[-1]
+    pool.builder = builder
+    return pool
+
+
+def test_pool_fingerprint_ignores_the_application_name():
+    from openetl_utils.spark_utils import SparkSessionPool
+
+    assert SparkSessionPool.fingerprint({"spark.app.name": "a", "spark.executor.memory": "1g"}) == \
+        SparkSessionPool.fingerprint({"spark.executor.memory": "1g", "spark.app.name": "b"})
+    assert SparkSessionPool.fingerprint({"spark.executor.memory": "1g"}) != \
+        SparkSessionPool.fingerprint({"spark.executor.memory": "2g"})
+
+
+def test_pool_reuses_the_application_and_loads_the_jar_cache(session_pool):
+    configuration = {"spark.app.name": "tests"}
+
+    first = session_pool.acquire("com.mysql:mysql-connector-j:9.1.0", configuration, builder=session_pool.builder)
+    second = session_pool.acquire("", configuration, builder=session_pool.builder)
+
+    assert first is second and len(session_pool.built) == 1
+    assert first.jars == ["com.mysql:mysql-connector-j:9.1.0", "org.postgresql:postgresql:42.7.4"]
+
+
+def test_pool_replaces_the_application_on_a_new_fingerprint_or_after_max_runs(session_pool):
+    for _ in range(3):
+        session_pool.acquire("", {"spark.executor.memory": "1g"}, builder=session_pool.builder)
+    session_pool.acquire("", {"spark.executor.memory": "1g"}, builder=session_pool.builder)
+    session_pool.acquire("", {"spark.executor.memory": "2g"}, builder=session_pool.builder)
+
+    assert [session.stopped for session in session_pool.built] == [True, True, False]
+    # replaced applications keep the jars of the JVM the process started with
+    assert session_pool.built[-1].jars == session_pool.built[0].jars
+
+
+def test_pool_rejects_jars_missing_from_the_started_jvm(session_pool):
+    session_pool.acquire("", {}, builder=session_pool.builder)
+
+    with pytest.raises(RuntimeError, match="com.mysql:mysql-connector-j:9.1.0"):
+        session_pool.acquire("com.mysql:mysql-connector-j:9.1.0", {}, builder=session_pool.builder)
+
+
+@pytest.mark.parametrize("used, collected, collections, recycle", [(50, 50, 0, False), (90, 40, 1, False),
+                                                                   (90, 80, 1, True)])
+def test_pool_only_collects_garbage_over_the_heap_limit(session_pool, used, collected, collections, recycle):
+    session_pool._session = PooledSession([], FakeRuntime(used, collected))
+
+    assert session_pool._needs_recycle() is recycle
+    assert session_pool._session.runtime.collections == collections
+
+
+def test_pool_release_restores_the_hadoop_settings(session_pool):
+    class Configuration(dict):
+        def set(self, name, value):
+            self[name] = value
+
+        def unset(self, name):
+            self.pop(name, None)
+
+    class Context:
+        def __init__(self):
+            self.hadoop, self.cancelled, self.properties = Configuration(), [], {}
+            self._jsc = type("JSC", (), {"hadoopConfiguration": lambda jsc: self.hadoop})()
+
+        def cancelJobGroup(self, group):
+            self.cancelled.append(group)
+
+        def setLocalProperty(self, name, value):
+            self.properties[name] = value
+
+    session = type("Session", (), {})()
+    session.sparkContext = Context()
+    session.catalog = type("Catalog", (), {"clearCache": lambda catalog: None})()
+    session.sparkContext.hadoop.update({"fs.s3a.access.key": "run-key", "fs.s3a.endpoint": "run-endpoint"})
+
+    session_pool.release(session, "run-1", {"fs.s3a.access.key": None, "fs.s3a.endpoint": "default-endpoint"})
+
+    assert session.sparkContext.hadoop == {"fs.s3a.endpoint": "default-endpoint"}
+    assert session.sparkContext.cancelled == ["run-1"]
+    assert session.sparkContext.properties["spark.jobGroup.id"] is None
+
+
+def test_spark_schema_from_pandas_types_object_columns_by_their_values():
+    from openetl_utils.spark_utils import spark_schema_from_pandas
+
+    df = pd.DataFrame({"id": pd.Series([1, 2], dtype="int32"), "big": [1, 2], "amount": [1.5, None],
+                       "active": [True, False], "at": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+                       "name": ["a", None], "count": pd.Series([1, None], dtype=object),
+                       "meta": [{"a": 1}, None], "mixed": ["a", 1]})
+
+    schema, fallback = spark_schema_from_pandas(df)
+
+    assert [type(field.dataType) for field in schema.fields] == \
+        [IntegerType, LongType, DoubleType, BooleanType, TimestampType, StringType, LongType, StringType, StringType]
+    assert fallback == ["meta", "mixed"]
+
+
+def test_pandas_to_spark_converts_only_the_fallback_columns_to_strings():
+    from openetl_utils.spark_utils import pandas_to_spark
+
+    session = ArrowSession()
+    df = pd.DataFrame({"id": [1, 2], "meta": [{"a": 1}, float("nan")], "mixed": ["a", 1]})
+
+    converted, schema = pandas_to_spark(df, session)
+
+    assert converted["meta"].tolist() == ['{"a": 1}', None]
+    assert converted["mixed"].tolist() == ["a", "1"]
+    assert converted["id"].tolist() == [1, 2]
+    assert ("spark.sql.execution.arrow.pyspark.fallback.enabled", "false") in session.settings
+
+
+def test_pandas_to_spark_logs_and_retries_without_arrow(caplog):
+    from openetl_utils.spark_utils import pandas_to_spark
+
+    session = ArrowSession(failures=1)
+    pandas_to_spark(pd.DataFrame({"id": [1]}), session)
+
+    assert len(session.created) == 2
+    assert "converting it row by row" in caplog.text
+    assert session.settings[-2:] == [("spark.sql.execution.arrow.pyspark.enabled", "false"),
+                                     ("spark.sql.execution.arrow.pyspark.enabled", "true")]
+
+
+def test_column_profile_fits_sized_strings_and_integer_ranges():
+    from sqlalchemy import BigInteger, Integer, SmallInteger, String, Text
+
+    from openetl_utils.spark_utils import ColumnProfile
+
+    name = ColumnProfile("name", StringType(), True, max_length=40)
+    assert name.fits(String(40)) and not name.fits(String(39)) and name.fits(Text)
+
+    count = ColumnProfile("count", LongType(), True, min_value=-5, max_value=2 ** 31)
+    assert not count.fits(Integer) and count.fits(BigInteger)
+    assert ColumnProfile("count", LongType(), True, min_value=-5, max_value=300).fits(SmallInteger)
+    assert not ColumnProfile("count", LongType(), True, min_value=-2 ** 15 - 1, max_value=0).fits(SmallInteger)